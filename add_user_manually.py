@@ -2,10 +2,24 @@
 """
 Manual User Management for FastFounder Daily Bot
 Add users manually without needing 24/7 polling.
+
+Run without arguments for the interactive menu, or use the bulk
+subcommands:
+
+    python add_user_manually.py import subscribers.csv
+    python add_user_manually.py export users.jsonl --all
 """
 
+import argparse
+import csv
+import json
 import logging
+import os
+import re
 import sys
+import time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from main_multiuser_daily import AUDIENCES, CATEGORIES
 from user_manager import UserManager
 
 # Configure logging
@@ -19,6 +33,14 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+IMPORT_FIELDS = ['chat_id', 'username', 'first_name', 'last_name',
+                 'categories', 'audiences', 'timezone', 'delivery_hour', 'active']
+EXPORT_FIELDS = IMPORT_FIELDS + ['joined_date', 'message_count']
+
+ACTIVE_VALUES = {'true': True, '1': True, 'yes': True, 'false': False, '0': False, 'no': False}
+
+CHAT_ID_PATTERN = re.compile(r'^-?\d+$')
+
 
 def add_user_interactive():
     """Add a user interactively."""
@@ -35,6 +57,7 @@ def add_user_interactive():
     
     # Add user
     success = user_manager.add_user(chat_id, username, first_name, last_name)
+    user_manager.compact()
     
     if success:
         total_users = user_manager.get_user_count()
@@ -86,6 +109,7 @@ def remove_user_interactive():
     chat_id = input("\nEnter Chat ID to remove: ").strip()
     
     success = user_manager.remove_user(chat_id)
+    user_manager.compact()
     
     if success:
         print(f"✅ User {chat_id} removed successfully!")
@@ -107,6 +131,219 @@ def get_chat_id_instructions():
     print("Your Chat ID is: 717156736")
 
 
+def detect_format(path, fmt=None):
+    """Pick csv or jsonl from an explicit format or the file extension."""
+    if fmt:
+        return fmt
+    extension = os.path.splitext(path)[1].lower()
+    return 'jsonl' if extension in ('.jsonl', '.ndjson', '.json') else 'csv'
+
+
+def open_stream(path, mode):
+    """Open a file, or stdin/stdout for '-'."""
+    if path == '-':
+        return open(sys.stdin.fileno() if 'r' in mode else sys.stdout.fileno(),
+                    mode, encoding='utf-8', newline='', closefd=False)
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def read_rows(f, fmt):
+    """Yield (line_number, row) pairs; row is None for unparseable lines."""
+    if fmt == 'csv':
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    
+    for line_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def _clean(value):
+    """Strip a field, mapping blanks to None."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _interest_list(value):
+    """Interests come as a JSON list or a comma-separated CSV cell."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, list):
+        return [str(part).strip().lower() for part in value if str(part).strip()]
+    return [part.strip().lower() for part in str(value).split(',') if part.strip()]
+
+
+def validate_row(row):
+    """Validate one import row; returns (user, None) or (None, reason)."""
+    if row is None:
+        return None, 'unparseable row'
+    
+    chat_id = _clean(row.get('chat_id', row.get('id')))
+    if chat_id is None:
+        return None, 'missing chat_id'
+    if not CHAT_ID_PATTERN.match(chat_id):
+        return None, 'invalid chat_id'
+    
+    username = _clean(row.get('username'))
+    user = {
+        'chat_id': str(int(chat_id)),
+        'username': username.lstrip('@') if username else None,
+        'first_name': _clean(row.get('first_name')),
+        'last_name': _clean(row.get('last_name')),
+        'categories': _interest_list(row.get('categories')),
+        'audiences': _interest_list(row.get('audiences')),
+        'timezone': _clean(row.get('timezone')),
+        'delivery_hour': _clean(row.get('delivery_hour')),
+        'active': _clean(row.get('active')),
+    }
+    
+    if any(category not in CATEGORIES for category in user['categories'] or []):
+        return None, 'unknown category'
+    if any(audience not in AUDIENCES for audience in user['audiences'] or []):
+        return None, 'unknown audience'
+    
+    if user['timezone']:
+        try:
+            ZoneInfo(user['timezone'])
+        except (ZoneInfoNotFoundError, ValueError):
+            return None, 'unknown timezone'
+    
+    if user['delivery_hour'] is not None:
+        if not user['delivery_hour'].isdigit() or not 0 <= int(user['delivery_hour']) <= 23:
+            return None, 'invalid delivery_hour'
+        user['delivery_hour'] = int(user['delivery_hour'])
+    
+    if user['active'] is not None:
+        if user['active'].lower() not in ACTIVE_VALUES:
+            return None, 'invalid active'
+        user['active'] = ACTIVE_VALUES[user['active'].lower()]
+    
+    return user, None
+
+
+def import_users(path, fmt=None, rejected_path=None):
+    """Bulk-import subscribers from CSV/JSONL in one store transaction."""
+    fmt = detect_format(path, fmt)
+    start = time.perf_counter()
+    
+    users = []
+    seen = set()
+    rejected = []
+    rows_read = 0
+    
+    with open_stream(path, 'r') as f:
+        for line_number, row in read_rows(f, fmt):
+            rows_read += 1
+            user, reason = validate_row(row)
+            if user and user['chat_id'] in seen:
+                user, reason = None, 'duplicate chat_id'
+            if reason:
+                rejected.append({'line': line_number, 'reason': reason, 'row': row})
+                continue
+            seen.add(user['chat_id'])
+            users.append(user)
+    
+    # One journal write for the whole batch; per-user add logs would drown the report
+    logging.getLogger('user_manager').setLevel(logging.WARNING)
+    user_manager = UserManager()
+    created, updated = user_manager.import_users(users)
+    user_manager.compact()
+    elapsed = time.perf_counter() - start
+    
+    print(f"📥 Imported {len(users)} of {rows_read} rows from {path} ({fmt})")
+    print(f"   ➕ New users: {created}")
+    print(f"   🔄 Updated users: {updated}")
+    print(f"   🚫 Rejected rows: {len(rejected)}")
+    print(f"   ⏱️ {elapsed:.2f}s ({rows_read / elapsed if elapsed > 0 else 0:.0f} rows/s)")
+    
+    reasons = {}
+    for item in rejected:
+        reasons[item['reason']] = reasons.get(item['reason'], 0) + 1
+    for reason, count in sorted(reasons.items(), key=lambda item: -item[1]):
+        print(f"      {reason}: {count}")
+    for item in rejected[:10]:
+        print(f"      line {item['line']}: {item['reason']}")
+    
+    if rejected and rejected_path:
+        with open(rejected_path, 'w', encoding='utf-8') as f:
+            for item in rejected:
+                f.write(json.dumps(item, ensure_ascii=False) + '\n')
+        print(f"💾 Rejected rows saved to {rejected_path}")
+    
+    return created, updated, rejected
+
+
+def export_users(path, fmt=None, include_inactive=False):
+    """Stream subscribers to CSV/JSONL."""
+    fmt = detect_format(path, fmt)
+    start = time.perf_counter()
+    user_manager = UserManager()
+    exported = 0
+    
+    with open_stream(path, 'w') as f:
+        writer = None
+        if fmt == 'csv':
+            writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+        
+        for chat_id, user_info in user_manager.iter_users():
+            if not include_inactive and not user_info.get('active', True):
+                continue
+            row = {field: user_info.get(field) for field in EXPORT_FIELDS}
+            row['chat_id'] = chat_id
+            row['active'] = user_info.get('active', True)
+            
+            if writer:
+                for field in ('categories', 'audiences'):
+                    row[field] = ','.join(row[field] or [])
+                writer.writerow(row)
+            else:
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+            exported += 1
+    
+    elapsed = time.perf_counter() - start
+    # Keep stdout clean when exporting to it
+    report = sys.stderr if path == '-' else sys.stdout
+    print(f"📤 Exported {exported} users to {path} ({fmt}) in {elapsed:.2f}s "
+          f"({exported / elapsed if elapsed > 0 else 0:.0f} rows/s)", file=report)
+    return exported
+
+
+def run_command(argv):
+    """Run a non-interactive bulk subcommand."""
+    parser = argparse.ArgumentParser(description='FastFounder Daily Bot user management')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    import_parser = subparsers.add_parser('import', help='bulk-import subscribers from CSV/JSONL')
+    import_parser.add_argument('path', help="input file ('-' for stdin)")
+    import_parser.add_argument('--format', choices=['csv', 'jsonl'], help='default: from the file extension')
+    import_parser.add_argument('--rejected', help='write rejected rows to this JSONL file')
+    
+    export_parser = subparsers.add_parser('export', help='export subscribers to CSV/JSONL')
+    export_parser.add_argument('path', help="output file ('-' for stdout)")
+    export_parser.add_argument('--format', choices=['csv', 'jsonl'], help='default: from the file extension')
+    export_parser.add_argument('--all', action='store_true', help='include inactive users')
+    
+    subparsers.add_parser('compact', help='fold users.json.log into users.json')
+    
+    args = parser.parse_args(argv)
+    if args.command == 'import':
+        import_users(args.path, args.format, args.rejected)
+    elif args.command == 'compact':
+        UserManager().compact()
+    else:
+        export_users(args.path, args.format, args.all)
+
+
 def main():
     """Main menu."""
     while True:
@@ -137,4 +374,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    if len(sys.argv) > 1:
+        run_command(sys.argv[1:])
+    else:
+        main() 
\ No newline at end of file
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Analysis Cache for FastFounder Daily Bot
+Stores generated article analyses by URL so they are not regenerated.
+"""
+
+import json
+import os
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCache:
+    """Persists AI analyses keyed by article URL."""
+
+    def __init__(self, cache_file='analysis_cache.json'):
+        self.cache_file = cache_file
+        self.entries = self._load_entries()
+
+    def _load_entries(self):
+        """Load cached analyses from JSON file."""
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.error(f"❌ Error loading analysis cache: {e}")
+                return {}
+        return {}
+
+    def _save_entries(self):
+        """Save cached analyses to JSON file."""
+        try:
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2)
+            logger.info(f"💾 Analysis cache saved to {self.cache_file}")
+        except Exception as e:
+            logger.error(f"❌ Error saving analysis cache: {e}")
+
+    def get(self, url):
+        """Get the cached analysis for an article URL, or None."""
+        entry = self.entries.get(url)
+        return entry['analysis'] if entry else None
+
+    def get_entry(self, url):
+        """Get the full cache entry (analysis plus metadata) for a URL."""
+        return self.entries.get(url)
+
+    def put(self, article_data, analysis):
+        """Cache an analysis for a scraped article."""
+        self.entries[article_data['url']] = {
+            'title': article_data.get('title', ''),
+            'pub_date': article_data.get('pub_date', ''),
+            'content_quality': article_data.get('content_quality', ''),
+            'cached_at': datetime.now().isoformat(),
+            'analysis': analysis
+        }
+        self._save_entries()
+
+    def __contains__(self, url):
+        return url in self.entries
+
+    def __len__(self):
+        return len(self.entries)
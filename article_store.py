@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Article Store for FastFounder Daily Bot
+Keeps scraped article text on disk so re-analysis and re-rendering do not
+have to scrape again.
+
+- blobs: gzip-compressed article text named by its SHA-256, so identical
+  content is stored once no matter how many URLs point to it;
+- index: append-only JSONL of per-URL metadata (hash, title, pub_date,
+  content_quality, modified_gmt, fetched_at); the last record for a URL wins.
+
+The index is kept in fetch order, so prune() can drop the least recently
+fetched articles (and blobs nothing else refers to) without sorting or
+walking the blob directory; the bot calls it once per run.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Content quality ranking; a stored article is only replaced by equal or better text
+QUALITY_RANK = {'fallback': 0, 'rss': 1, 'full_extraction': 2, 'improved_extraction': 2, 'authenticated': 3}
+
+
+def content_hash(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class ArticleStore:
+    """Content-addressed, compressed store of scraped articles keyed by URL."""
+
+    def __init__(self, root='article_store'):
+        self.root = root
+        self.index_file = os.path.join(root, 'index.jsonl')
+        self._lock = threading.Lock()
+        self._records = 0
+        self._torn = False
+        self._released = set()  # hashes whose URL moved on to other content
+        self.index = self._load_index()
+
+    def _load_index(self):
+        """Replay the index log into a URL -> metadata dict."""
+        index = {}
+        if not os.path.exists(self.index_file):
+            return index
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn line from an interrupted write; rewritten before the next append
+                        self._torn = True
+                        continue
+                    index.pop(record['url'], None)  # keep fetch order: the latest record goes last
+                    index[record['url']] = record
+                    self._records += 1
+        except Exception as e:
+            logger.error(f"❌ Error loading article store index: {e}")
+        return index
+
+    def _blob_path(self, digest):
+        return os.path.join(self.root, 'blobs', digest[:2], f'{digest[2:]}.gz')
+
+    def _write_blob(self, digest, content):
+        """Write a blob unless identical content is already stored; returns True if written."""
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+            f.write(content.encode('utf-8'))
+        os.replace(tmp_path, path)
+        return True
+
+    def put(self, article_data):
+        """Store a scraped article; returns its content hash.
+
+        Lower-quality text (e.g. the RSS teaser) never replaces a better
+        version that is already stored for the same URL. modified_gmt is
+        the WordPress edit time the text was fetched at, if known.
+        """
+        content = article_data.get('content') or ''
+        if not content:
+            return None
+
+        url = article_data['url']
+        quality = article_data.get('content_quality', '')
+        modified_gmt = article_data.get('modified_gmt') or ''
+        digest = content_hash(content)
+
+        with self._lock:
+            current = self.index.get(url)
+            if current and (QUALITY_RANK.get(quality, 0) < QUALITY_RANK.get(current['content_quality'], 0) or
+                            (current['hash'] == digest and current.get('modified_gmt', '') >= modified_gmt)):
+                return current['hash']
+
+            try:
+                os.makedirs(self.root, exist_ok=True)
+                written = self._write_blob(digest, content)
+                record = {
+                    'url': url,
+                    'hash': digest,
+                    'title': article_data.get('title', ''),
+                    'pub_date': article_data.get('pub_date', ''),
+                    'content_quality': quality,
+                    'modified_gmt': modified_gmt,
+                    'fetched_at': article_data.get('fetched_at') or datetime.now().isoformat(),
+                    'size': len(content)
+                }
+                if current and current['hash'] != digest:
+                    self._released.add(current['hash'])
+                self.index.pop(url, None)  # re-inserted last: the index stays in fetch order
+                self.index[url] = record
+                # Superseded records are dropped once they outnumber live ones
+                if self._torn or self._records >= 2 * len(self.index) + 100:
+                    self._rewrite_index()
+                else:
+                    with open(self.index_file, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    self._records += 1
+            except Exception as e:
+                logger.error(f"❌ Error storing article {url}: {e}")
+                return None
+
+        logger.info(f"💾 Stored article content ({len(content)} chars{'' if written else ', deduplicated'})")
+        return digest
+
+    def read_content(self, digest):
+        """Decompress a blob by hash, or None if it is missing."""
+        try:
+            with gzip.open(self._blob_path(digest), 'rb') as f:
+                return f.read().decode('utf-8')
+        except FileNotFoundError:
+            return None
+
+    def get(self, url):
+        """Get the stored article for a URL (metadata plus content), or None."""
+        record = self.index.get(url)
+        if not record:
+            return None
+        content = self.read_content(record['hash'])
+        if content is None:
+            logger.warning(f"⚠️ Article store blob missing for {url}")
+            return None
+        return dict(record, content=content)
+
+    def _rewrite_index(self):
+        tmp_path = f"{self.index_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in self.index.values():
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.index_file)
+        self._records = len(self.index)
+        self._torn = False
+
+    def prune(self, keep):
+        """Keep the `keep` most recently fetched articles; returns how many were dropped.
+
+        Blobs of dropped or replaced articles are deleted unless another URL
+        still points to them.
+        """
+        with self._lock:
+            dropped = list(self.index)[:max(0, len(self.index) - keep)]
+            candidates = self._released
+            for url in dropped:
+                candidates.add(self.index.pop(url)['hash'])
+            if not candidates:
+                return 0
+
+            referenced = {record['hash'] for record in self.index.values()}
+            removed = 0
+            try:
+                if dropped:
+                    self._rewrite_index()
+                for digest in candidates - referenced:
+                    try:
+                        os.remove(self._blob_path(digest))
+                        removed += 1
+                    except FileNotFoundError:
+                        pass
+            except Exception as e:
+                logger.error(f"❌ Error pruning article store: {e}")
+                return 0
+            self._released = set()
+
+        if dropped or removed:
+            logger.info(f"🧹 Article store trimmed to {len(self.index)} articles ({removed} blobs removed)")
+        return len(dropped)
+
+    def compact(self):
+        """Rewrite the index log with one record per URL."""
+        with self._lock:
+            self._rewrite_index()
+
+    def __contains__(self, url):
+        return url in self.index
+
+    def __len__(self):
+        return len(self.index)
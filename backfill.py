@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Archive Backfill Crawler for FastFounder Daily Bot
+
+Collects the whole FastFounder back catalogue for later batch analysis,
+while the daily bot only ever looks at the newest RSS item.
+
+- discovery: WordPress REST API pages, RSS feed pages (feed/?paged=N) or
+  the sitemap, whichever the site answers first (or --source);
+- fetching: a bounded worker pool using the authenticated session, with
+  a politeness delay per host;
+- progress: checkpointed to a state file, so an interrupted run resumes
+  where it stopped instead of starting over.
+
+Usage:
+    python backfill.py                     # discover + fetch, resuming if possible
+    python backfill.py --source feed       # force a discovery source
+    python backfill.py --workers 8 --delay 0.5 --limit 100
+    python backfill.py --restart           # ignore the saved checkpoint
+"""
+
+import argparse
+import json
+import logging
+import os
+import urllib.parse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from article_store import ArticleStore
+from main_multiuser_daily import (
+    BROWSER_HEADERS,
+    FastFounderAuthenticatedScraper,
+    minimal_clean,
+    parse_rss_feed,
+)
+from rate_limiter import RateLimiter
+from transport import HTTPStatusError, Transport, get_default_transport
+
+logger = logging.getLogger(__name__)
+
+# Parallel article fetches
+BACKFILL_WORKERS = int(os.environ.get('BACKFILL_WORKERS', '4'))
+
+# Minimum seconds between two requests to the same host
+BACKFILL_DELAY = float(os.environ.get('BACKFILL_DELAY', '1.0'))
+
+# The archive gets its own store: the bot prunes ARTICLE_STORE_DIR to its newest articles
+BACKFILL_STORE_DIR = os.environ.get('BACKFILL_STORE_DIR', 'article_archive')
+
+# Failed fetches of one article before it is given up
+BACKFILL_MAX_ATTEMPTS = 3
+
+# Completed articles between two checkpoint writes
+CHECKPOINT_EVERY = 20
+
+SITEMAP_PATHS = ['wp-sitemap.xml', 'sitemap.xml', 'sitemap_index.xml']
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+
+def load_state(path):
+    """Load the crawl checkpoint, or None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"❌ Error loading backfill state: {e}")
+        return None
+
+
+def save_state(state, path):
+    """Write the crawl checkpoint atomically."""
+    try:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error(f"❌ Error saving backfill state: {e}")
+
+
+def new_state(source):
+    return {
+        'source': source,
+        'next_page': 1,
+        'discovery_done': False,
+        'articles': {}
+    }
+
+
+class HostThrottle:
+    """One rate limiter per host, so each site sees at most 1/delay requests/s."""
+
+    def __init__(self, delay):
+        self.rate = 1.0 / delay if delay > 0 else 0
+        self._limiters = {}
+
+    def wait(self, url):
+        host = urllib.parse.urlsplit(url).netloc
+        # setdefault is atomic for dicts, so concurrent workers share one limiter
+        limiter = self._limiters.setdefault(host, RateLimiter(self.rate, burst=1.0))
+        return limiter.acquire()
+
+
+class ThrottledTransport(Transport):
+    """Wraps another transport and paces every request through a HostThrottle.
+
+    The scraper's WordPress API sync, slug lookups and HTML fallbacks all
+    go through here, so no request escapes the per-host delay.
+    """
+
+    def __init__(self, inner, throttle):
+        super().__init__(inner.endpoints, inner.timeout, inner.cookie_jar, inner.default_headers)
+        self.inner = inner
+        self.throttle = throttle
+
+    def request(self, method, url, data=None, headers=None, timeout=None, follow_redirects=True):
+        self.throttle.wait(url)
+        return self.inner.request(method, url, data=data, headers=headers,
+                                  timeout=timeout, follow_redirects=follow_redirects)
+
+    def close(self):
+        self.inner.close()
+
+
+class BackfillCrawler:
+    """Discovers archive URLs and fetches their content into the article store."""
+
+    def __init__(self, transport, scraper, state, state_path, store, workers=BACKFILL_WORKERS):
+        """transport should be a ThrottledTransport; the crawler does not pace requests itself."""
+        self.transport = transport
+        self.scraper = scraper
+        self.state = state
+        self.state_path = state_path
+        self.store = store
+        self.workers = max(1, workers)
+        self.extractor = scraper or FastFounderAuthenticatedScraper(transport)
+        self.posts_api = scraper.posts_api if scraper else None
+        if self.posts_api:
+            # Posts looked up one by one are saved with each checkpoint, not per article
+            self.posts_api.defer_saves = True
+
+    # --- discovery -----------------------------------------------------
+
+    def _add(self, article, content=None, content_quality=None):
+        """Register a discovered article; returns True if it is new."""
+        articles = self.state['articles']
+        if article['url'] in articles:
+            return False
+        articles[article['url']] = {
+            'title': article.get('title', ''),
+            'pub_date': article.get('pub_date', ''),
+            'description': article.get('description', ''),
+            'status': 'pending',
+            'attempts': 0
+        }
+        if content:
+            self._complete(article['url'], content, content_quality)
+        return True
+
+    def discover_rest(self):
+        """Walk /wp-json/wp/v2/posts; bodies come with the listing."""
+        posts_api = self.posts_api
+        if not posts_api or not posts_api.available:
+            return False
+
+        total_pages = None
+        while total_pages is None or self.state['next_page'] <= total_pages:
+            page = self.state['next_page']
+            articles, total_pages = posts_api.fetch_archive_page(page)
+            for article in articles:
+                self._add(article, article['content'], 'authenticated')
+            logger.info(f"🔎 REST page {page}/{total_pages}: {len(articles)} posts")
+            self.state['next_page'] = page + 1
+            self.checkpoint()
+        return True
+
+    def discover_feed(self):
+        """Walk feed/?paged=N until the feed runs out."""
+        while True:
+            page = self.state['next_page']
+            url = self.transport.endpoints.fastfounder('feed/')
+            try:
+                response = self.transport.get(url, params={'paged': page}, headers=BROWSER_HEADERS)
+                response.raise_for_status()
+                articles = parse_rss_feed(response.body)
+            except HTTPStatusError as e:
+                if e.response.status == 404 and page > 1:
+                    return True  # past the last page
+                raise
+
+            if not articles:
+                return True
+            added = sum(self._add(article) for article in articles)
+            logger.info(f"🔎 Feed page {page}: {len(articles)} items, {added} new")
+            self.state['next_page'] = page + 1
+            self.checkpoint()
+
+    def _sitemap_locs(self, url):
+        response = self.transport.get(url, headers=BROWSER_HEADERS)
+        response.raise_for_status()
+        root = ET.fromstring(response.body)
+        return root.tag.replace(SITEMAP_NS, ''), [
+            (loc.text.strip(), (entry.findtext(f'{SITEMAP_NS}lastmod') or '').strip())
+            for entry in root
+            for loc in entry.findall(f'{SITEMAP_NS}loc')
+            if loc.text
+        ]
+
+    def discover_sitemap(self):
+        """Collect post URLs from the sitemap (index files are followed)."""
+        for path in SITEMAP_PATHS:
+            try:
+                kind, entries = self._sitemap_locs(self.transport.endpoints.fastfounder(path))
+            except Exception as e:
+                logger.info(f"🔎 No sitemap at /{path}: {e}")
+                continue
+
+            if kind == 'sitemapindex':
+                # Only post sitemaps; pages, tags and authors are not articles
+                children = [loc for loc, _ in entries if 'post' in loc.rsplit('/', 1)[-1]]
+                entries = []
+                for child in children:
+                    entries.extend(self._sitemap_locs(child)[1])
+
+            added = sum(self._add({'url': loc, 'pub_date': lastmod}) for loc, lastmod in entries)
+            logger.info(f"🔎 Sitemap /{path}: {len(entries)} URLs, {added} new")
+            return True
+        return False
+
+    def discover(self, source):
+        """Run discovery with the given source, or the first that works for 'auto'."""
+        if self.state['discovery_done']:
+            return
+
+        sources = ['rest', 'feed', 'sitemap'] if source == 'auto' else [source]
+        if self.state['source'] in sources:
+            # Resume with the source that was in progress
+            sources = sources[sources.index(self.state['source']):]
+
+        for name in sources:
+            if self.state['source'] != name:
+                self.state.update(source=name, next_page=1)
+            try:
+                if getattr(self, f'discover_{name}')():
+                    self.state['source'] = name
+                    self.state['discovery_done'] = True
+                    self.checkpoint()
+                    logger.info(f"✅ Discovery via {name}: {len(self.state['articles'])} articles known")
+                    return
+            except Exception as e:
+                logger.warning(f"⚠️ Discovery via {name} failed: {e}")
+
+        logger.error("❌ No discovery source worked; fetching what is already known")
+
+    # --- fetching ------------------------------------------------------
+
+    def fetch_article(self, url, info):
+        """Fetch one article's text; returns (content, content_quality)."""
+        if self.scraper:
+            content = self.scraper.get_full_article_content(url)
+            if content:
+                return content, 'authenticated'
+
+        if info.get('description'):
+            return minimal_clean(info['description']), 'rss'
+
+        # No session and no RSS text: strip the public page
+        response = self.transport.get(url, headers=BROWSER_HEADERS)
+        response.raise_for_status()
+        return minimal_clean(self.extractor._extract_clean_content(response.text(errors='ignore'))), 'full_extraction'
+
+    def _complete(self, url, content, content_quality):
+        """Put an article in the article store and mark it done."""
+        info = self.state['articles'][url]
+        stored = self.store.put({
+            'url': url,
+            'title': info['title'],
+            'pub_date': info['pub_date'],
+            'content_quality': content_quality,
+            'content': content
+        })
+        if not stored:
+            raise ValueError('article store write failed')
+        info['status'] = 'done'
+        info.pop('description', None)  # no longer needed; keeps the checkpoint small
+
+    def fetch_pending(self, limit=None):
+        """Fetch every pending article with a bounded worker pool."""
+        pending = []
+        for url, info in self.state['articles'].items():
+            if info['status'] != 'pending':
+                continue
+            # Full text the daily bot already stored needs no second fetch
+            stored = self.store.index.get(url)
+            if stored and stored['content_quality'] == 'authenticated':
+                info['status'] = 'done'
+                continue
+            pending.append((url, info))
+        pending = pending[:limit]
+        if not pending:
+            logger.info("😴 Nothing left to fetch")
+            return 0
+
+        logger.info(f"📥 Fetching {len(pending)} articles with {self.workers} workers")
+        completed = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.fetch_article, url, info): url for url, info in pending}
+            # State and store are only touched here, on the main thread
+            for future in as_completed(futures):
+                url = futures[future]
+                info = self.state['articles'][url]
+                try:
+                    content, content_quality = future.result()
+                    if not content:
+                        raise ValueError('empty content')
+                    self._complete(url, content, content_quality)
+                    completed += 1
+                except Exception as e:
+                    info['attempts'] += 1
+                    if info['attempts'] >= BACKFILL_MAX_ATTEMPTS:
+                        info['status'] = 'failed'
+                    logger.warning(f"⚠️ Failed to fetch {url} (attempt {info['attempts']}): {e}")
+
+                if completed and completed % CHECKPOINT_EVERY == 0:
+                    self.checkpoint()
+                    logger.info(f"📊 Progress: {completed}/{len(pending)}")
+
+        self.checkpoint()
+        return completed
+
+    def checkpoint(self):
+        save_state(self.state, self.state_path)
+        if self.posts_api:
+            self.posts_api.flush()
+
+    def summary(self):
+        statuses = {}
+        for info in self.state['articles'].values():
+            statuses[info['status']] = statuses.get(info['status'], 0) + 1
+        return statuses
+
+
+def login_scraper(transport):
+    """Log in with FastFounder credentials from the environment; returns a scraper or None."""
+    email = os.environ.get('FAST_FOUNDER_EMAIL')
+    password = os.environ.get('FAST_FOUNDER_PASSWORD')
+    if not (email and password):
+        logger.warning("⚠️ No FastFounder credentials found - backfill gets RSS/public text only")
+        return None
+
+    scraper = FastFounderAuthenticatedScraper(transport)
+    if scraper.login(email, password):
+        return scraper
+    logger.warning("⚠️ Authentication failed - backfill gets RSS/public text only")
+    return None
+
+
+def main():
+    """Run (or resume) the archive backfill from the command line."""
+    parser = argparse.ArgumentParser(description='Backfill the FastFounder archive into a local store')
+    parser.add_argument('--source', choices=['auto', 'rest', 'feed', 'sitemap'], default='auto')
+    parser.add_argument('--workers', type=int, default=BACKFILL_WORKERS, help='parallel article fetches')
+    parser.add_argument('--delay', type=float, default=BACKFILL_DELAY, help='seconds between requests per host')
+    parser.add_argument('--limit', type=int, help='fetch at most this many articles in this run')
+    parser.add_argument('--state', default='backfill_state.json', help='checkpoint file')
+    parser.add_argument('--store', default=BACKFILL_STORE_DIR, help='article store directory')
+    parser.add_argument('--restart', action='store_true', help='ignore the saved checkpoint')
+    args = parser.parse_args()
+
+    state = None if args.restart else load_state(args.state)
+    if state and args.source not in ('auto', state['source']):
+        logger.info(f"🔄 Source changed from {state['source']} to {args.source}, restarting discovery")
+        state.update(source=args.source, next_page=1, discovery_done=False)
+    if state:
+        logger.info(f"♻️ Resuming backfill: {len(state['articles'])} articles known")
+    else:
+        state = new_state(args.source)
+
+    transport = ThrottledTransport(get_default_transport(), HostThrottle(args.delay))
+    crawler = BackfillCrawler(transport, login_scraper(transport), state, args.state, ArticleStore(args.store),
+                              args.workers)
+
+    try:
+        crawler.discover(args.source)
+        crawler.fetch_pending(args.limit)
+    except KeyboardInterrupt:
+        logger.warning("⏸️ Interrupted - progress saved, rerun to resume")
+    finally:
+        crawler.checkpoint()
+
+    logger.info(f"🎉 Backfill status: {crawler.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Offline Benchmark Suite for FastFounder Daily Bot
+Measures RSS parsing, content cleaning, message rendering and broadcast
+fan-out using recorded fixtures and a local fake Telegram server.
+
+Usage:
+    python benchmarks/bench.py
+    python benchmarks/bench.py --sizes 1000,10000,100000 --json bench.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import main_multiuser_daily as bot  # noqa: E402
+from fake_telegram_server import FakeTelegramServer  # noqa: E402
+from local_analyzer import LocalAnalyzer  # noqa: E402
+from recommender import Recommender, article_vector  # noqa: E402
+from rate_limiter import AdaptiveRateLimiter, RateLimiter  # noqa: E402
+from transport import Endpoints, HttpTransport  # noqa: E402
+from user_manager import UserManager  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def load_fixture(name, binary=False):
+    """Load a recorded fixture file."""
+    mode = 'rb' if binary else 'r'
+    encoding = None if binary else 'utf-8'
+    with open(os.path.join(FIXTURES_DIR, name), mode, encoding=encoding) as f:
+        return f.read()
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of a sorted list of samples."""
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+def summarize(name, latencies, elapsed, operations, peak_bytes):
+    """Build a result row from raw measurements."""
+    latencies = sorted(latencies)
+    return {
+        'name': name,
+        'operations': operations,
+        'elapsed_s': round(elapsed, 4),
+        'throughput_ops_s': round(operations / elapsed, 1) if elapsed > 0 else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 4),
+        'p90_ms': round(percentile(latencies, 90) * 1000, 4),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 4),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 4) if latencies else 0.0,
+        'peak_mem_kb': round(peak_bytes / 1024, 1) if peak_bytes is not None else None,
+    }
+
+
+def measure_peak_memory(fn):
+    """Run fn once under tracemalloc and return peak traced bytes."""
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_micro(name, fn, iterations, memory=True):
+    """Time fn over many iterations and collect latency samples."""
+    fn()  # warm up regex caches and imports
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    peak = measure_peak_memory(fn) if memory else None
+    return summarize(name, latencies, elapsed, iterations, peak)
+
+
+def write_synthetic_users(path, count, interests=False):
+    """Write a users file with count active synthetic subscribers.
+
+    With interests, users cycle through a few category/audience choices.
+    """
+    base_id = 100000000
+    choices = [{}, {'categories': ['маркетинг']}, {'categories': ['финансы', 'продажи']}, {'audiences': ['новички']}]
+    users = {}
+    for i in range(count):
+        chat_id = str(base_id + i)
+        users[chat_id] = {
+            'chat_id': chat_id,
+            'username': f'user{i}',
+            'first_name': f'Имя{i}',
+            'last_name': None,
+            'joined_date': '2025-05-28T16:13:31.998376',
+            'active': True,
+            'message_count': 0,
+            **(choices[i % len(choices)] if interests else {}),
+        }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(users, f, ensure_ascii=False)
+
+
+class TimedTransport(HttpTransport):
+    """HttpTransport that records how long each request takes, send to response."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+
+    def request(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().request(*args, **kwargs)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+
+class telegram_environment:
+    """Provide a timed transport pointed at a fake server and a bot token."""
+
+    def __init__(self, server):
+        self.server = server
+
+    def __enter__(self):
+        self.previous_token = os.environ.get('TELEGRAM_TOKEN')
+        os.environ['TELEGRAM_TOKEN'] = 'bench:token'
+        self.transport = TimedTransport(endpoints=Endpoints(telegram_api_url=self.server.url))
+        return self.transport
+
+    def __exit__(self, exc_type, exc, tb):
+        self.transport.close()
+        if self.previous_token is None:
+            os.environ.pop('TELEGRAM_TOKEN', None)
+        else:
+            os.environ['TELEGRAM_TOKEN'] = self.previous_token
+
+
+def run_broadcast(size, article, analysis, server_options, memory=True):
+    """Broadcast to size synthetic users through the fake server."""
+    with FakeTelegramServer(**server_options) as server, telegram_environment(server) as transport:
+        with tempfile.TemporaryDirectory() as tmp:
+            users_file = os.path.join(tmp, 'users.json')
+            write_synthetic_users(users_file, size)
+
+            user_manager = UserManager(users_file=users_file)
+            transport.latencies.clear()
+            start = time.perf_counter()
+            bot.broadcast_telegram_message(article, analysis, user_manager, transport)
+            elapsed = time.perf_counter() - start
+
+            arrivals = list(server.arrivals)
+            latencies = list(transport.latencies)
+            logger.info(f"📊 Fake server stats: {server.stats}")
+
+            peak = None
+            if memory:
+                write_synthetic_users(users_file, size)
+                user_manager = UserManager(users_file=users_file)
+                peak = measure_peak_memory(
+                    lambda: bot.broadcast_telegram_message(article, analysis, user_manager, transport)
+                )
+
+    return summarize(f'broadcast[{size}]', latencies, elapsed, len(arrivals), peak)
+
+
+def run_recommend(size, article, analysis, memory=True):
+    """Pick the best of three candidates for size users with mixed interests."""
+    candidates = [
+        (article, analysis),
+        (dict(article, url=article['url'] + '?finance'), dict(analysis, category='финансы')),
+        (dict(article, url=article['url'] + '?sales'), dict(analysis, category='продажи', overall_score=9)),
+    ]
+    # Every 50th user has rated an article, so gets a personal profile
+    feedback = {str(100000000 + i): [(article_vector(article['title'], analysis.get('category', '')), 1)] for i in range(0, size, 50)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        users_file = os.path.join(tmp, 'users.json')
+        write_synthetic_users(users_file, size, interests=True)
+        user_manager = UserManager(users_file=users_file)
+
+        start = time.perf_counter()
+        deque(Recommender(candidates).assign(user_manager.iter_active_interests(), feedback), maxlen=0)
+        elapsed = time.perf_counter() - start
+
+        peak = None
+        if memory:
+            peak = measure_peak_memory(
+                lambda: deque(Recommender(candidates).assign(user_manager.iter_active_interests(), feedback), maxlen=0)
+            )
+
+    return summarize(f'recommend[{size}]', [elapsed], elapsed, size, peak)
+
+
+def run_signups(count, server_options, memory=True):
+    """Process count queued /start updates through check_for_new_users."""
+    def queue_and_check(server, transport, users_file):
+        for i in range(count):
+            server.queue_start_command(200000000 + i, first_name=f'Имя{i}')
+        bot.check_for_new_users(UserManager(users_file=users_file), transport)
+
+    with FakeTelegramServer(**server_options) as server, telegram_environment(server) as transport:
+        with tempfile.TemporaryDirectory() as tmp:
+            users_file = os.path.join(tmp, 'users.json')
+            transport.latencies.clear()
+            start = time.perf_counter()
+            queue_and_check(server, transport, users_file)
+            elapsed = time.perf_counter() - start
+
+            arrivals = list(server.arrivals)
+            latencies = list(transport.latencies)
+
+            peak = None
+            if memory:
+                os.remove(users_file)
+                server.updates.clear()
+                peak = measure_peak_memory(lambda: queue_and_check(server, transport, users_file))
+
+    return summarize(f'signups[{count}]', latencies, elapsed, len(arrivals), peak)
+
+
+def print_results(results):
+    """Print results as an aligned table."""
+    header = f"{'benchmark':<24}{'ops':>9}{'ops/s':>12}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'peak KB':>11}"
+    print(header)
+    print('-' * len(header))
+    for row in results:
+        peak = f"{row['peak_mem_kb']:.1f}" if row['peak_mem_kb'] is not None else '-'
+        print(f"{row['name']:<24}{row['operations']:>9}{row['throughput_ops_s']:>12.1f}"
+              f"{row['p50_ms']:>10.3f}{row['p90_ms']:>10.3f}{row['p99_ms']:>10.3f}{peak:>11}")
+
+
+def main():
+    """Run the benchmark suite."""
+    parser = argparse.ArgumentParser(description='Offline benchmarks for FastFounder Daily Bot')
+    parser.add_argument('--iterations', type=int, default=200, help='iterations per micro benchmark')
+    parser.add_argument('--sizes', default='1000,10000', help='comma-separated broadcast user counts (e.g. 1000,10000,100000)')
+    parser.add_argument('--only', help='comma-separated benchmark names to run (rss,extract,clean,render,local,broadcast,recommend,signups)')
+    parser.add_argument('--signups', type=int, default=100, help='queued /start updates for the signup benchmark')
+    parser.add_argument('--mode', choices=['direct', 'copy', 'forward', 'channel'], default='direct', help='broadcast delivery mode')
+    parser.add_argument('--send-rate', type=float, default=0.0, help='bot-side send pacing in msgs/s (0 = unlimited)')
+    parser.add_argument('--adaptive', action='store_true', help='AIMD pacing starting at --send-rate (default 25), learning from 429s')
+    parser.add_argument('--max-rate', type=float, default=30.0, help='upper bound for --adaptive pacing')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='fake Telegram latency per call')
+    parser.add_argument('--rate-limit', type=int, help='fake Telegram sends per second before 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='retry_after returned with fake 429s')
+    parser.add_argument('--blocked-ratio', type=float, default=0.0, help='fraction of chats answering 403')
+    parser.add_argument('--missing-ratio', type=float, default=0.0, help='fraction of chats answering 400')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc peak memory pass')
+    parser.add_argument('--json', dest='json_path', help='write results to this JSON file')
+    parser.add_argument('--verbose', action='store_true', help='keep bot INFO logging enabled')
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    selected = set(args.only.split(',')) if args.only else {'rss', 'extract', 'clean', 'render', 'local', 'broadcast', 'recommend', 'signups'}
+    memory = not args.no_memory
+    if args.adaptive:
+        bot.broadcast_rate_limiter = AdaptiveRateLimiter(args.send_rate or 25, max_rate=args.max_rate)
+    else:
+        bot.broadcast_rate_limiter = RateLimiter(args.send_rate)
+    bot.BROADCAST_MODE = args.mode
+    bot.TELEGRAM_STAGING_CHAT_ID = bot.TELEGRAM_STAGING_CHAT_ID or '-1001000000001'
+    bot.TELEGRAM_CHANNEL_ID = bot.TELEGRAM_CHANNEL_ID or '@fastfounder_daily'
+    server_options = {
+        'latency_ms': args.latency_ms,
+        'rate_limit': args.rate_limit,
+        'retry_after': args.retry_after,
+        'blocked_ratio': args.blocked_ratio,
+        'missing_ratio': args.missing_ratio,
+    }
+
+    rss_data = load_fixture('feed.xml', binary=True)
+    article_html = load_fixture('article.html')
+    analysis = json.loads(load_fixture('analysis.json'))
+    articles = bot.parse_rss_feed(rss_data)
+    article = dict(articles[0], content=article_html)
+    scraper = bot.FastFounderAuthenticatedScraper()
+    extracted = scraper._extract_clean_content(article_html)
+
+    results = []
+    if 'rss' in selected:
+        results.append(run_micro('parse_rss_feed', lambda: bot.parse_rss_feed(rss_data), args.iterations, memory))
+    if 'extract' in selected:
+        results.append(run_micro('extract_clean_content', lambda: scraper._extract_clean_content(article_html), args.iterations, memory))
+    if 'clean' in selected:
+        results.append(run_micro('minimal_clean', lambda: bot.minimal_clean(extracted), args.iterations, memory))
+    if 'render' in selected:
+        results.append(run_micro('render_digest_message', lambda: bot.render_digest_message(article, analysis), args.iterations, memory))
+    if 'local' in selected:
+        analyzer = LocalAnalyzer([analysis])
+        scraped = dict(article, content=bot.minimal_clean(extracted), content_quality='authenticated')
+        results.append(run_micro('local_analyze', lambda: analyzer.analyze(scraped), args.iterations, memory))
+    if 'broadcast' in selected:
+        for size in [int(s) for s in args.sizes.split(',') if s.strip()]:
+            results.append(run_broadcast(size, article, analysis, server_options, memory))
+    if 'recommend' in selected:
+        for size in [int(s) for s in args.sizes.split(',') if s.strip()]:
+            results.append(run_recommend(size, article, analysis, memory))
+    if 'signups' in selected:
+        results.append(run_signups(args.signups, server_options, memory))
+
+    print_results(results)
+    if args.adaptive:
+        limiter = bot.broadcast_rate_limiter
+        print(f"📈 Adaptive rate settled at {limiter.rate:.1f}/s after {limiter.throttle_count} throttles")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+        print(f"💾 Results saved to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Bot Token Pool for FastFounder Daily Bot
+Spreads digest delivery over several Telegram bots.
+
+Telegram limits how fast one bot may send, so N bots deliver about N
+times faster: every bot gets its own rate limiter and sender thread.
+A bot can only message chats that started it, so a user always belongs
+to the bot they subscribed through (the 'bot' field in users.json);
+users without one belong to the primary TELEGRAM_TOKEN bot.
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def load_tokens():
+    """TELEGRAM_TOKEN first, then the extra bots from TELEGRAM_TOKENS (comma-separated)."""
+    tokens = []
+    for token in [os.environ.get('TELEGRAM_TOKEN', '')] + os.environ.get('TELEGRAM_TOKENS', '').split(','):
+        token = token.strip()
+        if token and token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+def bot_id(token):
+    """The bot's numeric id (the part of the token before ':'); safe to store."""
+    return token.split(':', 1)[0]
+
+
+class BotPool:
+    """Bot tokens with a rate limiter for each extra bot.
+
+    The primary bot keeps using the process-wide broadcast limiter, so
+    limiters are only created for the additional tokens.
+    """
+
+    def __init__(self, tokens, new_limiter):
+        self.tokens = list(tokens)
+        self.by_id = {bot_id(token): token for token in self.tokens}
+        self.limiters = {token: new_limiter(bot_id(token)) for token in self.tokens[1:]}
+        if len(self.tokens) > 1:
+            logger.info(f"🤖 Bot pool: {len(self.tokens)} bots")
+
+    @property
+    def primary(self):
+        return self.tokens[0] if self.tokens else None
+
+    def token_for(self, bot):
+        """Token of the bot a user belongs to, or None if it is not configured."""
+        if not bot:
+            return self.primary
+        return self.by_id.get(str(bot))
+
+    def save(self):
+        """Persist the learned send rate of every extra bot."""
+        for limiter in self.limiters.values():
+            limiter.save()
+
+    def __len__(self):
+        return len(self.tokens)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Dead-Letter Queue for FastFounder Daily Bot
+Keeps digests that could not be delivered so they can be retried with
+backoff, and tells the broadcaster when a chat should be pruned.
+"""
+
+import json
+import os
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# Consecutive failed attempts before a chat is pruned (or the entry dropped)
+DLQ_MAX_ATTEMPTS = int(os.environ.get('DLQ_MAX_ATTEMPTS', '5'))
+
+# First retry delay; doubles with every failed attempt
+DLQ_BACKOFF_SECONDS = float(os.environ.get('DLQ_BACKOFF_SECONDS', '30'))
+
+# Digests older than this are no longer worth redelivering
+DLQ_MAX_AGE_HOURS = float(os.environ.get('DLQ_MAX_AGE_HOURS', '48'))
+
+# Failures worth retrying later, and those that mean the chat is gone
+RETRYABLE_ERRORS = {'rate_limited', 'server_error', 'network', 'chat_not_found'}
+PRUNABLE_ERRORS = {'chat_not_found'}
+
+
+def classify_failure(result):
+    """Map a failed Bot API result to an error class."""
+    error_code = result.get('error_code')
+    description = (result.get('description') or '').lower()
+
+    if error_code is None:
+        return 'network'
+    if error_code == 403:
+        return 'blocked'
+    if error_code == 429:
+        return 'rate_limited'
+    if error_code >= 500:
+        return 'server_error'
+    if error_code == 400 and any(text in description for text in ('chat not found', 'peer_id_invalid', 'user not found')):
+        return 'chat_not_found'
+    return 'bad_request'
+
+
+class DeadLetterQueue:
+    """Persists failed deliveries keyed by chat_id.
+
+    One entry per chat holds the key of the most recent undelivered digest
+    and the number of consecutive failed attempts for that chat. Each
+    digest (rendered message, staged copy) is stored once under its key,
+    however many chats it failed for.
+    """
+
+    def __init__(self, queue_file='dead_letters.json'):
+        self.queue_file = queue_file
+        self.digests = {}
+        self.entries = self._load_entries()
+
+    def _load_entries(self):
+        """Load queued deliveries (and the digests they refer to) from JSON file."""
+        if not os.path.exists(self.queue_file):
+            return {}
+        try:
+            with open(self.queue_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"❌ Error loading dead-letter queue: {e}")
+            return {}
+
+        if 'entries' in data:
+            self.digests = data.get('digests', {})
+            return data['entries']
+
+        # Older files kept a full copy of the digest in every entry
+        for entry in data.values():
+            digest = entry.pop('digest')
+            self.digests[digest['key']] = digest
+            entry['digest_key'] = digest['key']
+        return data
+
+    def save(self):
+        """Save queued deliveries to JSON file, dropping digests no entry refers to."""
+        live = {entry['digest_key'] for entry in self.entries.values()}
+        self.digests = {key: digest for key, digest in self.digests.items() if key in live}
+        try:
+            with open(self.queue_file, 'w', encoding='utf-8') as f:
+                json.dump({'digests': self.digests, 'entries': self.entries}, f, ensure_ascii=False, indent=2)
+            logger.info(f"💾 Dead-letter queue saved to {self.queue_file} ({len(self.entries)} entries)")
+        except Exception as e:
+            logger.error(f"❌ Error saving dead-letter queue: {e}")
+
+    def add(self, chat_id, digest, result):
+        """Record a failed delivery; returns the entry, or None if not retryable.
+
+        digest is a dict with key (article URL), message and staged.
+        """
+        chat_id = str(chat_id)
+        error_class = classify_failure(result)
+        if error_class not in RETRYABLE_ERRORS:
+            self.entries.pop(chat_id, None)
+            return None
+
+        now = datetime.now()
+        entry = self.entries.get(chat_id, {})
+        attempts = entry.get('attempts', 0) + 1
+
+        # A newer digest replaces an older undelivered one
+        if entry.get('digest_key') != digest['key']:
+            entry['first_failed_at'] = now.isoformat()
+        self.digests[digest['key']] = digest
+
+        entry.update({
+            'chat_id': chat_id,
+            'digest_key': digest['key'],
+            'error_class': error_class,
+            'error_code': result.get('error_code'),
+            'description': result.get('description'),
+            'attempts': attempts,
+            'last_failed_at': now.isoformat(),
+            'next_attempt_at': (now + timedelta(seconds=DLQ_BACKOFF_SECONDS * 2 ** (attempts - 1))).isoformat()
+        })
+        self.entries[chat_id] = entry
+        return entry
+
+    def digest(self, entry):
+        """The digest (key, message, staged) an entry is waiting to deliver."""
+        return self.digests[entry['digest_key']]
+
+    def resolve(self, chat_id):
+        """Forget a chat's entry after a successful delivery."""
+        return self.entries.pop(str(chat_id), None) is not None
+
+    def discard(self, chat_id):
+        """Drop a chat's entry without delivering it."""
+        self.entries.pop(str(chat_id), None)
+
+    def exhausted(self, entry):
+        """Return True once an entry has used up its attempts."""
+        return entry['attempts'] >= DLQ_MAX_ATTEMPTS
+
+    def should_prune(self, entry):
+        """Return True if the chat itself keeps failing and should be deactivated."""
+        return self.exhausted(entry) and entry['error_class'] in PRUNABLE_ERRORS
+
+    def next_due_in(self, now=None):
+        """Seconds until the earliest entry is due, or None if empty."""
+        if not self.entries:
+            return None
+        now = now or datetime.now()
+        earliest = min(datetime.fromisoformat(entry['next_attempt_at']) for entry in self.entries.values())
+        return max(0.0, (earliest - now).total_seconds())
+
+    def due(self, now=None):
+        """Get entries ready for redelivery, dropping expired digests."""
+        now = now or datetime.now()
+        cutoff = now - timedelta(hours=DLQ_MAX_AGE_HOURS)
+
+        expired = [
+            chat_id for chat_id, entry in self.entries.items()
+            if datetime.fromisoformat(entry['first_failed_at']) < cutoff
+        ]
+        for chat_id in expired:
+            del self.entries[chat_id]
+        if expired:
+            logger.info(f"🗑️ Dropped {len(expired)} expired dead letters")
+
+        return [
+            entry for entry in self.entries.values()
+            if datetime.fromisoformat(entry['next_attempt_at']) <= now
+        ]
+
+    def __contains__(self, chat_id):
+        return str(chat_id) in self.entries
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Staggered Delivery Scheduler for FastFounder Daily Bot
+
+Splits the daily digest into two phases so every user gets it at their
+own local time:
+
+- prepare: fetch, scrape, analyze and render the digest once a day and
+  store it as a digest artifact;
+- deliver: run hourly and send the stored artifact to the users whose
+  local delivery slot has passed since it was prepared.
+
+The expensive work (login, scraping, OpenAI analysis) runs once per day,
+while each hourly window only sends a small bucket of users.
+
+Usage:
+    python delivery_scheduler.py run       # prepare if due, then deliver
+    python delivery_scheduler.py prepare   # force a fresh artifact
+    python delivery_scheduler.py deliver   # send to users due right now
+    python delivery_scheduler.py plan      # show users per UTC hour
+"""
+
+import argparse
+import json
+import logging
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from analysis_cache import AnalysisCache
+from dead_letter_queue import DeadLetterQueue
+from main_multiuser_daily import (
+    FastFounderAuthenticatedScraper,
+    check_for_new_users,
+    generate_enhanced_analysis,
+    get_rss_feed,
+    prune_article_store,
+    publish_to_channel,
+    record_delivery_result,
+    redeliver_dead_letters,
+    render_digest_message,
+    scrape_article_content_authenticated,
+    stage_digest,
+)
+import main_multiuser_daily as daily
+from transport import get_default_transport
+from user_manager import UserManager
+
+logger = logging.getLogger(__name__)
+
+# Where the prepared digest is kept between hourly runs
+DIGEST_ARTIFACT_FILE = os.environ.get('DIGEST_ARTIFACT_FILE', 'digest_artifact.json')
+
+# UTC hour after which a new daily artifact is prepared
+PREPARE_HOUR_UTC = int(os.environ.get('PREPARE_HOUR_UTC', '3'))
+
+
+def load_artifact(path=DIGEST_ARTIFACT_FILE):
+    """Load the stored digest artifact, or None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"❌ Error loading digest artifact: {e}")
+        return None
+
+
+def save_artifact(artifact, path=DIGEST_ARTIFACT_FILE):
+    """Save the digest artifact to JSON file."""
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(artifact, f, ensure_ascii=False, indent=2)
+        logger.info(f"💾 Digest artifact saved to {path}")
+    except Exception as e:
+        logger.error(f"❌ Error saving digest artifact: {e}")
+
+
+def last_slot(now_utc, tz_name, hour):
+    """Return the most recent local `hour`:00 in tz_name, as a UTC datetime."""
+    tz = ZoneInfo(tz_name)
+    local_now = now_utc.astimezone(tz)
+    slot = local_now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if slot > local_now:
+        slot -= timedelta(days=1)
+    return slot.astimezone(timezone.utc)
+
+
+def prepare_artifact(user_manager, transport, path=DIGEST_ARTIFACT_FILE):
+    """Fetch, scrape, analyze and render today's digest once."""
+    logger.info("🛠️ Preparing digest artifact...")
+
+    articles = get_rss_feed(transport)
+    if not articles:
+        logger.error("❌ No articles found in RSS feed")
+        return None
+
+    article = articles[0]
+    logger.info(f"📰 Processing article: {article['title']}")
+
+    cache = AnalysisCache()
+    analysis = cache.get(article['url'])
+    if analysis:
+        logger.info(f"♻️ Using cached analysis for: {article['title']}")
+        article_data = article
+    else:
+        scraper = None
+        email = os.environ.get('FAST_FOUNDER_EMAIL')
+        password = os.environ.get('FAST_FOUNDER_PASSWORD')
+        if email and password:
+            scraper = FastFounderAuthenticatedScraper(transport)
+            if not scraper.login(email, password):
+                logger.warning("⚠️ Authentication failed - will use fallback scraping")
+                scraper = None
+
+        article_data = scrape_article_content_authenticated(article, scraper)
+        analysis = generate_enhanced_analysis(article_data, transport)
+        if analysis.get('analysis_source') != 'fallback':
+            cache.put(article_data, analysis)
+        daily.log_openai_usage()
+        daily.index_analysis(article_data, analysis)
+
+    message = render_digest_message(article_data, analysis)
+
+    # Stage once so every hourly window can copy/forward the same message
+    staged = None
+    telegram_token = daily.get_bot_pool().primary
+    if telegram_token:
+        staged = stage_digest(telegram_token, message, transport)
+
+    artifact = {
+        'prepared_at': datetime.now(timezone.utc).isoformat(),
+        'article': {
+            'title': article_data.get('title', ''),
+            'url': article_data.get('url', ''),
+            'pub_date': article_data.get('pub_date', ''),
+        },
+        'analysis': analysis,
+        'message': message,
+        'staged': staged,
+        'delivered': []
+    }
+    save_artifact(artifact, path)
+    return artifact
+
+
+def due_users(artifact, user_manager, now_utc):
+    """Get chat_ids whose delivery slot passed since the artifact was prepared."""
+    prepared_at = datetime.fromisoformat(artifact['prepared_at'])
+    delivered = set(artifact.get('delivered', []))
+    analysis = artifact['analysis']
+
+    # Users sharing a (timezone, hour) window are resolved with one slot lookup
+    windows = {}
+    for chat_id in user_manager.iter_users_for_article(analysis.get('category'), analysis.get('target_audience')):
+        if chat_id not in delivered:
+            windows.setdefault(user_manager.get_delivery_preferences(chat_id), []).append(chat_id)
+
+    due = []
+    for (tz_name, hour), chat_ids in windows.items():
+        if last_slot(now_utc, tz_name, hour) >= prepared_at:
+            due.extend(chat_ids)
+    return due
+
+
+def deliver_due(artifact, user_manager, transport, now_utc=None, path=DIGEST_ARTIFACT_FILE,
+                dead_letters=None):
+    """Send the artifact to every user whose window is open; returns sent count.
+    
+    With a dead-letter queue, failed sends are retried from the queue
+    instead of by the next window.
+    """
+    now_utc = now_utc or datetime.now(timezone.utc)
+
+    telegram_token = daily.get_bot_pool().primary
+    if not telegram_token:
+        logger.error("❌ Telegram token not found")
+        return 0
+
+    if daily.BROADCAST_MODE == 'channel':
+        # A channel has no per-user timezone; publish once per artifact
+        if not artifact.get('published') and publish_to_channel(telegram_token, artifact['message'], transport):
+            artifact['published'] = True
+            save_artifact(artifact, path)
+            return 1
+        return 0
+
+    recipients = due_users(artifact, user_manager, now_utc)
+    if not recipients:
+        logger.info("😴 No users due in this window")
+        return 0
+
+    logger.info(f"📊 Delivering to {len(recipients)} users due in this window")
+
+    delivered = artifact.setdefault('delivered', [])
+    digest = {'key': artifact['article'].get('url', ''), 'message': artifact['message'], 'staged': artifact.get('staged')}
+    successful_sends = 0
+    failed_sends = 0
+
+    sends = daily.send_through_pool(recipients, user_manager, artifact['message'], transport, artifact.get('staged'))
+    for chat_id, result in sends:
+        if record_delivery_result(user_manager, chat_id, result, dead_letters, digest):
+            successful_sends += 1
+            delivered.append(chat_id)
+        else:
+            failed_sends += 1
+            # Without a queue only transient failures are retried in the next window
+            if dead_letters is not None or result.get('error_code') in (400, 403):
+                delivered.append(chat_id)
+
+    save_artifact(artifact, path)
+    if dead_letters is not None:
+        dead_letters.save()
+    daily.save_send_rates()
+    logger.info(f"📊 Window complete: {successful_sends} successful, {failed_sends} failed")
+    return successful_sends
+
+
+def needs_new_artifact(artifact, now_utc):
+    """Return True if no artifact exists or it predates today's prepare hour."""
+    if not artifact:
+        return True
+    prepared_at = datetime.fromisoformat(artifact['prepared_at'])
+    return prepared_at < last_slot(now_utc, 'UTC', PREPARE_HOUR_UTC)
+
+
+def plan_windows(user_manager, now_utc=None):
+    """Count active users per UTC hour of their next delivery slot."""
+    now_utc = now_utc or datetime.now(timezone.utc)
+    windows = Counter(
+        user_manager.get_delivery_preferences(chat_id)
+        for chat_id in user_manager.iter_active_users()
+    )
+
+    plan = Counter()
+    for (tz_name, hour), count in windows.items():
+        next_slot = last_slot(now_utc, tz_name, hour) + timedelta(days=1)
+        plan[next_slot.hour] += count
+    return dict(sorted(plan.items()))
+
+
+def main():
+    """Run one scheduler step from the command line."""
+    parser = argparse.ArgumentParser(description='Timezone-aware staggered digest delivery')
+    parser.add_argument('command', choices=['run', 'prepare', 'deliver', 'plan'], nargs='?', default='run')
+    parser.add_argument('--artifact', default=DIGEST_ARTIFACT_FILE, help='digest artifact path')
+    args = parser.parse_args()
+
+    transport = get_default_transport()
+    now_utc = datetime.now(timezone.utc)
+
+    if args.command == 'plan':
+        for hour, count in plan_windows(UserManager(), now_utc).items():
+            logger.info(f"🕐 {hour:02d}:00 UTC - {count} users")
+        return
+
+    user_manager = UserManager()
+    try:
+        run_window(args, user_manager, transport, now_utc)
+    finally:
+        # Only users.json is kept between runs, so fold the journal into it
+        user_manager.compact()
+        prune_article_store()
+
+
+def run_window(args, user_manager, transport, now_utc):
+    """Prepare the day's artifact if needed and deliver the due windows."""
+    # New /start, /time and /timezone messages are picked up every window
+    check_for_new_users(user_manager, transport)
+    dead_letters = DeadLetterQueue()
+
+    artifact = load_artifact(args.artifact)
+    if args.command == 'prepare' or (args.command == 'run' and needs_new_artifact(artifact, now_utc)):
+        artifact = prepare_artifact(user_manager, transport, args.artifact)
+
+    if args.command == 'prepare':
+        return
+
+    if not artifact:
+        logger.error("❌ No digest artifact available")
+        return
+
+    deliver_due(artifact, user_manager, transport, now_utc, args.artifact, dead_letters)
+    redeliver_dead_letters(user_manager, dead_letters, transport)
+
+
+if __name__ == "__main__":
+    main()
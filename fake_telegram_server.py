@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Fake Telegram Bot API Server for FastFounder Daily Bot
+Local stand-in for api.telegram.org used for load testing broadcasts.
+
+Implements sendMessage, sendMediaGroup and getUpdates, plus the error
+modes the bot handles: 403 (bot blocked), 400 (chat not found) and
+429 (rate limited, with retry_after). Point the bot at it with:
+
+    python fake_telegram_server.py --port 8081 --rate-limit 30
+    TELEGRAM_API_URL=http://127.0.0.1:8081 python main_multiuser_daily.py
+"""
+
+import argparse
+import json
+import logging
+import random
+import re
+import sys
+import threading
+import time
+import urllib.parse
+import zlib
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+PATH_PATTERN = re.compile(r'^/bot(?P<token>[^/]+)/(?P<method>\w+)$')
+
+
+class FakeTelegramServer:
+    """In-process fake Bot API with configurable latency, limits and failures."""
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0.0, jitter_ms=0.0,
+                 rate_limit=None, per_chat_rate_limit=None, retry_after=1,
+                 blocked_chats=None, missing_chats=None,
+                 blocked_ratio=0.0, missing_ratio=0.0):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit  # messages per second across all chats
+        self.per_chat_rate_limit = per_chat_rate_limit  # messages per second per chat
+        self.retry_after = retry_after
+        self.blocked_chats = {str(c) for c in (blocked_chats or [])}
+        self.missing_chats = {str(c) for c in (missing_chats or [])}
+        self.blocked_ratio = blocked_ratio
+        self.missing_ratio = missing_ratio
+
+        self.lock = threading.Lock()
+        self.updates = []
+        self.next_update_id = 1
+        self.next_message_id = 1
+        self.sent_messages = []
+        self.arrivals = []
+        self.stats = {}
+        self._recent = deque()
+        self._recent_per_chat = {}
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """Base URL to use as TELEGRAM_API_URL."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Start serving in a background thread."""
+        fake = self
+
+        class Handler(FakeTelegramHandler):
+            server_state = fake
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"🧪 Fake Telegram server listening on {self.url}")
+        return self
+
+    def stop(self):
+        """Stop the server."""
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def queue_message(self, chat_id, text, username=None, first_name=None, last_name=None):
+        """Queue an incoming user message to be returned by getUpdates."""
+        with self.lock:
+            update = {
+                'update_id': self.next_update_id,
+                'message': {
+                    'message_id': self.next_message_id,
+                    'from': {
+                        'id': int(chat_id),
+                        'is_bot': False,
+                        'first_name': first_name,
+                        'last_name': last_name,
+                        'username': username,
+                    },
+                    'chat': {'id': int(chat_id), 'type': 'private'},
+                    'date': int(time.time()),
+                    'text': text,
+                },
+            }
+            self.next_update_id += 1
+            self.next_message_id += 1
+            self.updates.append(update)
+            return update
+
+    def queue_start_command(self, chat_id, **user_fields):
+        """Queue a /start command from chat_id."""
+        return self.queue_message(chat_id, '/start', **user_fields)
+
+    def _count(self, method, status):
+        key = f"{method}:{status}"
+        self.stats[key] = self.stats.get(key, 0) + 1
+
+    def _ratio_hit(self, chat_id, ratio, salt):
+        """Deterministically select a fraction of chat ids."""
+        if ratio <= 0:
+            return False
+        return (zlib.crc32(f'{salt}:{chat_id}'.encode('utf-8')) % 10000) < ratio * 10000
+
+    def _check_rate_limit(self, chat_id, now):
+        """Return True if this send exceeds the configured rate limits."""
+        if self.rate_limit:
+            while self._recent and now - self._recent[0] >= 1.0:
+                self._recent.popleft()
+            if len(self._recent) >= self.rate_limit:
+                return True
+        if self.per_chat_rate_limit:
+            chat_recent = self._recent_per_chat.setdefault(chat_id, deque())
+            while chat_recent and now - chat_recent[0] >= 1.0:
+                chat_recent.popleft()
+            if len(chat_recent) >= self.per_chat_rate_limit:
+                return True
+        return False
+
+    def _record_send(self, chat_id, now):
+        if self.rate_limit:
+            self._recent.append(now)
+        if self.per_chat_rate_limit:
+            self._recent_per_chat.setdefault(chat_id, deque()).append(now)
+
+    def handle(self, method, params):
+        """Dispatch a Bot API method call; returns (status, payload)."""
+        if self.latency_ms or self.jitter_ms:
+            delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+            time.sleep(delay / 1000.0)
+
+        if method == 'getUpdates':
+            return self._get_updates(params)
+        if method in ('sendMessage', 'sendMediaGroup', 'copyMessage', 'forwardMessage'):
+            return self._send(method, params)
+        if method == 'getMe':
+            return 200, {'ok': True, 'result': {'id': 1, 'is_bot': True, 'username': 'fake_bot'}}
+
+        with self.lock:
+            self._count(method, 404)
+        return 404, {'ok': False, 'error_code': 404, 'description': 'Not Found'}
+
+    def _get_updates(self, params):
+        offset = int(params.get('offset', 0) or 0)
+        limit = int(params.get('limit', 100) or 100)
+        with self.lock:
+            if offset:
+                self.updates = [u for u in self.updates if u['update_id'] >= offset]
+            result = self.updates[:limit]
+            self._count('getUpdates', 200)
+        return 200, {'ok': True, 'result': result}
+
+    def _send(self, method, params):
+        chat_id = str(params.get('chat_id', ''))
+        now = time.monotonic()
+
+        with self.lock:
+            self.arrivals.append(time.perf_counter())
+
+            if not chat_id or chat_id in self.missing_chats or self._ratio_hit(chat_id, self.missing_ratio, 'missing'):
+                self._count(method, 400)
+                return 400, {'ok': False, 'error_code': 400, 'description': 'Bad Request: chat not found'}
+
+            if chat_id in self.blocked_chats or self._ratio_hit(chat_id, self.blocked_ratio, 'blocked'):
+                self._count(method, 403)
+                return 403, {'ok': False, 'error_code': 403, 'description': 'Forbidden: bot was blocked by the user'}
+
+            if self._check_rate_limit(chat_id, now):
+                self._count(method, 429)
+                return 429, {
+                    'ok': False,
+                    'error_code': 429,
+                    'description': f'Too Many Requests: retry after {self.retry_after}',
+                    'parameters': {'retry_after': self.retry_after},
+                }
+
+            self._record_send(chat_id, now)
+            self._count(method, 200)
+
+            if method == 'sendMediaGroup':
+                media = params.get('media', '[]')
+                if isinstance(media, str):
+                    media = json.loads(media)
+                result = []
+                for _ in media:
+                    result.append({'message_id': self.next_message_id, 'chat': {'id': chat_id}})
+                    self.next_message_id += 1
+            else:
+                result = {'message_id': self.next_message_id, 'chat': {'id': chat_id}}
+                self.next_message_id += 1
+                self.sent_messages.append((method, chat_id, len(params.get('text', '') or '')))
+
+        return 200, {'ok': True, 'result': result}
+
+
+class FakeTelegramHandler(BaseHTTPRequestHandler):
+    """HTTP handler translating requests into FakeTelegramServer calls."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # keep-alive clients would otherwise stall on delayed ACKs
+    server_state = None
+
+    def _params(self):
+        parsed = urllib.parse.urlparse(self.path)
+        params = {k: v[-1] for k, v in urllib.parse.parse_qs(parsed.query).items()}
+        length = int(self.headers.get('Content-Length', 0) or 0)
+        if length:
+            body = self.rfile.read(length).decode('utf-8')
+            content_type = self.headers.get('Content-Type', '')
+            if 'application/json' in content_type:
+                params.update(json.loads(body))
+            else:
+                params.update({k: v[-1] for k, v in urllib.parse.parse_qs(body).items()})
+        return parsed.path, params
+
+    def _dispatch(self):
+        path, params = self._params()
+        match = PATH_PATTERN.match(path)
+        if not match:
+            status, payload = 404, {'ok': False, 'error_code': 404, 'description': 'Not Found'}
+        else:
+            status, payload = self.server_state.handle(match.group('method'), params)
+
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _parse_id_list(value):
+    return [v.strip() for v in value.split(',') if v.strip()] if value else []
+
+
+def main():
+    """Run the fake server from the command line."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+    parser = argparse.ArgumentParser(description='Local fake Telegram Bot API server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='fixed latency added to every call')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='random extra latency up to this value')
+    parser.add_argument('--rate-limit', type=int, help='max sends per second across all chats (429 above)')
+    parser.add_argument('--per-chat-rate-limit', type=int, help='max sends per second to one chat')
+    parser.add_argument('--retry-after', type=int, default=1, help='retry_after seconds returned with 429')
+    parser.add_argument('--blocked', help='comma-separated chat ids that return 403')
+    parser.add_argument('--missing', help='comma-separated chat ids that return 400 chat not found')
+    parser.add_argument('--blocked-ratio', type=float, default=0.0, help='fraction of chats that return 403')
+    parser.add_argument('--missing-ratio', type=float, default=0.0, help='fraction of chats that return 400')
+    parser.add_argument('--start-from', help='comma-separated chat ids with a queued /start update')
+    args = parser.parse_args()
+
+    server = FakeTelegramServer(
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit=args.rate_limit,
+        per_chat_rate_limit=args.per_chat_rate_limit,
+        retry_after=args.retry_after,
+        blocked_chats=_parse_id_list(args.blocked),
+        missing_chats=_parse_id_list(args.missing),
+        blocked_ratio=args.blocked_ratio,
+        missing_ratio=args.missing_ratio,
+    )
+    for chat_id in _parse_id_list(args.start_from):
+        server.queue_start_command(chat_id, first_name=f'User{chat_id}')
+
+    server.start()
+    try:
+        while True:
+            time.sleep(60)
+            logger.info(f"📊 Stats: {server.stats}")
+    except KeyboardInterrupt:
+        logger.info(f"📊 Final stats: {server.stats}")
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
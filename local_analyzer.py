@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Local Heuristic Analyzer for FastFounder Daily Bot
+Produces an article analysis without any network call, in milliseconds.
+
+- reading_time comes from the word count;
+- category and target audience come from keyword lexicons plus a TF-IDF
+  centroid classifier trained on past AI analyses (analysis_cache.json);
+- complexity comes from sentence and word length statistics.
+
+Used as the fallback when OpenAI is unavailable and as a cheap pre-scorer.
+"""
+
+import logging
+import math
+import re
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+WORDS_PER_MINUTE = 180  # typical silent reading speed for Russian prose
+
+WORD_PATTERN = re.compile(r'[a-zа-яё0-9]+')
+SENTENCE_PATTERN = re.compile(r'[.!?…]+\s+')
+
+# Keywords only match at the start of a word; stems this short must be the whole word
+WORD_START = r'(?<![a-zа-яё0-9])'
+WORD_END = r'(?![a-zа-яё0-9])'
+WHOLE_WORD_MAX_LENGTH = 3
+
+STOPWORDS = {
+    'и', 'в', 'во', 'не', 'что', 'он', 'на', 'я', 'с', 'со', 'как', 'а', 'то', 'все', 'она', 'так',
+    'его', 'но', 'да', 'ты', 'к', 'у', 'же', 'вы', 'за', 'бы', 'по', 'только', 'ее', 'её', 'мне',
+    'было', 'вот', 'от', 'меня', 'еще', 'ещё', 'нет', 'о', 'из', 'ему', 'теперь', 'когда', 'даже',
+    'ну', 'ли', 'если', 'уже', 'или', 'ни', 'быть', 'был', 'него', 'до', 'вас', 'нибудь', 'уж',
+    'вам', 'ведь', 'там', 'потом', 'себя', 'ничего', 'ей', 'может', 'они', 'тут', 'где', 'есть',
+    'надо', 'ней', 'для', 'мы', 'тебя', 'их', 'чем', 'была', 'сам', 'чтобы', 'без', 'будто',
+    'чего', 'раз', 'тоже', 'себе', 'под', 'будет', 'ж', 'тогда', 'кто', 'этот', 'того', 'потому',
+    'этого', 'какой', 'совсем', 'ним', 'здесь', 'этом', 'один', 'почти', 'мой', 'тем', 'это',
+    'эти', 'эта', 'при', 'об', 'обзоре', 'узнаешь', 'наша', 'оценка', 'данного', 'поста',
+    'the', 'and', 'of', 'to', 'in', 'a', 'is', 'for', 'on', 'with',
+}
+
+# Seed lexicons (word stems) so the classifier works before any training data exists
+CATEGORY_KEYWORDS = {
+    'стратегия': ['стратег', 'модел', 'бизнес-мод', 'рынок', 'рынк', 'конкурен', 'ниша', 'ниши', 'нишу', 'нишев', 'позицион', 'развит', 'масштаб'],
+    'маркетинг': ['маркетинг', 'реклам', 'бренд', 'трафик', 'продвиж', 'аудитор', 'контент', 'smm', 'seo', 'воронк'],
+    'продажи': ['продаж', 'клиент', 'сделк', 'лид', 'лиды', 'лидов', 'конверс', 'менеджер', 'прода', 'покупател', 'чек', 'b2b'],
+    'финансы': ['финанс', 'инвест', 'деньг', 'выручк', 'прибыл', 'бюджет', 'доход', 'капитал', 'оценк', 'юнит'],
+    'технологии': ['технолог', 'ai', 'ии', 'нейросет', 'софт', 'приложен', 'платформ', 'saas', 'автоматиз', 'код'],
+    'личная эффективность': ['эффектив', 'привыч', 'время', 'продуктив', 'фокус', 'мотивац', 'выгоран', 'навык', 'карьер', 'рутин'],
+    'аналитика': ['аналит', 'данн', 'метрик', 'исследован', 'статист', 'показател', 'отчет', 'отчёт', 'когорт', 'дашборд'],
+}
+
+AUDIENCE_KEYWORDS = {
+    'новички': ['начинающ', 'перв', 'старт', 'с нуля', 'новичк', 'прост'],
+    'опытные': ['масштаб', 'рост', 'оптимиз', 'команд', 'компан', 'систем'],
+    'маркетологи': ['маркетинг', 'реклам', 'трафик', 'бренд', 'smm', 'продвиж'],
+    'it': ['разработ', 'продукт', 'saas', 'приложен', 'платформ', 'код', 'технолог'],
+    'фрилансеры': ['фриланс', 'заказ', 'услуг', 'эксперт', 'консалт', 'самозанят'],
+    'инвесторы': ['инвест', 'венчур', 'раунд', 'оценк', 'фонд', 'капитал', 'доля'],
+    'студенты': ['студент', 'обучен', 'курс', 'образован', 'универс', 'знани'],
+}
+
+# Imperative markers make the best checklist items; how-to phrases are the next best
+IMPERATIVE_MARKERS = ['попробуй', 'сделай', 'начни', 'проверь', 'используй', 'запусти', 'посчитай', 'выпиши']
+ACTION_MARKERS = IMPERATIVE_MARKERS + ['как ', 'шаг', 'шага', 'шаги', 'шагов', 'способ', 'совет ', 'советы', 'советов', 'инструкц', 'чек-лист']
+
+# Promo wording typical of ads and event announcements rather than articles
+PROMO_MARKERS = ['промокод', 'скидк', 'успей', 'регистрац', 'розыгрыш', 'бесплатный вебинар', 'переходи по ссылке']
+
+TIMEFRAME_BY_CATEGORY = {
+    'стратегия': 'квартал', 'маркетинг': 'месяц', 'продажи': 'месяц', 'финансы': 'квартал',
+    'технологии': 'квартал', 'личная эффективность': 'неделя', 'аналитика': 'месяц',
+}
+
+DEFAULT_CATEGORY = 'стратегия'
+DEFAULT_AUDIENCE = ['новички', 'опытные']
+
+# (upper bound in minutes, label): labels are the AI analysis vocabulary, which
+# leaves gaps (10-15 and 30-60 min), so each bound sits midway between two ranges
+READING_TIME_BUCKETS = [(12.5, 'быстрое 5-10мин'), (45, 'среднее 15-30мин')]
+LONG_READING_TIME = 'долгое 1+ час'
+
+
+def stem(word):
+    """Crude prefix stemmer: good enough to merge Russian word forms."""
+    return word[:6] if len(word) > 6 else word
+
+
+def tokenize(text):
+    """Lower-case word stems without stopwords."""
+    return [stem(word) for word in WORD_PATTERN.findall(text.lower()) if word not in STOPWORDS and len(word) > 1]
+
+
+def keyword_pattern(keywords):
+    """Regex counting words that start with any keyword stem.
+
+    'рост' matches 'роста' but not 'просто'; short stems such as 'ии' or
+    'чек', and keywords written with a trailing space ('совет '), only match
+    as whole words, so 'компании', 'человек' and 'советский' do not count.
+    """
+    alternatives = [
+        re.escape(keyword.strip()) + (WORD_END if keyword.endswith(' ') or len(keyword) <= WHOLE_WORD_MAX_LENGTH else '')
+        for keyword in sorted(keywords, key=lambda keyword: len(keyword.strip()), reverse=True)
+    ]
+    return re.compile(f"{WORD_START}(?:{'|'.join(alternatives)})")
+
+
+def count_keywords(pattern, text):
+    """Number of words in lower-cased text matched by a keyword_pattern()."""
+    return sum(1 for _ in pattern.finditer(text))
+
+
+CATEGORY_PATTERNS = {label: keyword_pattern(keywords) for label, keywords in CATEGORY_KEYWORDS.items()}
+AUDIENCE_PATTERNS = {label: keyword_pattern(keywords) for label, keywords in AUDIENCE_KEYWORDS.items()}
+IMPERATIVE_PATTERN = keyword_pattern(IMPERATIVE_MARKERS)
+ACTION_PATTERN = keyword_pattern(ACTION_MARKERS)
+
+
+def clamp_score(value):
+    return int(max(1, min(10, round(value))))
+
+
+class CentroidClassifier:
+    """TF-IDF nearest-centroid (Rocchio) classifier over word stems."""
+
+    def __init__(self):
+        self.idf = {}
+        self.centroids = {}
+
+    def fit(self, documents, labels):
+        """Train from token lists and their label lists (multi-label allowed)."""
+        if not documents:
+            return self
+
+        document_frequency = Counter()
+        for tokens in documents:
+            document_frequency.update(set(tokens))
+        total = len(documents)
+        self.idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in document_frequency.items()}
+
+        sums = {}
+        for tokens, doc_labels in zip(documents, labels):
+            vector = self.vectorize(tokens)
+            for label in doc_labels:
+                centroid = sums.setdefault(label, Counter())
+                for term, weight in vector.items():
+                    centroid[term] += weight
+
+        self.centroids = {label: self._normalize(centroid) for label, centroid in sums.items()}
+        return self
+
+    @staticmethod
+    def _normalize(vector):
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        return {term: weight / norm for term, weight in vector.items()}
+
+    def vectorize(self, tokens):
+        """Unit-length TF-IDF vector for a token list."""
+        counts = Counter(tokens)
+        default_idf = max(self.idf.values(), default=1.0)
+        return self._normalize({
+            term: (1 + math.log(count)) * self.idf.get(term, default_idf)
+            for term, count in counts.items()
+        })
+
+    def scores(self, tokens):
+        """Cosine similarity of tokens to every label centroid."""
+        if not self.centroids:
+            return {}
+        vector = self.vectorize(tokens)
+        return {
+            label: sum(weight * centroid.get(term, 0.0) for term, weight in vector.items())
+            for label, centroid in self.centroids.items()
+        }
+
+
+class LocalAnalyzer:
+    """Heuristic article analyzer trained on past AI analyses."""
+
+    def __init__(self, training_analyses=None, tfidf_weight=2.0):
+        self.tfidf_weight = tfidf_weight
+        self.category_classifier = CentroidClassifier()
+        self.audience_classifier = CentroidClassifier()
+        self.training_size = 0
+        if training_analyses:
+            self.train(training_analyses)
+
+    @classmethod
+    def from_cache(cls, cache):
+        """Train from an AnalysisCache, using only real AI analyses."""
+        analyses = [
+            dict(entry['analysis'], title=entry['analysis'].get('title') or entry.get('title', ''))
+            for entry in cache.entries.values()
+            if entry.get('analysis', {}).get('analysis_source', 'openai') == 'openai'
+        ]
+        return cls(analyses)
+
+    @staticmethod
+    def _training_text(analysis):
+        parts = [analysis.get('title', ''), analysis.get('summary', ''), analysis.get('score_reason', '')]
+        parts.extend(analysis.get('action_checklist') or [])
+        return ' '.join(str(part) for part in parts)
+
+    def train(self, analyses):
+        """Fit the category/audience classifiers on past AI analyses."""
+        documents, categories, audiences = [], [], []
+        for analysis in analyses:
+            category = str(analysis.get('category', '')).strip().lower()
+            if category not in CATEGORY_KEYWORDS:
+                continue
+            documents.append(tokenize(self._training_text(analysis)))
+            categories.append([category])
+            audiences.append([
+                str(audience).strip().lower() for audience in analysis.get('target_audience') or []
+                if str(audience).strip().lower() in AUDIENCE_KEYWORDS
+            ])
+
+        self.category_classifier.fit(documents, categories)
+        self.audience_classifier.fit(documents, audiences)
+        self.training_size = len(documents)
+        logger.info(f"🧮 Local analyzer trained on {self.training_size} past analyses")
+        return self
+
+    @staticmethod
+    def _keyword_scores(text, patterns):
+        """Keyword hits per label, dampened so long articles do not dominate."""
+        return {
+            label: math.log1p(count_keywords(pattern, text))
+            for label, pattern in patterns.items()
+        }
+
+    def _combined_scores(self, text, tokens, patterns, classifier):
+        scores = self._keyword_scores(text, patterns)
+        for label, similarity in classifier.scores(tokens).items():
+            if label in scores:
+                scores[label] += self.tfidf_weight * similarity * 10
+        return scores
+
+    def classify(self, title, content):
+        """Return (category, audiences, category_confidence)."""
+        text = f"{title} {title} {content}".lower()  # title words count double
+        tokens = tokenize(text)
+
+        category_scores = self._combined_scores(text, tokens, CATEGORY_PATTERNS, self.category_classifier)
+        ranked = sorted(category_scores.items(), key=lambda item: -item[1])
+        best, best_score = ranked[0]
+        total = sum(score for _, score in ranked) or 1.0
+        if best_score <= 0:
+            best = DEFAULT_CATEGORY
+
+        audience_scores = self._combined_scores(text, tokens, AUDIENCE_PATTERNS, self.audience_classifier)
+        top = sorted(audience_scores.items(), key=lambda item: -item[1])
+        threshold = top[0][1] * 0.6 if top and top[0][1] > 0 else None
+        audiences = [label for label, score in top[:3] if threshold and score >= threshold] or list(DEFAULT_AUDIENCE)
+
+        return best, audiences, best_score / total
+
+    @staticmethod
+    def text_statistics(content):
+        """Word, sentence and vocabulary statistics used for the scores."""
+        words = WORD_PATTERN.findall(content.lower())
+        sentences = [s for s in SENTENCE_PATTERN.split(content) if s.strip()]
+        word_count = len(words)
+        return {
+            'word_count': word_count,
+            'sentence_count': len(sentences),
+            'avg_sentence_words': word_count / max(1, len(sentences)),
+            'avg_word_length': sum(len(word) for word in words) / max(1, word_count),
+            'long_word_share': sum(len(word) >= 10 for word in words) / max(1, word_count),
+            'number_share': sum(word.isdigit() for word in words) / max(1, word_count),
+        }
+
+    @staticmethod
+    def reading_time(word_count):
+        """Reading-time bucket in the same vocabulary as the AI analysis."""
+        minutes = word_count / WORDS_PER_MINUTE
+        for limit, label in READING_TIME_BUCKETS:
+            if minutes <= limit:
+                return label
+        return LONG_READING_TIME
+
+    @staticmethod
+    def complexity(stats):
+        """простой / средний / сложный from sentence length and long-word share."""
+        index = stats['avg_sentence_words'] / 15 + stats['long_word_share'] * 4 + stats['number_share'] * 3
+        if index < 1.2:
+            return 'простой'
+        if index < 2.0:
+            return 'средний'
+        return 'сложный'
+
+    @staticmethod
+    def action_items(content, category):
+        """Pick imperative or how-to sentences from the text as actions."""
+        sentences = [
+            sentence.strip() for sentence in SENTENCE_PATTERN.split(content)
+            if 30 <= len(sentence.strip()) <= 160
+        ]
+        items = []
+        for pattern in (IMPERATIVE_PATTERN, ACTION_PATTERN):
+            for sentence in sentences:
+                if sentence not in items and pattern.search(sentence.lower()):
+                    items.append(sentence)
+                if len(items) == 3:
+                    return items
+
+        items.append(f"Выделить идеи из раздела «{category}», применимые к своему проекту")
+        items.append("Выбрать одно действие и проверить его на этой неделе")
+        return items[:3]
+
+    def prescore(self, article):
+        """Estimate (0-10) whether an article deserves an AI analysis.
+
+        Cheap signals only: length, content quality, topic keyword density,
+        how-to wording, and promo wording as a penalty.
+        """
+        content = article.get('content') or article.get('description') or ''
+        lowered = content.lower()
+        word_count = len(WORD_PATTERN.findall(lowered))
+
+        length = min(4.0, word_count / 150)
+        quality = 2.0 if article.get('content_quality') == 'authenticated' else 0.0
+        topic = min(3.0, max(self._keyword_scores(f"{article.get('title', '')} {lowered}".lower(), CATEGORY_PATTERNS).values()))
+        actions = min(1.0, count_keywords(ACTION_PATTERN, lowered) / 3)
+        promo = min(4.0, 2.0 * sum(marker in lowered for marker in PROMO_MARKERS))
+
+        score = max(0.0, length + quality + topic + actions - promo)
+        return {
+            'score': round(score, 1),
+            'word_count': word_count,
+            'reasons': f"{word_count} words, quality={article.get('content_quality', 'unknown')}, "
+                       f"topic={topic:.1f}, actions={actions:.1f}, promo=-{promo:.0f}",
+        }
+
+    def analyze(self, article):
+        """Build a full analysis dict for a scraped article."""
+        title = article.get('title', '')
+        content = article.get('content') or article.get('description') or ''
+
+        stats = self.text_statistics(content)
+        category, audiences, confidence = self.classify(title, content)
+        lowered = content.lower()
+        action_hits = count_keywords(ACTION_PATTERN, lowered)
+
+        depth = clamp_score(3 + stats['word_count'] / 250)
+        practicality = clamp_score(4 + math.log1p(action_hits) * 1.5)
+        relevance = clamp_score(5 + confidence * 4)
+        novelty = 6
+        overall = clamp_score((depth + practicality + relevance + novelty) / 4)
+
+        return {
+            "title": title,
+            "summary": f"в этом обзоре ты узнаешь об идеях из статьи «{title}», и вот наша оценка данного поста + что из этого применить в разделе «{category}»",
+            "overall_score": overall,
+            "scores": {
+                "practicality": practicality,
+                "novelty": novelty,
+                "depth": depth,
+                "relevance": relevance
+            },
+            "category": category,
+            "target_audience": audiences,
+            "reading_time": self.reading_time(stats['word_count']),
+            "complexity_level": self.complexity(stats),
+            "roi_potential": 'высокий' if practicality >= 8 else 'средний' if practicality >= 5 else 'низкий',
+            "business_stage": "любая",
+            "result_timeframe": TIMEFRAME_BY_CATEGORY.get(category, 'месяц'),
+            "action_checklist": self.action_items(content, category),
+            "main_risks": [
+                "Оценка сделана автоматически без ИИ — проверьте выводы самостоятельно",
+                "Примеры из статьи могут не переноситься на ваш рынок напрямую"
+            ],
+            "score_reason": (
+                f"Локальная оценка: {stats['word_count']} слов, "
+                f"{'полный текст' if article.get('content_quality') == 'authenticated' else 'анонс'}, "
+                f"уверенность в категории {confidence:.0%}."
+            ),
+            "word_count": stats['word_count'],
+        }
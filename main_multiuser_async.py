@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+FastFounder Daily Link-Push Bot - Multi-User Async Version
+
+Asyncio variant of main_multiuser_daily.main() that overlaps independent
+network work instead of running every step back to back:
+
+- the getUpdates new-user check, FastFounder login and RSS fetch run
+  concurrently;
+- each article is scraped and analyzed in its own pipeline;
+- articles with a cached analysis are broadcast straight away, while the
+  remaining articles are still being analyzed;
+- each broadcast fans out to users with bounded concurrency.
+"""
+
+import asyncio
+import logging
+import os
+from itertools import chain
+
+from analysis_cache import AnalysisCache
+from dead_letter_queue import DeadLetterQueue
+import main_multiuser_daily as daily
+from main_multiuser_daily import (
+    FastFounderAuthenticatedScraper,
+    check_for_new_users,
+    failed_send_result,
+    generate_enhanced_analysis,
+    get_rss_feed,
+    prune_article_store,
+    publish_to_channel,
+    record_delivery_result,
+    redeliver_dead_letters,
+    render_digest_message,
+    scrape_article_content_authenticated,
+    send_digest_to_chat,
+    stage_digest,
+)
+from transport import AsyncTransport, get_default_transport
+from user_manager import UserManager
+
+logger = logging.getLogger(__name__)
+
+# Number of latest RSS articles to process per run
+DIGEST_ARTICLE_COUNT = int(os.environ.get('DIGEST_ARTICLE_COUNT', '1'))
+
+# Maximum in-flight sendMessage calls per broadcast
+BROADCAST_CONCURRENCY = int(os.environ.get('BROADCAST_CONCURRENCY', '8'))
+
+
+async def login_scraper(transport):
+    """Log in to FastFounder in the background; returns a scraper or None."""
+    email = os.environ.get('FAST_FOUNDER_EMAIL')
+    password = os.environ.get('FAST_FOUNDER_PASSWORD')
+
+    if not (email and password):
+        logger.warning("⚠️ No FastFounder credentials found - using fallback scraping")
+        return None
+
+    logger.info("🔐 Credentials found, initializing authenticated scraper...")
+    scraper = FastFounderAuthenticatedScraper(transport.sync_transport)
+    if await transport.run_sync(scraper.login, email, password):
+        logger.info("✅ Authentication successful - will use full content")
+        return scraper
+
+    logger.warning("⚠️ Authentication failed - will use fallback scraping")
+    return None
+
+
+async def broadcast_telegram_message_async(article, analysis, user_manager, transport,
+                                           concurrency=BROADCAST_CONCURRENCY, dead_letters=None):
+    """Broadcast a digest to all active users with bounded concurrency.
+
+    Failed sends are only queued in dead_letters; main_async() retries them
+    once, after every article has been broadcast.
+    """
+    logger.info("📱 Broadcasting enhanced Telegram message to all users...")
+
+    telegram_token = daily.get_bot_pool().primary
+    if not telegram_token:
+        logger.error("❌ Telegram token not found")
+        return False
+
+    message = render_digest_message(article, analysis)
+    sync_transport = transport.sync_transport
+
+    if daily.BROADCAST_MODE == 'channel':
+        return await transport.run_sync(publish_to_channel, telegram_token, message, sync_transport)
+
+    active_users = user_manager.iter_users_for_article(analysis.get('category'), analysis.get('target_audience'))
+    first_user = next(active_users, None)
+    if first_user is None:
+        logger.warning("⚠️ No active users found")
+        return False
+
+    logger.info(f"📊 Broadcasting to interested users among {user_manager.get_user_count()} active ({concurrency} concurrent)")
+
+    staged = await transport.run_sync(stage_digest, telegram_token, message, sync_transport)
+    digest = {'key': article.get('url', ''), 'message': message, 'staged': staged}
+    pending = chain([first_user], active_users)
+    counts = {'successful': 0, 'failed': 0}
+
+    async def worker():
+        # Workers share one iterator, so at most `concurrency` sends are in flight
+        for chat_id in pending:
+            # Each chat goes through the bot it subscribed to; every bot has its own limiter
+            chat_token = daily.token_for_chat(user_manager, chat_id)
+            if chat_token is None:
+                continue
+            try:
+                result = await transport.run_sync(
+                    send_digest_to_chat, chat_token, chat_id, message, sync_transport, staged
+                )
+            except Exception as e:
+                logger.error(f"❌ Error sending to {chat_id}: {e}")
+                result = failed_send_result(e)
+
+            # Stats are updated on the event loop thread, never from workers
+            if record_delivery_result(user_manager, chat_id, result, dead_letters, digest):
+                counts['successful'] += 1
+            else:
+                counts['failed'] += 1
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    logger.info(f"📊 Broadcast complete: {counts['successful']} successful, {counts['failed']} failed")
+    return counts['successful'] > 0
+
+
+async def redeliver_previous_run(context):
+    """Retry the previous run's failed deliveries once new users are merged."""
+    await context['users_task']
+    transport = context['transport']
+    async with context['broadcast_lock']:
+        await transport.run_sync(
+            redeliver_dead_letters, context['user_manager'], context['dead_letters'], transport.sync_transport
+        )
+
+
+async def process_article(article, context):
+    """Scrape, analyze and broadcast one article."""
+    transport = context['transport']
+    cache = context['cache']
+
+    analysis = cache.get(article['url'])
+    if analysis:
+        logger.info(f"♻️ Using cached analysis for: {article['title']}")
+        article_data = article
+    else:
+        scraper = await context['login_task']
+        article_data = await transport.run_sync(scrape_article_content_authenticated, article, scraper)
+
+        # Skip the OpenAI call entirely if there is nobody to send it to
+        await context['users_task']
+        if not context['user_manager'].get_user_count():
+            logger.warning("⚠️ No active users found, skipping analysis")
+            return False
+
+        analysis = await transport.run_sync(generate_enhanced_analysis, article_data, transport.sync_transport)
+        if analysis.get('analysis_source') != 'fallback':
+            cache.put(article_data, analysis)
+        await transport.run_sync(daily.index_analysis, article_data, analysis)
+
+    await context['redelivery_task']
+
+    # One broadcast at a time; other articles keep scraping/analyzing meanwhile
+    async with context['broadcast_lock']:
+        logger.info(f"📰 Broadcasting article: {article['title']}")
+        return await broadcast_telegram_message_async(
+            article_data, analysis, context['user_manager'], transport,
+            dead_letters=context['dead_letters']
+        )
+
+
+async def main_async():
+    """Run the daily digest as an overlapped asyncio pipeline."""
+    logger.info("🚀 Starting FastFounder Daily Bot (Multi-User Async Version)")
+
+    transport = AsyncTransport(get_default_transport(), max_workers=max(16, BROADCAST_CONCURRENCY + 4))
+    user_manager = UserManager()
+
+    try:
+        # Step 1: Independent network work runs concurrently
+        users_task = asyncio.create_task(
+            transport.run_sync(check_for_new_users, user_manager, transport.sync_transport)
+        )
+        login_task = asyncio.create_task(login_scraper(transport))
+        context = {
+            'transport': transport,
+            'cache': AnalysisCache(),
+            'user_manager': user_manager,
+            'users_task': users_task,
+            'login_task': login_task,
+            'broadcast_lock': asyncio.Lock(),
+            'dead_letters': DeadLetterQueue(),
+        }
+        # Yesterday's failed deliveries go out even if there is no new article
+        context['redelivery_task'] = asyncio.create_task(redeliver_previous_run(context))
+        articles = await transport.run_sync(get_rss_feed, transport.sync_transport)
+
+        if not articles:
+            logger.error("❌ No articles found in RSS feed")
+            await asyncio.gather(users_task, login_task, context['redelivery_task'])
+            return
+
+        # Step 2: Per-article pipelines (cached articles broadcast first)
+        selected = articles[:DIGEST_ARTICLE_COUNT]
+        results = await asyncio.gather(
+            *(process_article(article, context) for article in selected),
+            return_exceptions=True
+        )
+        await asyncio.gather(users_task, login_task, context['redelivery_task'])
+        daily.log_openai_usage()
+
+        # One dead-letter pass for the whole run, not one wait per article
+        redelivered = await transport.run_sync(
+            daily.finish_broadcast, user_manager, transport.sync_transport, context['dead_letters']
+        )
+
+        for article, result in zip(selected, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Pipeline failed for {article['title']}: {result}")
+
+        if redelivered or any(result is True for result in results):
+            logger.info("🎉 Daily digest broadcast successfully!")
+        else:
+            logger.error("❌ Failed to broadcast daily digest")
+    finally:
+        transport.close()
+        # Only users.json is kept between runs, so fold the journal into it
+        user_manager.compact()
+        prune_article_store()
+
+
+def main():
+    """Entry point."""
+    asyncio.run(main_async())
+
+
+if __name__ == "__main__":
+    main()
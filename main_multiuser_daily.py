@@ -8,17 +8,29 @@ Checks for new users and broadcasts daily digests to all subscribed users.
 
 import json
 import os
-import urllib.request
-import urllib.parse
-import urllib.error
-import http.cookiejar
 import xml.etree.ElementTree as ET
-from html import unescape
+from html import escape, unescape
 import re
 import logging
 import sys
-from datetime import datetime
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from datetime import datetime, timedelta, timezone
 from user_manager import UserManager
+from dead_letter_queue import DeadLetterQueue
+from analysis_cache import AnalysisCache
+from article_store import ArticleStore, QUALITY_RANK
+from local_analyzer import LocalAnalyzer
+from wordpress_api import WordPressPostsSource
+from search_index import SearchIndex, parse_published_at
+from recommender import Recommender, article_vector
+from rate_limiter import AdaptiveRateLimiter, RateLimiter
+from bot_pool import BotPool, bot_id, load_tokens
+from openai_pool import OpenAIKeyPool, TokenLedger, estimate_tokens, load_api_keys
+from transport import get_default_transport, TransportError
 
 # Configure logging
 logging.basicConfig(
@@ -31,69 +43,651 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# How many times a 429 (Too Many Requests) response is retried
+TELEGRAM_MAX_RETRIES = int(os.environ.get('TELEGRAM_MAX_RETRIES', '3'))
 
-def check_for_new_users():
-    """Check for new users who sent /start since last run."""
+# Messages per second across all chats (Telegram allows ~30); 0 disables pacing.
+# With adaptive pacing this is only the starting rate until one has been learned.
+BROADCAST_RATE_LIMIT = float(os.environ.get('BROADCAST_RATE_LIMIT', '25'))
+
+# Tune the send rate from observed 429s (AIMD) and remember it between runs
+BROADCAST_RATE_ADAPTIVE = os.environ.get('BROADCAST_RATE_ADAPTIVE', '1').lower() not in ('0', 'false', 'no')
+BROADCAST_RATE_MAX = float(os.environ.get('BROADCAST_RATE_MAX', '30'))
+SEND_RATE_STATE_FILE = os.environ.get('SEND_RATE_STATE_FILE', 'send_rate.json')
+
+# How long the end-of-broadcast redelivery pass may wait for retry backoff
+DLQ_INLINE_WAIT = float(os.environ.get('DLQ_INLINE_WAIT', '60'))
+
+# Lazily trained by get_local_analyzer()
+_local_analyzer = None
+
+# Lazily opened by get_article_store()
+_article_store = None
+
+# Lazily opened by get_search_index()
+_search_index = None
+
+# Parallel welcome-message sends during signup processing
+WELCOME_CONCURRENCY = int(os.environ.get('WELCOME_CONCURRENCY', '8'))
+
+# Chats queued per extra bot while the pool is sending
+BOT_POOL_QUEUE_SIZE = int(os.environ.get('BOT_POOL_QUEUE_SIZE', '100'))
+
+# Lazily built by get_bot_pool() from TELEGRAM_TOKEN / TELEGRAM_TOKENS
+_bot_pool = None
+
+
+def new_send_rate_limiter(state_file):
+    """Send pacing for one bot, as configured by BROADCAST_RATE_*."""
+    if BROADCAST_RATE_ADAPTIVE and BROADCAST_RATE_LIMIT:
+        return AdaptiveRateLimiter(BROADCAST_RATE_LIMIT, max_rate=BROADCAST_RATE_MAX, state_file=state_file)
+    return RateLimiter(BROADCAST_RATE_LIMIT)
+
+
+# Shared by digest broadcasts and welcome messages of the primary bot
+broadcast_rate_limiter = new_send_rate_limiter(SEND_RATE_STATE_FILE)
+
+# Digest delivery mode:
+#   direct  - full sendMessage to every subscriber (default)
+#   copy    - post once to TELEGRAM_STAGING_CHAT_ID, then copyMessage per subscriber
+#   forward - post once to TELEGRAM_STAGING_CHAT_ID, then forwardMessage per subscriber
+#   channel - post once to TELEGRAM_CHANNEL_ID; subscribers read the public channel
+BROADCAST_MODES = ('direct', 'copy', 'forward', 'channel')
+BROADCAST_MODE = os.environ.get('BROADCAST_MODE', 'direct').strip().lower()
+if BROADCAST_MODE not in BROADCAST_MODES:
+    logger.error(f"❌ Unknown BROADCAST_MODE={BROADCAST_MODE!r} (expected one of {', '.join(BROADCAST_MODES)}), "
+                 f"falling back to direct sends")
+    BROADCAST_MODE = 'direct'
+TELEGRAM_STAGING_CHAT_ID = os.environ.get('TELEGRAM_STAGING_CHAT_ID')
+TELEGRAM_CHANNEL_ID = os.environ.get('TELEGRAM_CHANNEL_ID')
+
+# Pre-scoring gate for AI analysis (local 0-10 score, see LocalAnalyzer.prescore):
+#   score >= ANALYSIS_FULL_SCORE     - full analysis call
+#   score >= ANALYSIS_SUMMARY_SCORE  - short summary call on top of the local analysis
+#   otherwise                        - no AI call, local analysis only
+# ANALYSIS_FULL_SCORE=0 sends every article to the full analysis.
+ANALYSIS_FULL_SCORE = float(os.environ.get('ANALYSIS_FULL_SCORE', '5'))
+ANALYSIS_SUMMARY_SCORE = float(os.environ.get('ANALYSIS_SUMMARY_SCORE', '1.5'))
+
+# Thresholds for RSS-only text (no login). A feed teaser is ~40 words and gets
+# no full-text bonus, so its pre-score tops out around 4 and would never reach
+# ANALYSIS_FULL_SCORE; the best teasers still get the full analysis with these.
+ANALYSIS_FULL_SCORE_RSS = float(os.environ.get('ANALYSIS_FULL_SCORE_RSS', '2.5'))
+ANALYSIS_SUMMARY_SCORE_RSS = float(os.environ.get('ANALYSIS_SUMMARY_SCORE_RSS', '1.0'))
+
+# Analysis prompts. These are sent as the system message; everything
+# article-specific goes in the user message after them. At about 600 tokens
+# they are below the 1024-token minimum of OpenAI's prompt cache, so no
+# cache hits are expected.
+ANALYSIS_SYSTEM_PROMPT = "Ты эксперт по анализу бизнес-контента. Отвечай только в формате JSON без дополнительного текста."
+
+FULL_ANALYSIS_INSTRUCTIONS = f"""{ANALYSIS_SYSTEM_PROMPT}
+
+Проанализируй статью с FastFounder из следующего сообщения и создай подробный обзор в формате:
+
+в этом обзоре ты узнаешь об [краткое описание темы], и вот наша оценка данного поста + добавь идеи как я могу использовать это каждый день
+
+Также предоставь детальную оценку по следующим критериям (каждый от 1 до 10):
+- Практичность (насколько применимо на практике)
+- Новизна (насколько новая/свежая информация)
+- Глубина (насколько глубоко раскрыта тема)
+- Актуальность (насколько актуально сейчас)
+
+Определи:
+- Категорию (стратегия, маркетинг, продажи, финансы, технологии, личная эффективность, аналитика)
+- Целевую аудиторию (новички, опытные, маркетологи, IT, фрилансеры, инвесторы, студенты)
+- Время изучения (быстрое 5-10мин, среднее 15-30мин, долгое 1+ час)
+- Сложность (простой, средний, сложный)
+- ROI потенциал (высокий, средний, низкий)
+- Стадию бизнеса (идея, запуск, рост, масштабирование)
+- Время до результата (неделя, месяц, квартал, год)
+
+Создай 3-5 конкретных действий для применения
+Укажи 2-3 основных риска
+Дай общую оценку от 1 до 10 с объяснением
+
+Ответь в формате JSON:
+{{
+    "summary": "в этом обзоре ты узнаешь об...",
+    "overall_score": число от 1 до 10,
+    "scores": {{
+        "practicality": число,
+        "novelty": число,
+        "depth": число,
+        "relevance": число
+    }},
+    "category": "категория",
+    "target_audience": ["аудитория1", "аудитория2"],
+    "reading_time": "время",
+    "complexity_level": "уровень",
+    "roi_potential": "потенциал",
+    "business_stage": "стадия",
+    "result_timeframe": "время",
+    "action_checklist": ["действие1", "действие2", "действие3"],
+    "main_risks": ["риск1", "риск2"],
+    "score_reason": "объяснение оценки"
+}}"""
+
+SUMMARY_ANALYSIS_INSTRUCTIONS = f"""{ANALYSIS_SYSTEM_PROMPT}
+
+Кратко проанализируй статью с FastFounder из следующего сообщения.
+
+Ответь в формате JSON:
+{{
+    "summary": "в этом обзоре ты узнаешь об [краткое описание темы], и вот наша оценка данного поста + одна идея как применить это каждый день",
+    "overall_score": число от 1 до 10,
+    "score_reason": "объяснение оценки в одном предложении"
+}}"""
+
+# Token usage and cost of OpenAI calls in this run
+openai_ledger = TokenLedger()
+
+# Lazily built by get_openai_pool() from OPENAI_API_KEY / OPENAI_API_KEYS
+_openai_pool = None
+
+# Where full article text comes from after login:
+#   api  - WordPress REST API (/wp-json/wp/v2/posts), HTML pages as fallback (default)
+#   html - always download and strip the rendered article page
+FASTFOUNDER_CONTENT_SOURCE = os.environ.get('FASTFOUNDER_CONTENT_SOURCE', 'api').lower()
+
+# Scraped article text is kept here between runs ('' disables the store)
+ARTICLE_STORE_DIR = os.environ.get('ARTICLE_STORE_DIR', 'article_store')
+
+# Most recently fetched articles kept in the bot's store, pruned once per run (0 = unbounded)
+ARTICLE_STORE_KEEP = int(os.environ.get('ARTICLE_STORE_KEEP', '500'))
+
+# Local FTS5 index behind /search and /top ('' disables indexing and the commands)
+SEARCH_INDEX_FILE = os.environ.get('SEARCH_INDEX_FILE', 'search_index.db')
+
+# Newest RSS articles analyzed per run; each user gets the one that fits them best (1 = everyone gets the newest).
+# Every extra candidate is one more OpenAI analysis per run unless it is already cached
+RECOMMEND_CANDIDATES = int(os.environ.get('RECOMMEND_CANDIDATES', '1'))
+
+# Older articles than this are not offered again (the newest one always is)
+RECOMMEND_WINDOW_HOURS = float(os.environ.get('RECOMMEND_WINDOW_HOURS', '24'))
+
+# Interests users can subscribe to (same vocabulary as the AI analysis)
+CATEGORIES = ['стратегия', 'маркетинг', 'продажи', 'финансы', 'технологии', 'личная эффективность', 'аналитика']
+AUDIENCES = ['новички', 'опытные', 'маркетологи', 'it', 'фрилансеры', 'инвесторы', 'студенты']
+INTEREST_COMMANDS = {
+    '/categories': ('categories', CATEGORIES),
+    '/audience': ('audiences', AUDIENCES),
+}
+
+
+# Browser-like headers for fastfounder.ru requests
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'ru-RU,ru;q=0.9,en;q=0.8',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+
+def get_bot_pool():
+    """Bot tokens configured for this process (rebuilt if the environment changes)."""
+    global _bot_pool
+    tokens = load_tokens()
+    if _bot_pool is None or _bot_pool.tokens != tokens:
+        root, ext = os.path.splitext(SEND_RATE_STATE_FILE)
+        _bot_pool = BotPool(tokens, lambda bot: new_send_rate_limiter(f"{root}.{bot}{ext}"))
+    return _bot_pool
+
+
+def rate_limiter_for(telegram_token):
+    """Send pacing of one bot; each extra bot has its own limit."""
+    return get_bot_pool().limiters.get(telegram_token, broadcast_rate_limiter)
+
+
+def token_for_chat(user_manager, chat_id):
+    """Token of the bot that may message chat_id, or None if it is not configured."""
+    return get_bot_pool().token_for(user_manager.get_bot(chat_id))
+
+
+def save_send_rates():
+    """Persist the learned send rate of every bot."""
+    broadcast_rate_limiter.save()
+    get_bot_pool().save()
+
+
+def watermark_key(name, telegram_token):
+    """Meta key for a per-bot update_id watermark (update ids are per bot)."""
+    if telegram_token == get_bot_pool().primary:
+        return name
+    return f"{name}:{bot_id(telegram_token)}"
+
+
+def telegram_api_request(telegram_token, method, data, transport=None):
+    """Call a Telegram Bot API method and return the decoded JSON response.
+    
+    Error responses (403 blocked, 400 chat not found) are decoded rather than
+    raised so callers can inspect error_code. 429 responses are retried after
+    the retry_after delay supplied by Telegram.
+    """
+    transport = transport or get_default_transport()
+    url = transport.endpoints.telegram(telegram_token, method)
+    
+    for attempt in range(TELEGRAM_MAX_RETRIES + 1):
+        response = transport.post_form(url, data)
+        
+        try:
+            result = response.json()
+        except ValueError:
+            response.raise_for_status()
+            raise TransportError(f"Invalid JSON from Telegram {method}")
+        
+        if result.get('error_code') == 429:
+            retry_after = result.get('parameters', {}).get('retry_after', 1)
+            rate_limiter_for(telegram_token).record_throttle(retry_after)
+            if attempt < TELEGRAM_MAX_RETRIES:
+                logger.warning(f"⏳ Telegram rate limit hit on {method}, retrying in {retry_after}s")
+                time.sleep(retry_after)
+                continue
+        
+        return result
+
+
+def check_for_new_users(user_manager=None, transport=None):
+    """Check every bot for new users who sent /start since last run."""
     logger.info("👥 Checking for new users...")
     
-    telegram_token = os.environ.get('TELEGRAM_TOKEN')
-    if not telegram_token:
+    tokens = get_bot_pool().tokens
+    if not tokens:
         logger.warning("⚠️ No Telegram token found, skipping user check")
         return
     
-    user_manager = UserManager()
+    if user_manager is None:
+        user_manager = UserManager()
     
+    for telegram_token in tokens:
+        process_bot_updates(telegram_token, user_manager, transport)
+
+
+def process_bot_updates(telegram_token, user_manager, transport=None):
+    """Handle /start and settings commands sent to one bot."""
     try:
         # Get recent updates from Telegram
-        url = f"https://api.telegram.org/bot{telegram_token}/getUpdates"
         params = {'limit': 100}  # Get last 100 updates
         
-        url_with_params = f"{url}?{urllib.parse.urlencode(params)}"
-        
-        with urllib.request.urlopen(url_with_params) as response:
-            result = json.loads(response.read().decode('utf-8'))
+        result = telegram_api_request(telegram_token, 'getUpdates', params, transport)
         
         if not result.get('ok'):
             logger.error(f"❌ Failed to get updates: {result}")
             return
         
         updates = result.get('result', [])
-        new_users_count = 0
         
+        # Keep only the latest /start per chat so repeated taps count once
+        signups = {}
+        interest_changes = {}
+        delivery_changes = {}
+        search_requests = []
+        feedback_votes = []
         for update in updates:
             if 'message' in update:
                 message = update['message']
                 text = message.get('text', '')
+                chat_id = message['chat']['id']
                 
                 if text.startswith('/start'):
-                    chat_id = message['chat']['id']
-                    user = message.get('from', {})
-                    
-                    username = user.get('username')
-                    first_name = user.get('first_name')
-                    last_name = user.get('last_name')
-                    
-                    # Check if user already exists
-                    existing_user = user_manager.get_user_info(str(chat_id))
-                    if not existing_user or not existing_user.get('active', False):
-                        user_manager.add_user(chat_id, username, first_name, last_name)
-                        new_users_count += 1
-                        logger.info(f"👤 Added new user: {chat_id}")
-                        
-                        # Send welcome message
-                        send_welcome_message(chat_id, first_name, telegram_token)
-        
-        if new_users_count > 0:
+                    signups[str(chat_id)] = (chat_id, message.get('from', {}))
+                    continue
+                
+                command = parse_interest_command(text)
+                if command:
+                    field, values = command
+                    interest_changes.setdefault(str(chat_id), {'chat_id': chat_id})[field] = values
+                    continue
+                
+                command = parse_delivery_command(text)
+                if command:
+                    field, value = command
+                    delivery_changes.setdefault(str(chat_id), {'chat_id': chat_id})[field] = value
+                    continue
+                
+                command = parse_search_command(text)
+                if command:
+                    search_requests.append((update['update_id'], chat_id, command))
+                    continue
+                
+                vote = parse_feedback_command(text)
+                if vote:
+                    feedback_votes.append((update['update_id'], chat_id, vote))
+        
+        new_users = []
+        for chat_id, user in signups.values():
+            # Check if user already exists
+            existing_user = user_manager.get_user_info(str(chat_id))
+            if not existing_user or not existing_user.get('active', False):
+                new_users.append({
+                    'chat_id': chat_id,
+                    'username': user.get('username'),
+                    'first_name': user.get('first_name'),
+                    'last_name': user.get('last_name'),
+                    'bot': bot_id(telegram_token)
+                })
+        
+        if new_users:
+            # One store write for the whole batch, then welcome everyone in parallel
+            user_manager.add_users(new_users)
+            send_welcome_messages(new_users, telegram_token, transport)
+            
             total_users = user_manager.get_user_count()
-            logger.info(f"🎉 Added {new_users_count} new users! Total: {total_users}")
+            logger.info(f"🎉 Added {len(new_users)} new users! Total: {total_users}")
         else:
             logger.info("📊 No new users found")
+        
+        # Interest commands are applied after signups so new users can use them too
+        if interest_changes:
+            changed = user_manager.set_users_interests(list(interest_changes.values()))
+            run_concurrently(send_interest_confirmation, [
+                (chat_id, user_manager.get_user_info(chat_id), telegram_token, transport)
+                for chat_id in changed
+            ])
+        
+        if delivery_changes:
+            changed = user_manager.set_users_delivery(list(delivery_changes.values()))
+            run_concurrently(send_delivery_confirmation, [
+                (chat_id, user_manager.get_delivery_preferences(chat_id), telegram_token, transport)
+                for chat_id in changed
+            ])
+        
+        if search_requests:
+            answer_search_requests(search_requests, telegram_token, transport)
+        
+        if feedback_votes:
+            record_feedback_votes(feedback_votes, telegram_token, transport)
             
     except Exception as e:
         logger.error(f"❌ Error checking for new users: {e}")
 
 
-def send_welcome_message(chat_id, first_name, telegram_token):
+def parse_interest_command(text):
+    """Parse /categories or /audience; returns (field, values) or None.
+    
+    Values are comma-separated; 'все'/'all' clears the preference so the
+    user receives every digest. Unknown values are ignored.
+    """
+    parts = text.strip().split(maxsplit=1)
+    if not parts:
+        return None
+    
+    command = parts[0].split('@')[0].lower()
+    if command not in INTEREST_COMMANDS:
+        return None
+    
+    field, allowed = INTEREST_COMMANDS[command]
+    if len(parts) < 2:
+        return None
+    
+    values = [v.strip().lower() for v in parts[1].split(',') if v.strip()]
+    if any(v in ('все', 'all') for v in values):
+        return field, []
+    
+    valid = [v for v in values if v in allowed]
+    if len(valid) != len(values):
+        logger.warning(f"⚠️ Ignoring unknown {field}: {sorted(set(values) - set(valid))}")
+    
+    return (field, valid) if valid else None
+
+
+def parse_delivery_command(text):
+    """Parse /time or /timezone; returns (field, value) or None.
+    
+    /time takes a local hour (8 or 08:00); /timezone takes an IANA name
+    (Europe/Berlin) or a UTC offset (+3, UTC-5).
+    """
+    parts = text.strip().split(maxsplit=1)
+    if len(parts) < 2:
+        return None
+    
+    command = parts[0].split('@')[0].lower()
+    argument = parts[1].strip()
+    
+    if command == '/time':
+        match = re.match(r'^(\d{1,2})(?::\d{2})?$', argument)
+        if match and 0 <= int(match.group(1)) <= 23:
+            return 'delivery_hour', int(match.group(1))
+        return None
+    
+    if command == '/timezone':
+        match = re.match(r'^(?:utc|gmt)?\s*([+-])(\d{1,2})$', argument.lower())
+        if match:
+            hours = int(match.group(2))
+            if hours == 0:
+                return 'timezone', 'UTC'
+            # POSIX-style Etc zones have inverted signs: UTC+3 is Etc/GMT-3
+            sign = '-' if match.group(1) == '+' else '+'
+            return 'timezone', f'Etc/GMT{sign}{hours}'
+        return 'timezone', argument
+    
+    return None
+
+
+def parse_search_command(text):
+    """Parse /search <query> or /top [category]; returns (command, argument) or None."""
+    parts = text.strip().split(maxsplit=1)
+    if not parts:
+        return None
+    
+    command = parts[0].split('@')[0].lower()
+    argument = parts[1].strip() if len(parts) > 1 else ''
+    
+    if command == '/search':
+        return ('search', argument) if argument else None
+    
+    if command == '/top':
+        if not argument:
+            return 'top', None
+        # Prefixes are enough: "/top личная" means "личная эффективность"
+        matches = [category for category in CATEGORIES if category.startswith(argument.lower())]
+        return 'top', matches[0] if matches else argument.lower()
+    
+    return None
+
+
+def parse_feedback_command(text):
+    """Parse /like or /dislike; returns the vote (+1 or -1) or None."""
+    parts = text.strip().split()
+    if not parts:
+        return None
+    return {'/like': 1, '/dislike': -1}.get(parts[0].split('@')[0].lower())
+
+
+def get_search_index():
+    """Search index shared by this process, or None if disabled."""
+    global _search_index
+    if _search_index is None and SEARCH_INDEX_FILE:
+        _search_index = SearchIndex(SEARCH_INDEX_FILE)
+    return _search_index
+
+
+def index_analysis(article_data, analysis):
+    """Add an analyzed article to the search index.
+    
+    Local fallback (and skip-tier) analyses are left out: their scores come
+    from the heuristic, not the AI, and would distort /top and roll-ups.
+    """
+    if analysis.get('analysis_source') == 'fallback':
+        logger.info(f"🔎 Not indexing locally scored article: {article_data.get('title', '')}")
+        return
+    index = get_search_index()
+    if index is not None and index.index_article(article_data, analysis):
+        logger.info(f"🔎 Indexed for search: {article_data.get('title', '')}")
+
+
+def render_search_results(command, argument, results):
+    """Format /search or /top results as a Telegram HTML message."""
+    if command == 'search':
+        header = f"🔎 <b>Поиск: {escape(argument)}</b>"
+    else:
+        header = f"🏆 <b>Лучшие статьи{f': {escape(argument)}' if argument else ''}</b>"
+    
+    if not results:
+        hint = "Попробуйте другие слова" if command == 'search' else f"Категории: {', '.join(CATEGORIES)}"
+        return f"{header}\n\nНичего не найдено. {hint}"
+    
+    lines = []
+    for position, row in enumerate(results, 1):
+        score = row['overall_score'] or 0
+        category = row['category'] or ''
+        lines.append(
+            f"{position}. <a href=\"{escape(row['url'])}\">{escape(row['title'])}</a>\n"
+            f"   {get_score_emoji(score)} {score:g}/10 · {get_category_emoji(category)} {escape(category)}"
+        )
+    return f"{header}\n\n" + "\n\n".join(lines)
+
+
+def send_search_results(chat_id, command, argument, telegram_token, transport=None):
+    """Answer one /search or /top command from the local index."""
+    index = get_search_index()
+    results = index.search(argument) if command == 'search' else index.top(argument)
+    
+    data = {
+        'chat_id': chat_id,
+        'text': render_search_results(command, argument, results),
+        'parse_mode': 'HTML',
+        'disable_web_page_preview': True
+    }
+    
+    try:
+        rate_limiter_for(telegram_token).acquire()
+        result = telegram_api_request(telegram_token, 'sendMessage', data, transport)
+        if not result.get('ok'):
+            logger.error(f"❌ Failed to send {command} results to {chat_id}: {result}")
+    except Exception as e:
+        logger.error(f"❌ Error sending {command} results to {chat_id}: {e}")
+
+
+def answer_search_requests(requests, telegram_token, transport=None):
+    """Answer /search and /top commands not answered by an earlier run.
+    
+    getUpdates returns the same recent messages on every run, so the last
+    answered update_id is kept in the index to reply only once.
+    """
+    index = get_search_index()
+    if index is None:
+        return
+    
+    watermark = watermark_key('last_search_update_id', telegram_token)
+    last_answered = int(index.get_meta(watermark, 0))
+    pending = [(update_id, chat_id, command) for update_id, chat_id, command in requests if update_id > last_answered]
+    if not pending:
+        return
+    
+    logger.info(f"🔎 Answering {len(pending)} search commands")
+    run_concurrently(send_search_results, [
+        (chat_id, command, argument, telegram_token, transport)
+        for _, chat_id, (command, argument) in pending
+    ])
+    index.set_meta(watermark, max(update_id for update_id, _, _ in pending))
+
+
+def send_feedback_confirmation(chat_id, vote, telegram_token, transport=None):
+    """Acknowledge a /like or /dislike."""
+    text = "👍 Учтём: будет больше похожих статей" if vote > 0 else "👎 Учтём: таких статей будет меньше"
+    
+    try:
+        rate_limiter_for(telegram_token).acquire()
+        result = telegram_api_request(telegram_token, 'sendMessage', {'chat_id': chat_id, 'text': text}, transport)
+        if not result.get('ok'):
+            logger.error(f"❌ Failed to confirm feedback to {chat_id}: {result}")
+    except Exception as e:
+        logger.error(f"❌ Error confirming feedback to {chat_id}: {e}")
+
+
+def record_feedback_votes(votes, telegram_token, transport=None):
+    """Store /like and /dislike for the article each user last received.
+    
+    Like search commands, votes already seen by an earlier run are skipped
+    using the last recorded update_id.
+    """
+    index = get_search_index()
+    if index is None:
+        return
+    
+    watermark = watermark_key('last_feedback_update_id', telegram_token)
+    last_recorded = int(index.get_meta(watermark, 0))
+    pending = [(update_id, chat_id, vote) for update_id, chat_id, vote in votes if update_id > last_recorded]
+    if not pending:
+        return
+    
+    # The latest vote per user wins
+    latest = {}
+    for _, chat_id, vote in pending:
+        url = index.recommended_url(chat_id)
+        if url:
+            latest[str(chat_id)] = (chat_id, url, vote)
+    
+    index.record_feedback(latest.values())
+    index.set_meta(watermark, max(update_id for update_id, _, _ in pending))
+    logger.info(f"👍 Recorded {len(latest)} feedback votes")
+    run_concurrently(send_feedback_confirmation, [
+        (chat_id, vote, telegram_token, transport) for chat_id, _, vote in latest.values()
+    ])
+
+
+def run_concurrently(fn, calls):
+    """Run fn over a list of argument tuples on a small thread pool."""
+    if len(calls) <= 1:
+        for args in calls:
+            fn(*args)
+        return
+    
+    with ThreadPoolExecutor(max_workers=max(1, WELCOME_CONCURRENCY)) as executor:
+        for args in calls:
+            executor.submit(fn, *args)
+
+
+def send_welcome_messages(new_users, telegram_token, transport=None):
+    """Send welcome messages concurrently, paced by the broadcast rate limiter."""
+    run_concurrently(send_welcome_message, [
+        (user['chat_id'], user.get('first_name'), telegram_token, transport)
+        for user in new_users
+    ])
+
+
+def send_delivery_confirmation(chat_id, preferences, telegram_token, transport=None):
+    """Confirm an updated delivery time to a user."""
+    timezone, delivery_hour = preferences
+    
+    data = {
+        'chat_id': chat_id,
+        'text': f"🕐 <b>Время доставки обновлено</b>\n\nДайджест будет приходить в {delivery_hour:02d}:00 ({timezone})",
+        'parse_mode': 'HTML'
+    }
+    
+    try:
+        rate_limiter_for(telegram_token).acquire()
+        result = telegram_api_request(telegram_token, 'sendMessage', data, transport)
+        if not result.get('ok'):
+            logger.error(f"❌ Failed to confirm delivery time to {chat_id}: {result}")
+    except Exception as e:
+        logger.error(f"❌ Error confirming delivery time to {chat_id}: {e}")
+
+
+def send_interest_confirmation(chat_id, user_info, telegram_token, transport=None):
+    """Confirm updated category/audience preferences to a user."""
+    categories = ', '.join(user_info.get('categories', [])) or 'все'
+    audiences = ', '.join(user_info.get('audiences', [])) or 'все'
+    
+    data = {
+        'chat_id': chat_id,
+        'text': f"🎯 <b>Настройки обновлены</b>\n\n📂 Категории: {categories}\n👥 Аудитория: {audiences}",
+        'parse_mode': 'HTML'
+    }
+    
+    try:
+        rate_limiter_for(telegram_token).acquire()
+        result = telegram_api_request(telegram_token, 'sendMessage', data, transport)
+        if not result.get('ok'):
+            logger.error(f"❌ Failed to confirm interests to {chat_id}: {result}")
+    except Exception as e:
+        logger.error(f"❌ Error confirming interests to {chat_id}: {e}")
+
+
+def send_welcome_message(chat_id, first_name, telegram_token, transport=None):
     """Send welcome message to new user."""
     welcome_message = f"""🎉 <b>Добро пожаловать в FastFounder Daily!</b>
 
@@ -110,11 +704,25 @@ def send_welcome_message(chat_id, first_name, telegram_token):
 
 🕐 <b>Когда:</b> Каждый день в 9:00 МСК
 
+🎯 <b>Только нужные темы:</b>
+/categories маркетинг, продажи — выбрать категории
+/audience новички, IT — выбрать аудиторию
+(<code>все</code> — получать всё)
+
+🕐 <b>Своё время доставки:</b>
+/time 8 — час доставки по местному времени
+/timezone Europe/Berlin или /timezone +3 — часовой пояс
+
+🔎 <b>Архив статей:</b>
+/search юнит-экономика — поиск по разобранным статьям
+/top маркетинг — лучшие статьи категории
+
+👍 <b>Подбор под тебя:</b>
+/like или /dislike — оценить последнюю статью
+
 <i>🤖 Powered by AI • FastFounder Daily Bot</i>"""
     
     try:
-        url = f"https://api.telegram.org/bot{telegram_token}/sendMessage"
-        
         data = {
             'chat_id': chat_id,
             'text': welcome_message,
@@ -122,16 +730,13 @@ def send_welcome_message(chat_id, first_name, telegram_token):
             'disable_web_page_preview': True
         }
         
-        encoded_data = urllib.parse.urlencode(data).encode('utf-8')
-        req = urllib.request.Request(url, data=encoded_data)
+        rate_limiter_for(telegram_token).acquire()
+        result = telegram_api_request(telegram_token, 'sendMessage', data, transport)
         
-        with urllib.request.urlopen(req) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            
-            if result.get('ok'):
-                logger.info(f"✅ Welcome message sent to {chat_id}")
-            else:
-                logger.error(f"❌ Failed to send welcome message to {chat_id}: {result}")
+        if result.get('ok'):
+            logger.info(f"✅ Welcome message sent to {chat_id}")
+        else:
+            logger.error(f"❌ Failed to send welcome message to {chat_id}: {result}")
                 
     except Exception as e:
         logger.error(f"❌ Error sending welcome message to {chat_id}: {e}")
@@ -140,24 +745,13 @@ def send_welcome_message(chat_id, first_name, telegram_token):
 class FastFounderAuthenticatedScraper:
     """Authenticated scraper for FastFounder articles."""
     
-    def __init__(self):
-        # Set up cookie jar for session management
-        self.cookie_jar = http.cookiejar.CookieJar()
-        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookie_jar))
-        
-        # Add headers to mimic a real browser
-        self.opener.addheaders = [
-            ('User-Agent', 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'),
-            ('Accept', 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'),
-            ('Accept-Language', 'ru-RU,ru;q=0.9,en;q=0.8'),
-            ('Connection', 'keep-alive'),
-            ('Upgrade-Insecure-Requests', '1'),
-        ]
-        
-        # Install the opener
-        urllib.request.install_opener(self.opener)
+    def __init__(self, transport=None):
+        # The transport owns the session cookie jar; nothing is installed globally
+        self.transport = transport or get_default_transport()
+        self.cookie_jar = self.transport.cookie_jar
         
         self.logged_in = False
+        self.posts_api = WordPressPostsSource(self.transport) if FASTFOUNDER_CONTENT_SOURCE == 'api' else None
         
     def login(self, email, password):
         """Login to FastFounder."""
@@ -165,50 +759,34 @@ class FastFounderAuthenticatedScraper:
         
         try:
             # First, get the login page to extract any CSRF tokens or form data
-            login_page_url = "https://fastfounder.ru/wp-login.php"
+            endpoints = self.transport.endpoints
+            login_page_url = endpoints.fastfounder('wp-login.php')
             
-            req = urllib.request.Request(login_page_url)
-            req.add_header('User-Agent', 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36')
-            
-            with urllib.request.urlopen(req) as response:
-                login_page_data = response.read()
-                try:
-                    login_page_html = login_page_data.decode('utf-8')
-                except UnicodeDecodeError:
-                    login_page_html = login_page_data.decode('utf-8', errors='ignore')
+            response = self.transport.get(login_page_url, headers=BROWSER_HEADERS)
+            response.raise_for_status()
+            login_page_html = response.text(errors='ignore')
             
             # Prepare login data - using the correct WordPress form fields
             login_data = {
                 'log': email,  # Username or email field
                 'pwd': password,  # Password field
                 'wp-submit': 'Войти',  # Submit button
-                'redirect_to': 'https://fastfounder.ru/',  # Redirect after login
+                'redirect_to': endpoints.fastfounder(),  # Redirect after login
                 'testcookie': '1',
                 'rememberme': 'forever'  # Remember me checkbox
             }
             
-            # Encode the data
-            encoded_data = urllib.parse.urlencode(login_data).encode('utf-8')
-            
-            # Create the request
-            login_request = urllib.request.Request(
-                "https://fastfounder.ru/wp-login.php",
-                data=encoded_data,
-                headers={
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                    'Referer': 'https://fastfounder.ru/wp-login.php',
-                    'Origin': 'https://fastfounder.ru'
-                }
-            )
+            login_headers = dict(BROWSER_HEADERS)
+            login_headers.update({
+                'Referer': login_page_url,
+                'Origin': endpoints.fastfounder_url
+            })
             
-            # Submit login
-            with urllib.request.urlopen(login_request) as response:
-                login_response_data = response.read()
-                try:
-                    login_response = login_response_data.decode('utf-8')
-                except UnicodeDecodeError:
-                    login_response = login_response_data.decode('utf-8', errors='ignore')
-                response_url = response.geturl()
+            # Submit login (redirects are followed by the transport)
+            response = self.transport.post_form(login_page_url, login_data, headers=login_headers)
+            response.raise_for_status()
+            login_response = response.text(errors='ignore')
+            response_url = response.url
             
             logger.info(f"📍 Login response URL: {response_url}")
             
@@ -216,6 +794,8 @@ class FastFounderAuthenticatedScraper:
             if 'wp-login.php' not in response_url and 'loggedout' not in response_url:
                 logger.info("✅ Login successful!")
                 self.logged_in = True
+                if self.posts_api:
+                    self.posts_api.authenticate()
                 return True
             else:
                 logger.error("❌ Login failed - redirected back to login page")
@@ -227,17 +807,29 @@ class FastFounderAuthenticatedScraper:
             logger.error(f"❌ Login error: {e}")
             return False
     
+    def article_modified(self, article_url):
+        """WordPress edit time of an article, or None without the API."""
+        return self.posts_api.modified_gmt(article_url) if self.posts_api else None
+    
     def get_full_article_content(self, article_url):
         """Get full article content using authenticated session."""
         if not self.logged_in:
             logger.error("❌ Not logged in! Cannot access full content.")
             return None
         
+        if self.posts_api:
+            content = self.posts_api.get_content(article_url)
+            if content:
+                logger.info(f"✅ Got {len(content)} characters of authenticated content from the WordPress API")
+                return content
+            logger.info("↩️ Article not available from the WordPress API, scraping HTML")
+        
         logger.info(f"📖 Fetching full authenticated article content...")
         
         try:
-            with urllib.request.urlopen(article_url) as response:
-                html_content = response.read().decode('utf-8')
+            response = self.transport.get(article_url, headers=BROWSER_HEADERS)
+            response.raise_for_status()
+            html_content = response.text()
             
             # Extract clean content
             clean_content = self._extract_clean_content(html_content)
@@ -268,36 +860,20 @@ class FastFounderAuthenticatedScraper:
         return text_content
 
 
-def get_rss_feed():
+def get_rss_feed(transport=None):
     """Fetch and parse RSS feed."""
     logger.info("📡 Fetching RSS feed...")
     
+    transport = transport or get_default_transport()
+    
     try:
-        rss_url = "https://fastfounder.ru/feed/"
+        rss_url = transport.endpoints.fastfounder('feed/')
         
-        with urllib.request.urlopen(rss_url) as response:
-            rss_data = response.read()
+        response = transport.get(rss_url, headers=BROWSER_HEADERS)
+        response.raise_for_status()
+        rss_data = response.body
         
-        # Parse XML
-        root = ET.fromstring(rss_data)
-        
-        articles = []
-        
-        # Find all items in the RSS feed
-        for item in root.findall('.//item'):
-            title_elem = item.find('title')
-            link_elem = item.find('link')
-            description_elem = item.find('description')
-            pub_date_elem = item.find('pubDate')
-            
-            if title_elem is not None and link_elem is not None:
-                article = {
-                    'title': unescape(title_elem.text or ''),
-                    'url': link_elem.text or '',
-                    'description': unescape(description_elem.text or '') if description_elem is not None else '',
-                    'pub_date': pub_date_elem.text or '' if pub_date_elem is not None else ''
-                }
-                articles.append(article)
+        articles = parse_rss_feed(rss_data)
         
         logger.info(f"✅ Found {len(articles)} articles in RSS feed")
         return articles
@@ -307,8 +883,75 @@ def get_rss_feed():
         return []
 
 
+def parse_rss_feed(rss_data):
+    """Parse raw RSS XML into a list of article dicts."""
+    # Parse XML
+    root = ET.fromstring(rss_data)
+    
+    articles = []
+    
+    # Find all items in the RSS feed
+    for item in root.findall('.//item'):
+        title_elem = item.find('title')
+        link_elem = item.find('link')
+        description_elem = item.find('description')
+        pub_date_elem = item.find('pubDate')
+        
+        if title_elem is not None and link_elem is not None:
+            article = {
+                'title': unescape(title_elem.text or ''),
+                'url': link_elem.text or '',
+                'description': unescape(description_elem.text or '') if description_elem is not None else '',
+                'pub_date': pub_date_elem.text or '' if pub_date_elem is not None else ''
+            }
+            articles.append(article)
+    
+    return articles
+
+
+def get_article_store():
+    """Article store shared by this process, or None if disabled."""
+    global _article_store
+    if _article_store is None and ARTICLE_STORE_DIR:
+        _article_store = ArticleStore(ARTICLE_STORE_DIR)
+    return _article_store
+
+
+def prune_article_store():
+    """Trim the store this run used to ARTICLE_STORE_KEEP articles."""
+    if _article_store is not None and ARTICLE_STORE_KEEP:
+        _article_store.prune(ARTICLE_STORE_KEEP)
+
+
+def stored_article_data(article, stored):
+    """Article data built from a stored copy of the article."""
+    logger.info(f"♻️ Using stored article content: {article['title']} ({stored['content_quality']})")
+    return {
+        'title': article['title'],
+        'url': article['url'],
+        'content': stored['content'],
+        'content_quality': stored['content_quality'],
+        'pub_date': article.get('pub_date', '') or stored['pub_date'],
+        'description': article.get('description', '')
+    }
+
+
 def scrape_article_content_authenticated(article, scraper):
-    """Scrape article content with authentication support."""
+    """Scrape article content with authentication support.
+    
+    Stored content is reused when it is full text the site has not edited
+    since, or when there is no logged-in session that could do better.
+    """
+    logged_in = bool(scraper and scraper.logged_in)
+    modified_gmt = scraper.article_modified(article['url']) if logged_in else None
+    
+    store = get_article_store()
+    stored = store.get(article['url']) if store is not None else None
+    if stored and modified_gmt and modified_gmt > stored.get('modified_gmt', ''):
+        logger.info(f"✏️ Article edited on the site since it was stored, refetching: {article['title']}")
+    elif stored and (stored['content_quality'] == 'authenticated' or not logged_in):
+        return stored_article_data(article, stored)
+    
     logger.info(f"🔍 Scraping article: {article['title']}")
     
     # Start with RSS description
@@ -316,7 +959,7 @@ def scrape_article_content_authenticated(article, scraper):
     content_quality = 'rss'
     
     # Try to get full content if authenticated
-    if scraper and scraper.logged_in:
+    if logged_in:
         try:
             full_content = scraper.get_full_article_content(article['url'])
             if full_content and len(full_content) > len(content):
@@ -326,6 +969,10 @@ def scrape_article_content_authenticated(article, scraper):
         except Exception as e:
             logger.warning(f"⚠️ Failed to get authenticated content: {e}")
     
+    # A failed refetch keeps the older full text rather than the RSS teaser
+    if stored and QUALITY_RANK.get(content_quality, 0) < QUALITY_RANK.get(stored['content_quality'], 0):
+        return stored_article_data(article, stored)
+    
     # Clean and prepare content
     clean_content = minimal_clean(content)
     
@@ -336,10 +983,13 @@ def scrape_article_content_authenticated(article, scraper):
         'content': clean_content,
         'content_quality': content_quality,
         'pub_date': article.get('pub_date', ''),
-        'description': article.get('description', '')
+        'description': article.get('description', ''),
+        'modified_gmt': modified_gmt or ''
     }
     
     logger.info(f"📄 Article content prepared: {len(clean_content)} characters")
+    if store is not None:
+        store.put(article_data)
     return article_data
 
 
@@ -370,102 +1020,206 @@ def minimal_clean(content):
     return content.strip()
 
 
-def generate_enhanced_analysis(article):
+def generate_enhanced_analysis(article, transport=None):
     """Generate enhanced AI analysis of the article."""
     logger.info("🤖 Generating enhanced AI analysis...")
     
-    openai_api_key = os.environ.get('OPENAI_API_KEY')
-    if not openai_api_key:
+    if not len(get_openai_pool()):
         logger.error("❌ OpenAI API key not found")
         return create_fallback_analysis(article)
     
-    # Prepare content for analysis
-    content_for_analysis = f"""
-Заголовок: {article['title']}
-Контент: {article['content'][:8000]}
-URL: {article['url']}
-"""
+    tier = choose_analysis_tier(article)
+    if tier == 'skip':
+        analysis = create_fallback_analysis(article)
+        analysis['analysis_tier'] = 'skip'
+        return analysis
+    if tier == 'summary':
+        return generate_summary_analysis(article, transport)
+    
+    analysis_data = request_openai_analysis(
+        FULL_ANALYSIS_INSTRUCTIONS, format_article_for_prompt(article, 8000), 2000, transport
+    )
+    if analysis_data is None:
+        return create_fallback_analysis(article)
     
-    # Enhanced prompt for comprehensive analysis
-    prompt = f"""Проанализируй эту статью с FastFounder и создай подробный обзор в формате:
+    # Validate the response
+    if validate_enhanced_analysis(analysis_data, article):
+        logger.info("✅ Enhanced AI analysis generated successfully")
+        analysis_data['analysis_source'] = 'openai'
+        analysis_data['analysis_tier'] = 'full'
+        return analysis_data
+    
+    logger.warning("⚠️ AI analysis validation failed, using fallback")
+    return create_fallback_analysis(article)
 
-в этом обзоре ты узнаешь об [краткое описание темы], и вот наша оценка данного поста + добавь идеи как я могу использовать это каждый день
 
-Также предоставь детальную оценку по следующим критериям (каждый от 1 до 10):
-- Практичность (насколько применимо на практике)
-- Новизна (насколько новая/свежая информация)
-- Глубина (насколько глубоко раскрыта тема)
-- Актуальность (насколько актуально сейчас)
+def choose_analysis_tier(article):
+    """Decide between 'full', 'summary' and 'skip' from the local pre-score."""
+    try:
+        prescore = get_local_analyzer().prescore(article)
+    except Exception as e:
+        logger.error(f"❌ Pre-scoring failed, using full analysis: {e}")
+        return 'full'
+    
+    # Pre-scores of teasers and full texts are on different scales
+    if article.get('content_quality') == 'authenticated' or ANALYSIS_FULL_SCORE <= 0:
+        full_score, summary_score = ANALYSIS_FULL_SCORE, ANALYSIS_SUMMARY_SCORE
+    else:
+        full_score, summary_score = ANALYSIS_FULL_SCORE_RSS, ANALYSIS_SUMMARY_SCORE_RSS
+    
+    score = prescore['score']
+    if score >= full_score:
+        tier = 'full'
+    elif score >= summary_score:
+        tier = 'summary'
+    else:
+        tier = 'skip'
+    
+    logger.info(f"🚦 Analysis gate: {tier} for '{article['title']}' (score {score}; {prescore['reasons']})")
+    return tier
 
-Определи:
-- Категорию (стратегия, маркетинг, продажи, финансы, технологии, личная эффективность, аналитика)
-- Целевую аудиторию (новички, опытные, маркетологи, IT, фрилансеры, инвесторы, студенты)
-- Время изучения (быстрое 5-10мин, среднее 15-30мин, долгое 1+ час)
-- Сложность (простой, средний, сложный)
-- ROI потенциал (высокий, средний, низкий)
-- Стадию бизнеса (идея, запуск, рост, масштабирование)
-- Время до результата (неделя, месяц, квартал, год)
 
-Создай 3-5 конкретных действий для применения
-Укажи 2-3 основных риска
-Дай общую оценку от 1 до 10 с объяснением
+def generate_summary_analysis(article, transport=None):
+    """Short AI call for mid-value articles; the rest comes from the local analysis."""
+    logger.info("🤖 Generating short AI summary...")
+    
+    data = request_openai_analysis(
+        SUMMARY_ANALYSIS_INSTRUCTIONS, format_article_for_prompt(article, 3000), 400, transport
+    )
+    if not isinstance(data, dict) or not data.get('summary') \
+            or not isinstance(data.get('overall_score'), (int, float)) or not (1 <= data['overall_score'] <= 10):
+        logger.warning("⚠️ AI summary missing or invalid, using fallback")
+        return create_fallback_analysis(article)
+    
+    try:
+        analysis = get_local_analyzer().analyze(article)
+    except Exception as e:
+        logger.error(f"❌ Local analysis failed: {e}")
+        analysis = create_fallback_analysis(article)
+    
+    analysis.update({
+        'summary': data['summary'],
+        'overall_score': data['overall_score'],
+        'score_reason': data.get('score_reason') or analysis['score_reason'],
+        'analysis_source': 'openai_summary',
+        'analysis_tier': 'summary'
+    })
+    logger.info("✅ Short AI summary generated successfully")
+    return analysis
 
-Статья:
-{content_for_analysis}
 
-Ответь в формате JSON:
-{{
-    "summary": "в этом обзоре ты узнаешь об...",
-    "overall_score": число от 1 до 10,
-    "scores": {{
-        "practicality": число,
-        "novelty": число,
-        "depth": число,
-        "relevance": число
-    }},
-    "category": "категория",
-    "target_audience": ["аудитория1", "аудитория2"],
-    "reading_time": "время",
-    "complexity_level": "уровень",
-    "roi_potential": "потенциал",
-    "business_stage": "стадия",
-    "result_timeframe": "время",
-    "action_checklist": ["действие1", "действие2", "действие3"],
-    "main_risks": ["риск1", "риск2"],
-    "score_reason": "объяснение оценки"
-}}"""
+def format_article_for_prompt(article, max_chars):
+    """Article-specific suffix of an analysis prompt."""
+    return f"""Статья:
+Заголовок: {article['title']}
+Контент: {article['content'][:max_chars]}
+URL: {article['url']}"""
+
+
+def get_openai_pool():
+    """OpenAI keys configured for this process (rebuilt if the environment changes)."""
+    global _openai_pool
+    entries = load_api_keys()
+    if _openai_pool is None or _openai_pool.entries != entries:
+        _openai_pool = OpenAIKeyPool(entries)
+    return _openai_pool
+
+
+def record_openai_usage(usage, key_label=''):
+    """Add one response's token usage to the run ledger and log it."""
+    prompt_tokens, _, completion_tokens, cost = openai_ledger.record(key_label, usage)
+    logger.info(f"🧾 OpenAI tokens{f' ({key_label})' if key_label else ''}: {prompt_tokens} prompt, "
+                f"{completion_tokens} completion, ${cost:.4f}")
+
+
+def log_openai_usage():
+    """Log token and cost totals for the run."""
+    totals = openai_ledger.totals
+    if not totals['requests']:
+        return
+    budget = f" of ${openai_ledger.budget:.2f} budget" if openai_ledger.budget else ""
+    logger.info(
+        f"🧾 OpenAI usage: {totals['requests']} requests, {totals['prompt_tokens']} prompt tokens, "
+        f"{totals['completion_tokens']} completion tokens, "
+        f"${totals['cost_usd']:.4f}{budget}"
+    )
+    if len(openai_ledger.by_key) > 1:
+        for label, key_totals in sorted(openai_ledger.by_key.items()):
+            logger.info(f"🔑 {label}: {key_totals['requests']} requests, ${key_totals['cost_usd']:.4f}")
+
+
+def post_openai_request(data, transport):
+    """POST a chat completion through the key pool; returns the decoded JSON response.
     
-    try:
-        # Prepare OpenAI API request
-        url = "https://api.openai.com/v1/chat/completions"
+    A 429 benches that key and the request is retried on the next best
+    key; every key is tried at most once.
+    """
+    pool = get_openai_pool()
+    url = transport.endpoints.openai_chat_completions
+    tokens = estimate_tokens(''.join(message['content'] for message in data['messages'])) + data['max_tokens']
+    
+    for _ in range(len(pool)):
+        api_key = pool.acquire(tokens)
+        if api_key is None:
+            raise TransportError("no OpenAI key with free rate limit")
         
-        headers = {
-            'Authorization': f'Bearer {openai_api_key}',
-            'Content-Type': 'application/json'
-        }
+        response = None
+        try:
+            response = transport.post_json(url, data, headers=api_key.headers())
+        finally:
+            pool.release(api_key, response)
+        
+        if response.status == 429:
+            try:
+                error = response.json().get('error') or {}
+            except ValueError:
+                error = {}
+            if error.get('code') == 'insufficient_quota':
+                pool.disable(api_key, 'insufficient quota')
+            continue
         
+        response.raise_for_status()
+        result = response.json()
+        if result.get('usage'):
+            record_openai_usage(result['usage'], api_key.label if len(pool) > 1 else '')
+        return result
+    
+    raise TransportError("every OpenAI key is rate limited")
+
+
+def request_openai_analysis(instructions, article_text, max_tokens, transport=None):
+    """Send an analysis prompt to OpenAI; returns the parsed JSON dict or None.
+    
+    The system message carries the instructions and JSON schema; the
+    article text goes in the user message. Requests that could push the
+    run over OPENAI_RUN_BUDGET_USD are not sent.
+    """
+    transport = transport or get_default_transport()
+    
+    # Worst case: every completion token used
+    reservation = openai_ledger.cost(estimate_tokens(instructions + article_text), 0, max_tokens)
+    if not openai_ledger.reserve(reservation):
+        logger.warning(f"💸 OpenAI budget of ${openai_ledger.budget:.2f} reached, skipping AI analysis")
+        return None
+    
+    try:
         data = {
             "model": "gpt-4o-mini",
             "messages": [
                 {
                     "role": "system",
-                    "content": "Ты эксперт по анализу бизнес-контента. Отвечай только в формате JSON без дополнительного текста."
+                    "content": instructions
                 },
                 {
                     "role": "user",
-                    "content": prompt
+                    "content": article_text
                 }
             ],
-            "max_tokens": 2000,
+            "max_tokens": max_tokens,
             "temperature": 0.7
         }
         
-        json_data = json.dumps(data).encode('utf-8')
-        
-        req = urllib.request.Request(url, data=json_data, headers=headers)
-        
-        with urllib.request.urlopen(req) as response:
-            result = json.loads(response.read().decode('utf-8'))
+        result = post_openai_request(data, transport)
         
         if 'choices' in result and len(result['choices']) > 0:
             content = result['choices'][0]['message']['content'].strip()
@@ -478,27 +1232,25 @@ URL: {article['url']}
                 if content.endswith('```'):
                     content = content[:-3]
                 
-                analysis_data = json.loads(content)
-                
-                # Validate the response
-                if validate_enhanced_analysis(analysis_data, article):
-                    logger.info("✅ Enhanced AI analysis generated successfully")
-                    return analysis_data
-                else:
-                    logger.warning("⚠️ AI analysis validation failed, using fallback")
-                    return create_fallback_analysis(article)
+                data = json.loads(content)
+                if not isinstance(data, dict):
+                    logger.error(f"❌ AI response is JSON but not an object: {content[:200]}")
+                    return None
+                return data
                     
             except json.JSONDecodeError as e:
                 logger.error(f"❌ Failed to parse AI response as JSON: {e}")
                 logger.error(f"Raw response: {content}")
-                return create_fallback_analysis(article)
+                return None
         else:
             logger.error("❌ No valid response from OpenAI")
-            return create_fallback_analysis(article)
+            return None
             
     except Exception as e:
         logger.error(f"❌ Error calling OpenAI API: {e}")
-        return create_fallback_analysis(article)
+        return None
+    finally:
+        openai_ledger.release(reservation)
 
 
 def validate_enhanced_analysis(data, article):
@@ -526,10 +1278,29 @@ def validate_enhanced_analysis(data, article):
     return True
 
 
+def get_local_analyzer():
+    """Local analyzer trained on cached AI analyses (built once per process)."""
+    global _local_analyzer
+    if _local_analyzer is None:
+        _local_analyzer = LocalAnalyzer.from_cache(AnalysisCache())
+    return _local_analyzer
+
+
 def create_fallback_analysis(article):
-    """Create a fallback analysis when AI fails."""
+    """Create a fallback analysis when AI fails.
+    
+    Uses the local heuristic analyzer (no network, a few milliseconds);
+    the canned analysis is only a last resort if that fails too.
+    """
     logger.info("🔄 Creating fallback analysis...")
     
+    try:
+        analysis = get_local_analyzer().analyze(article)
+        analysis['analysis_source'] = 'fallback'
+        return analysis
+    except Exception as e:
+        logger.error(f"❌ Local analysis failed: {e}")
+    
     return {
         "title": article['title'],
         "summary": f"в этом обзоре ты узнаешь об интересной теме из мира бизнеса и стартапов, и вот наша оценка данного поста + рекомендуем изучить материал для расширения кругозора",
@@ -556,7 +1327,8 @@ def create_fallback_analysis(article):
             "Информация может быть неполной",
             "Требуется дополнительная проверка"
         ],
-        "score_reason": "Автоматическая оценка. Рекомендуем изучить материал самостоятельно."
+        "score_reason": "Автоматическая оценка. Рекомендуем изучить материал самостоятельно.",
+        "analysis_source": "fallback"
     }
 
 
@@ -610,25 +1382,8 @@ def get_roi_emoji(roi):
         return '🪙'
 
 
-def broadcast_telegram_message(article, analysis, user_manager):
-    """Broadcast enhanced message to all subscribed users."""
-    logger.info("📱 Broadcasting enhanced Telegram message to all users...")
-    
-    telegram_token = os.environ.get('TELEGRAM_TOKEN')
-    
-    if not telegram_token:
-        logger.error("❌ Telegram token not found")
-        return False
-    
-    # Get all active users
-    active_users = user_manager.get_active_users()
-    
-    if not active_users:
-        logger.warning("⚠️ No active users found")
-        return False
-    
-    logger.info(f"📊 Broadcasting to {len(active_users)} users")
-    
+def render_digest_message(article, analysis):
+    """Render the HTML digest message for an analyzed article."""
     # Get current date
     current_date = datetime.now().strftime("%d.%m.%Y")
     
@@ -661,7 +1416,7 @@ def broadcast_telegram_message(article, analysis, user_manager):
         content_indicator = "📄 RSS контент"
     
     # Create the message
-    message = f"""🌅 <b>FastFounder Daily • {current_date}</b>
+    return f"""🌅 <b>FastFounder Daily • {current_date}</b>
 
 {score_emoji} <b>{analysis['overall_score']}/10</b> • {analysis['title']}
 
@@ -690,47 +1445,379 @@ def broadcast_telegram_message(article, analysis, user_manager):
 
 <i>{content_indicator}</i>
 <i>🤖 Автоматически сгенерировано FastFounder Bot</i>"""
+
+
+def post_digest(telegram_token, chat_id, message, transport=None):
+    """Post the full digest to a single chat or channel; returns its message_id."""
+    data = {
+        'chat_id': chat_id,
+        'text': message,
+        'parse_mode': 'HTML',
+        'disable_web_page_preview': False
+    }
     
-    # Send to all users
-    successful_sends = 0
-    failed_sends = 0
+    result = telegram_api_request(telegram_token, 'sendMessage', data, transport)
+    if not result.get('ok'):
+        logger.error(f"❌ Failed to post digest to {chat_id}: {result}")
+        return None
     
-    for chat_id in active_users:
-        try:
-            url = f"https://api.telegram.org/bot{telegram_token}/sendMessage"
-            
-            data = {
-                'chat_id': chat_id,
-                'text': message,
-                'parse_mode': 'HTML',
-                'disable_web_page_preview': False
-            }
+    return result['result']['message_id']
+
+
+def stage_digest(telegram_token, message, transport=None):
+    """Post the digest once to the staging chat for copy/forward delivery.
+    
+    Returns the staged message reference, or None if subscribers should
+    get full sendMessage calls instead.
+    """
+    if BROADCAST_MODE not in ('copy', 'forward'):
+        return None
+    
+    if not TELEGRAM_STAGING_CHAT_ID:
+        logger.warning(f"⚠️ BROADCAST_MODE={BROADCAST_MODE} needs TELEGRAM_STAGING_CHAT_ID, using direct sends")
+        return None
+    
+    message_id = post_digest(telegram_token, TELEGRAM_STAGING_CHAT_ID, message, transport)
+    if message_id is None:
+        logger.warning("⚠️ Staging failed, using direct sends")
+        return None
+    
+    logger.info(f"📌 Digest staged in {TELEGRAM_STAGING_CHAT_ID} (message {message_id}), delivering via {BROADCAST_MODE}")
+    return {
+        'method': 'copyMessage' if BROADCAST_MODE == 'copy' else 'forwardMessage',
+        'from_chat_id': TELEGRAM_STAGING_CHAT_ID,
+        'message_id': message_id
+    }
+
+
+def publish_to_channel(telegram_token, message, transport=None):
+    """Post the digest to the public channel (BROADCAST_MODE=channel)."""
+    if not TELEGRAM_CHANNEL_ID:
+        logger.error("❌ BROADCAST_MODE=channel needs TELEGRAM_CHANNEL_ID")
+        return False
+    
+    message_id = post_digest(telegram_token, TELEGRAM_CHANNEL_ID, message, transport)
+    if message_id is None:
+        return False
+    
+    logger.info(f"📢 Digest published to channel {TELEGRAM_CHANNEL_ID} (message {message_id})")
+    return True
+
+
+def send_digest_to_chat(telegram_token, chat_id, message, transport=None, staged=None):
+    """Send the digest to one chat and return the Bot API result.
+    
+    With a staged message only a small copyMessage/forwardMessage request
+    is sent instead of the full HTML text.
+    """
+    if staged:
+        method = staged['method']
+        data = {
+            'chat_id': chat_id,
+            'from_chat_id': staged['from_chat_id'],
+            'message_id': staged['message_id']
+        }
+    else:
+        method = 'sendMessage'
+        data = {
+            'chat_id': chat_id,
+            'text': message,
+            'parse_mode': 'HTML',
+            'disable_web_page_preview': False
+        }
+    
+    limiter = rate_limiter_for(telegram_token)
+    limiter.acquire()
+    result = telegram_api_request(telegram_token, method, data, transport)
+    if result.get('ok'):
+        limiter.record_success()
+    return result
+
+
+def send_digest_safely(telegram_token, chat_id, message, transport=None, staged=None):
+    """send_digest_to_chat, with exceptions turned into a failed result."""
+    try:
+        return send_digest_to_chat(telegram_token, chat_id, message, transport, staged)
+    except Exception as e:
+        logger.error(f"❌ Error sending to {chat_id}: {e}")
+        return failed_send_result(e)
+
+
+def send_through_pool(recipients, user_manager, message, transport=None, staged=None):
+    """Send to every recipient through its own bot; yields (chat_id, result).
+    
+    With several bots each one gets a sender thread fed by a bounded queue,
+    so sends proceed at every bot's rate in parallel. Results are yielded
+    on the caller's thread, so user stats are never updated concurrently.
+    Chats of bots missing from the pool are skipped.
+    """
+    pool = get_bot_pool()
+    if len(pool) == 1:
+        for chat_id in recipients:
+            yield chat_id, send_digest_safely(pool.primary, chat_id, message, transport, staged)
+        return
+    
+    results = queue.Queue()
+    pending = {token: queue.Queue(maxsize=BOT_POOL_QUEUE_SIZE) for token in pool.tokens}
+    
+    def sender(telegram_token, chats):
+        for chat_id in iter(chats.get, None):
+            results.put((chat_id, send_digest_safely(telegram_token, chat_id, message, transport, staged)))
+    
+    threads = [threading.Thread(target=sender, args=item, daemon=True) for item in pending.items()]
+    for thread in threads:
+        thread.start()
+    
+    skipped = 0
+    for chat_id in recipients:
+        telegram_token = pool.token_for(user_manager.get_bot(chat_id))
+        if telegram_token is None:
+            skipped += 1
+            continue
+        pending[telegram_token].put(chat_id)
+        # Hand back finished sends while the senders keep going
+        while not results.empty():
+            yield results.get()
+    
+    for chats in pending.values():
+        chats.put(None)
+    for thread in threads:
+        thread.join()
+    while not results.empty():
+        yield results.get()
+    
+    if skipped:
+        logger.warning(f"⚠️ Skipped {skipped} chats of bots missing from TELEGRAM_TOKENS")
+
+
+def failed_send_result(error):
+    """Describe a send that raised (network error etc.) like a Bot API failure."""
+    return {'ok': False, 'description': f"{type(error).__name__}: {error}"}
+
+
+def record_delivery_result(user_manager, chat_id, result, dead_letters=None, digest=None):
+    """Update user stats for one send result; returns True if delivered.
+    
+    With a dead-letter queue, retryable failures are queued for
+    redelivery and chats that keep failing are pruned.
+    """
+    if result.get('ok'):
+        user_manager.increment_message_count(chat_id)
+        if dead_letters is not None:
+            dead_letters.resolve(chat_id)
+        logger.info(f"✅ Message sent to {chat_id}")
+        return True
+    
+    logger.error(f"❌ Failed to send to {chat_id}: {result}")
+    
+    # If user blocked the bot, deactivate them
+    if result.get('error_code') == 403:
+        user_manager.remove_user(chat_id)
+        if dead_letters is not None:
+            dead_letters.discard(chat_id)
+        logger.info(f"🚫 User {chat_id} blocked bot, deactivated")
+    elif dead_letters is not None and digest:
+        entry = dead_letters.add(chat_id, digest, result)
+        if entry and dead_letters.should_prune(entry):
+            user_manager.remove_user(chat_id)
+            dead_letters.discard(chat_id)
+            logger.info(f"🪦 Chat {chat_id} failed {entry['attempts']} times ({entry['error_class']}), deactivated")
+        elif entry and dead_letters.exhausted(entry):
+            dead_letters.discard(chat_id)
+            logger.warning(f"⚠️ Giving up on redelivery to {chat_id} after {entry['attempts']} attempts")
+    
+    return False
+
+
+def redeliver_dead_letters(user_manager, dead_letters, transport=None, max_wait=0.0):
+    """Retry queued deliveries that are due; returns how many got through.
+    
+    Waits for backoff while the next retry is due within max_wait seconds,
+    so the end-of-broadcast pass can retry short outages in the same run.
+    """
+    if not get_bot_pool().tokens or not len(dead_letters):
+        return 0
+    
+    logger.info(f"📮 Redelivering from dead-letter queue ({len(dead_letters)} queued)")
+    deadline = time.monotonic() + max_wait
+    delivered = 0
+    
+    while True:
+        for entry in dead_letters.due():
+            chat_id = entry['chat_id']
+            user_info = user_manager.get_user_info(chat_id)
+            if not user_info or not user_info.get('active', True):
+                dead_letters.discard(chat_id)
+                continue
             
-            encoded_data = urllib.parse.urlencode(data).encode('utf-8')
+            telegram_token = token_for_chat(user_manager, chat_id)
+            if telegram_token is None:
+                continue
             
-            req = urllib.request.Request(url, data=encoded_data)
+            digest = dead_letters.digest(entry)
+            result = send_digest_safely(telegram_token, chat_id, digest['message'], transport, digest.get('staged'))
             
-            with urllib.request.urlopen(req) as response:
-                result = json.loads(response.read().decode('utf-8'))
-                
-                if result.get('ok'):
-                    successful_sends += 1
-                    user_manager.increment_message_count(chat_id)
-                    logger.info(f"✅ Message sent to {chat_id}")
-                else:
-                    failed_sends += 1
-                    logger.error(f"❌ Failed to send to {chat_id}: {result}")
-                    
-                    # If user blocked the bot, deactivate them
-                    if result.get('error_code') == 403:
-                        user_manager.remove_user(chat_id)
-                        logger.info(f"🚫 User {chat_id} blocked bot, deactivated")
-                        
-        except Exception as e:
+            if record_delivery_result(user_manager, chat_id, result, dead_letters, digest):
+                delivered += 1
+        
+        wait = dead_letters.next_due_in()
+        if wait is None or time.monotonic() + wait > deadline:
+            break
+        time.sleep(wait)
+    
+    dead_letters.save()
+    logger.info(f"📮 Redelivered {delivered} digests, {len(dead_letters)} still queued")
+    return delivered
+
+
+def broadcast_telegram_message(article, analysis, user_manager, transport=None, dead_letters=None):
+    """Broadcast enhanced message to all subscribed users.
+    
+    Failed sends go to dead_letters (if given) and are retried once the
+    broadcast finishes.
+    """
+    logger.info("📱 Broadcasting enhanced Telegram message to all users...")
+    
+    message = render_digest_message(article, analysis)
+    
+    # Stream active users interested in this article's category/audience
+    recipients = user_manager.iter_users_for_article(analysis.get('category'), analysis.get('target_audience'))
+    return broadcast_message(message, article.get('url', ''), recipients, user_manager, transport, dead_letters)
+
+
+def broadcast_message(message, digest_key, recipients, user_manager, transport=None, dead_letters=None):
+    """Send a rendered message to an iterable of chat_ids.
+    
+    digest_key identifies the message in the dead-letter queue, so a newer
+    digest replaces an older undelivered one.
+    """
+    telegram_token = get_bot_pool().primary
+    
+    if not telegram_token:
+        logger.error("❌ Telegram token not found")
+        return False
+    
+    if BROADCAST_MODE == 'channel':
+        return publish_to_channel(telegram_token, message, transport)
+    
+    successful_sends = send_to_recipients(message, digest_key, recipients, user_manager, transport, dead_letters)
+    successful_sends += finish_broadcast(user_manager, transport, dead_letters)
+    return successful_sends > 0
+
+
+def send_to_recipients(message, digest_key, recipients, user_manager, transport=None, dead_letters=None):
+    """Stage a message and send it to chat_ids; returns how many got it.
+    
+    Failures are only queued in dead_letters; finish_broadcast() retries
+    them once every message of the run has been sent.
+    """
+    telegram_token = get_bot_pool().primary
+    recipients = iter(recipients)
+    first_user = next(recipients, None)
+    
+    if first_user is None:
+        logger.warning("⚠️ No active users found")
+        return 0
+    
+    active_users = chain([first_user], recipients)
+    logger.info(f"📊 Broadcasting to interested users among {user_manager.get_user_count()} active")
+    
+    staged = stage_digest(telegram_token, message, transport)
+    digest = {'key': digest_key, 'message': message, 'staged': staged}
+    
+    # Send to all users
+    successful_sends = 0
+    failed_sends = 0
+    
+    for chat_id, result in send_through_pool(active_users, user_manager, message, transport, staged):
+        if record_delivery_result(user_manager, chat_id, result, dead_letters, digest):
+            successful_sends += 1
+        else:
             failed_sends += 1
-            logger.error(f"❌ Error sending to {chat_id}: {e}")
     
     logger.info(f"📊 Broadcast complete: {successful_sends} successful, {failed_sends} failed")
+    return successful_sends
+
+
+def finish_broadcast(user_manager, transport=None, dead_letters=None):
+    """Retry the run's failed sends and persist send rates and message counts; returns how many were redelivered."""
+    redelivered = 0
+    if dead_letters is not None:
+        redelivered = redeliver_dead_letters(user_manager, dead_letters, transport, DLQ_INLINE_WAIT)
+    
+    save_send_rates()
+    user_manager.flush()
+    return redelivered
+
+
+def select_candidates(articles, now=None):
+    """The newest RSS article plus recent ones, up to RECOMMEND_CANDIDATES."""
+    now = now or datetime.now(timezone.utc)
+    cutoff = (now - timedelta(hours=RECOMMEND_WINDOW_HOURS)).strftime('%Y-%m-%dT%H:%M:%S')
+    recent = [
+        article for article in articles[1:]
+        if article.get('pub_date') and parse_published_at(article['pub_date']) >= cutoff
+    ]
+    return articles[:1] + recent[:max(0, RECOMMEND_CANDIDATES - 1)]
+
+
+def load_feedback_profiles(index):
+    """Rated article vectors per user from the search index: chat_id -> [(vector, vote)]."""
+    if index is None:
+        return {}
+    return {
+        chat_id: [(article_vector(row['title'], row['category'] or '', summary=row['summary'] or ''), vote)
+                  for row, vote in rated]
+        for chat_id, rated in index.feedback_articles().items()
+    }
+
+
+def broadcast_recommendations(candidates, user_manager, transport=None, dead_letters=None):
+    """Send each user the candidate article that best matches their profile.
+    
+    candidates is a list of (article_data, analysis), newest first. With a
+    single candidate this is the plain broadcast.
+    """
+    index = get_search_index()
+    default_url = candidates[0][0].get('url', '')
+    
+    if len(candidates) == 1:
+        article_data, analysis = candidates[0]
+        success = broadcast_telegram_message(article_data, analysis, user_manager, transport, dead_letters)
+        if index is not None:
+            index.set_recommendations(default_url, [])
+        return success
+    
+    if BROADCAST_MODE == 'channel':
+        # A channel has one audience; post the newest article as before
+        article_data, analysis = candidates[0]
+        return broadcast_telegram_message(article_data, analysis, user_manager, transport, dead_letters)
+    
+    if not get_bot_pool().primary:
+        logger.error("❌ Telegram token not found")
+        return False
+    
+    recommender = Recommender(candidates)
+    feedback = load_feedback_profiles(index)
+    
+    def assignments():
+        return recommender.assign(user_manager.iter_active_interests(), feedback)
+    
+    # One streamed pass over the users per candidate, so no per-user list is
+    # built. Every candidate is sent before the one dead-letter pass, so a
+    # short outage is waited out once per run rather than once per article
+    successful_sends = 0
+    for position, (article_data, analysis) in enumerate(candidates):
+        logger.info(f"📰 Sending to users whose best pick is: {article_data.get('title', '')}")
+        message = render_digest_message(article_data, analysis)
+        chat_ids = (chat_id for chat_id, best in assignments() if best == position)
+        successful_sends += send_to_recipients(message, article_data.get('url', ''), chat_ids, user_manager, transport, dead_letters)
+    successful_sends += finish_broadcast(user_manager, transport, dead_letters)
+    
+    if index is not None:
+        index.set_recommendations(default_url, (
+            (chat_id, candidates[best][0].get('url', '')) for chat_id, best in assignments()
+        ))
     return successful_sends > 0
 
 
@@ -738,19 +1825,32 @@ def main():
     """Main function with user check."""
     logger.info("🚀 Starting FastFounder Daily Bot (Multi-User Daily Version)")
     
+    transport = get_default_transport()
+    user_manager = UserManager()
+    try:
+        send_daily_digest(user_manager, transport)
+    finally:
+        # Only users.json is kept between runs, so fold the journal into it
+        user_manager.compact()
+        prune_article_store()
+
+
+def send_daily_digest(user_manager, transport):
+    """Check for new users, then scrape, analyze and broadcast today's digest."""
     # Step 1: Check for new users first
-    check_for_new_users()
+    check_for_new_users(user_manager, transport)
     
-    # Step 2: Initialize user manager
-    user_manager = UserManager()
+    # Step 2: Retry yesterday's failed deliveries
+    dead_letters = DeadLetterQueue()
+    redeliver_dead_letters(user_manager, dead_letters, transport)
     
     # Check if we have any users
-    active_users = user_manager.get_active_users()
-    if not active_users:
+    active_count = user_manager.get_user_count()
+    if not active_count:
         logger.warning("⚠️ No active users found. Add users manually or wait for /start messages.")
         return
     
-    logger.info(f"📊 Broadcasting to {len(active_users)} active users")
+    logger.info(f"📊 Broadcasting to {active_count} active users")
     
     # Step 3: Initialize authenticated scraper
     scraper = None
@@ -759,7 +1859,7 @@ def main():
     
     if email and password:
         logger.info("🔐 Credentials found, initializing authenticated scraper...")
-        scraper = FastFounderAuthenticatedScraper()
+        scraper = FastFounderAuthenticatedScraper(transport)
         if scraper.login(email, password):
             logger.info("✅ Authentication successful - will use full content")
         else:
@@ -769,24 +1869,35 @@ def main():
         logger.warning("⚠️ No FastFounder credentials found - using fallback scraping")
     
     # Step 4: Get RSS feed
-    articles = get_rss_feed()
+    articles = get_rss_feed(transport)
     
     if not articles:
         logger.error("❌ No articles found in RSS feed")
         return
     
-    # Step 5: Process the latest article
-    article = articles[0]
-    logger.info(f"📰 Processing article: {article['title']}")
-    
-    # Step 6: Scrape article content (authenticated or fallback)
-    article_data = scrape_article_content_authenticated(article, scraper)
+    # Step 5-7: Scrape and analyze the latest articles (authenticated or fallback)
+    # Candidates that were already offered yesterday reuse their cached analysis
+    cache = AnalysisCache()
+    candidates = []
+    for article in select_candidates(articles):
+        analysis = cache.get(article['url'])
+        if analysis:
+            logger.info(f"♻️ Using cached analysis for: {article['title']}")
+            candidates.append((article, analysis))
+            continue
+        
+        logger.info(f"📰 Processing article: {article['title']}")
+        article_data = scrape_article_content_authenticated(article, scraper)
+        analysis = generate_enhanced_analysis(article_data, transport)
+        if analysis.get('analysis_source') != 'fallback':
+            cache.put(article_data, analysis)
+        index_analysis(article_data, analysis)
+        candidates.append((article_data, analysis))
     
-    # Step 7: Generate enhanced analysis
-    analysis = generate_enhanced_analysis(article_data)
+    log_openai_usage()
     
-    # Step 8: Broadcast to all users
-    success = broadcast_telegram_message(article_data, analysis, user_manager)
+    # Step 8: Send every user the article that suits them best
+    success = broadcast_recommendations(candidates, user_manager, transport, dead_letters)
     
     if success:
         logger.info("🎉 Daily digest broadcast successfully!")
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+OpenAI Key Pool for FastFounder Daily Bot
+Routes analysis requests over several API keys and keeps a token/cost
+ledger with an optional per-run budget.
+
+Every OpenAI response carries x-ratelimit-{limit,remaining,reset}-
+{requests,tokens} headers. The pool remembers them per key and sends each
+request to the key with the most RPM/TPM headroom, so parallel analysis
+keeps going while one key is near its limit. A 429 benches that key until
+its window resets.
+"""
+
+import logging
+import math
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M tokens (gpt-4o-mini list prices); cached prompt tokens are billed at the lower rate
+OPENAI_PRICE_INPUT = float(os.environ.get('OPENAI_PRICE_INPUT', '0.15'))
+OPENAI_PRICE_CACHED_INPUT = float(os.environ.get('OPENAI_PRICE_CACHED_INPUT', '0.075'))
+OPENAI_PRICE_OUTPUT = float(os.environ.get('OPENAI_PRICE_OUTPUT', '0.60'))
+
+# Spend cap for one run in USD; requests that could exceed it are not sent (0 = no cap)
+OPENAI_RUN_BUDGET_USD = float(os.environ.get('OPENAI_RUN_BUDGET_USD', '0'))
+
+# Longest a request waits for a key to get headroom back
+OPENAI_MAX_WAIT = float(os.environ.get('OPENAI_MAX_WAIT', '60'))
+
+RESET_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+RESET_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+
+def parse_reset(value):
+    """Seconds in an x-ratelimit-reset-* value such as '1s', '6m0s' or '20ms'."""
+    return sum(float(amount) * RESET_UNITS[unit] for amount, unit in RESET_PATTERN.findall(value or ''))
+
+
+def estimate_tokens(text):
+    """Rough prompt size; Russian text averages about 3 characters per token."""
+    return len(text) // 3 + 1
+
+
+def load_api_keys():
+    """OPENAI_API_KEY first, then OPENAI_API_KEYS (comma-separated, 'key' or 'key@org-id')."""
+    keys = []
+    for entry in [os.environ.get('OPENAI_API_KEY', '')] + os.environ.get('OPENAI_API_KEYS', '').split(','):
+        entry = entry.strip()
+        if entry and entry not in keys:
+            keys.append(entry)
+    return keys
+
+
+class ApiKey:
+    """One API key (optionally tied to an organization) and its last known limits."""
+
+    def __init__(self, entry):
+        self.key, _, self.organization = entry.partition('@')
+        self.label = f"…{self.key[-4:]}"
+        self.limit_requests = None
+        self.limit_tokens = None
+        self.remaining_requests = 0
+        self.remaining_tokens = 0
+        self.requests_reset_at = 0.0
+        self.tokens_reset_at = 0.0
+        self.blocked_until = 0.0
+        self.in_flight = 0
+
+    def headers(self):
+        headers = {'Authorization': f'Bearer {self.key}'}
+        if self.organization:
+            headers['OpenAI-Organization'] = self.organization
+        return headers
+
+    def headroom(self, now, tokens):
+        """Share of the RPM/TPM window left for a request of `tokens`; unknown limits count as free."""
+        if now < self.blocked_until:
+            return -1.0
+        shares = []
+        if self.limit_requests and now < self.requests_reset_at:
+            shares.append((self.remaining_requests - 1) / self.limit_requests)
+        if self.limit_tokens and now < self.tokens_reset_at:
+            shares.append((self.remaining_tokens - tokens) / self.limit_tokens)
+        return min(shares, default=1.0)
+
+    def free_at(self, now, tokens):
+        """When this key is expected to have room for a request of `tokens` again."""
+        at = max(now, self.blocked_until)
+        if self.limit_requests and self.remaining_requests < 1:
+            at = max(at, self.requests_reset_at)
+        if self.limit_tokens and self.remaining_tokens < tokens:
+            at = max(at, self.tokens_reset_at)
+        return at
+
+    def update(self, headers, now):
+        """Take the current limits from a response's x-ratelimit-* headers."""
+        for kind in ('requests', 'tokens'):
+            limit = headers.get(f'x-ratelimit-limit-{kind}')
+            remaining = headers.get(f'x-ratelimit-remaining-{kind}')
+            if limit is None or remaining is None:
+                continue
+            setattr(self, f'limit_{kind}', int(limit))
+            setattr(self, f'remaining_{kind}', int(remaining))
+            setattr(self, f'{kind}_reset_at', now + parse_reset(headers.get(f'x-ratelimit-reset-{kind}')))
+
+
+class TokenLedger:
+    """Running token and cost totals, overall and per key, with a budget cap."""
+
+    def __init__(self, budget=OPENAI_RUN_BUDGET_USD):
+        self.budget = budget
+        self.totals = self._empty()
+        self.by_key = {}
+        self.reserved = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _empty():
+        return {'requests': 0, 'prompt_tokens': 0, 'cached_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0}
+
+    @staticmethod
+    def cost(prompt_tokens, cached_tokens, completion_tokens):
+        """USD cost of one request."""
+        return ((prompt_tokens - cached_tokens) * OPENAI_PRICE_INPUT + cached_tokens * OPENAI_PRICE_CACHED_INPUT
+                + completion_tokens * OPENAI_PRICE_OUTPUT) / 1_000_000
+
+    def reserve(self, amount):
+        """Hold back the worst-case cost of a request; False if it would break the budget."""
+        with self._lock:
+            if self.budget and self.totals['cost_usd'] + self.reserved + amount > self.budget:
+                return False
+            self.reserved += amount
+            return True
+
+    def release(self, amount):
+        """Return a reservation once the request has finished (or failed)."""
+        with self._lock:
+            self.reserved = max(0.0, self.reserved - amount)
+
+    def record(self, label, usage):
+        """Add one response's usage; returns (prompt, cached, completion, cost)."""
+        prompt_tokens = usage.get('prompt_tokens', 0)
+        cached_tokens = (usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0)
+        completion_tokens = usage.get('completion_tokens', 0)
+        cost = self.cost(prompt_tokens, cached_tokens, completion_tokens)
+
+        with self._lock:
+            for totals in (self.totals, self.by_key.setdefault(label, self._empty())):
+                totals['requests'] += 1
+                totals['prompt_tokens'] += prompt_tokens
+                totals['cached_tokens'] += cached_tokens
+                totals['completion_tokens'] += completion_tokens
+                totals['cost_usd'] += cost
+        return prompt_tokens, cached_tokens, completion_tokens, cost
+
+
+class OpenAIKeyPool:
+    """Picks the API key with the most headroom for each request."""
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self.keys = [ApiKey(entry) for entry in self.entries]
+        self._lock = threading.Lock()
+        if len(self.keys) > 1:
+            logger.info(f"🔑 OpenAI key pool: {len(self.keys)} keys")
+
+    def acquire(self, tokens, max_wait=OPENAI_MAX_WAIT):
+        """Reserve the best key for a request of about `tokens`, waiting up to max_wait; None if none frees up."""
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                best = max(self.keys, key=lambda key: (key.headroom(now, tokens), -key.in_flight), default=None)
+                if best is not None and best.headroom(now, tokens) >= 0:
+                    best.in_flight += 1
+                    best.remaining_requests -= 1
+                    best.remaining_tokens -= tokens
+                    return best
+                wake = min((key.free_at(now, tokens) for key in self.keys), default=math.inf)
+
+            if wake > deadline:
+                logger.warning("⚠️ All OpenAI keys are at their rate limits")
+                return None
+            time.sleep(max(0.05, wake - time.monotonic()))
+
+    def release(self, key, response=None):
+        """Update a key from its response headers; a 429 benches the key until it resets."""
+        with self._lock:
+            key.in_flight -= 1
+            if response is None:
+                return
+            now = time.monotonic()
+            key.update(response.headers, now)
+            if response.status == 429:
+                retry_after = float(response.headers.get('retry-after') or 0)
+                key.blocked_until = now + max(retry_after, key.free_at(now, 1) - now, 1.0)
+                logger.warning(f"⏳ OpenAI key {key.label} rate limited for {key.blocked_until - now:.0f}s")
+
+    def disable(self, key, reason):
+        """Take a key out of rotation for the rest of the run (e.g. quota exhausted)."""
+        with self._lock:
+            key.blocked_until = math.inf
+        logger.error(f"❌ OpenAI key {key.label} disabled: {reason}")
+
+    def __len__(self):
+        return len(self.keys)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Rate Limiting for FastFounder Daily Bot
+Thread-safe token bucket used to pace Telegram sends, plus an adaptive
+variant that learns Telegram's effective limit from 429 responses.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` calls per second with bursts up to `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate or 0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call is allowed; returns the time spent waiting.
+
+        Tokens are reserved under the lock and may go negative, so
+        concurrent callers queue up fairly instead of racing each other.
+        A rate of 0 or None disables limiting.
+        """
+        if not self.rate:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def record_success(self):
+        """Hook called after a successful paced send (no-op here)."""
+
+    def record_throttle(self, retry_after):
+        """Hook called when Telegram answers 429 (no-op here)."""
+
+    def save(self):
+        """Persist learned state, if any (no-op here)."""
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """Token bucket whose rate is tuned by AIMD from observed 429s.
+
+    Each success adds roughly `increase` msgs/s per second of sending;
+    a 429 multiplies the rate by `decrease` and pauses every caller for
+    retry_after. The learned rate is saved to `state_file` so the next
+    run starts where this one left off.
+    """
+
+    def __init__(self, rate, min_rate=1.0, max_rate=30.0, increase=1.0, decrease=0.75,
+                 state_file=None):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.state_file = state_file
+        self._last_decrease = 0.0
+        self.throttle_count = 0
+
+        learned = self._load_rate()
+        rate = learned if learned else rate
+        super().__init__(min(max_rate, max(min_rate, rate)), burst=1.0)
+        if learned:
+            logger.info(f"📈 Starting at learned send rate {self.rate:.1f}/s")
+
+    def _load_rate(self):
+        """Read the rate learned by a previous run, or None."""
+        if not self.state_file or not os.path.exists(self.state_file):
+            return None
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return float(json.load(f)['rate'])
+        except Exception as e:
+            logger.error(f"❌ Error loading send rate state: {e}")
+            return None
+
+    def record_success(self):
+        """Additive increase: about +increase msgs/s for every second of successes."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def record_throttle(self, retry_after):
+        """Multiplicative decrease, at most once per retry_after window."""
+        retry_after = max(float(retry_after or 1), 0.0)
+        with self._lock:
+            now = time.monotonic()
+            # Concurrent sends see the same overload; only cut the rate once
+            if now - self._last_decrease >= retry_after:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._last_decrease = now
+                self.throttle_count += 1
+                logger.warning(f"📉 Telegram throttled sends, rate lowered to {self.rate:.1f}/s")
+
+            # Hold back every caller until retry_after has passed
+            self._tokens = min(self._tokens, -retry_after * self.rate)
+            self._updated = now
+
+    def save(self):
+        """Persist the learned rate for the next run."""
+        if not self.state_file:
+            return
+        try:
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'rate': round(self.rate, 3),
+                    'throttles': self.throttle_count,
+                    'updated_at': datetime.now().isoformat()
+                }, f, indent=2)
+            logger.info(f"💾 Send rate {self.rate:.1f}/s saved to {self.state_file}")
+        except Exception as e:
+            logger.error(f"❌ Error saving send rate state: {e}")
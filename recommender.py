@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Article Recommender for FastFounder Daily Bot
+Picks each user's best article among the day's candidates.
+
+Articles and user profiles are hashed sparse vectors (array-backed feature
+indices and weights). Candidate vectors are stored column-wise, so scoring
+one profile against every candidate is a single sparse-dense product, and
+users with identical profiles (same categories/audiences, no feedback) are
+scored once per run. Most subscribers share a handful of profiles, so
+100k users cost about as much as the number of distinct profiles.
+"""
+
+import logging
+import math
+import os
+import zlib
+from array import array
+
+from search_index import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Hashed feature space; collisions only blur rare words together
+FEATURE_DIMENSIONS = 1 << 18
+
+# Weight of the category/audience features relative to one text word
+CATEGORY_WEIGHT = 3.0
+AUDIENCE_WEIGHT = 2.0
+
+# How much the article's own overall_score (0-10) counts next to profile similarity
+RECOMMEND_SCORE_WEIGHT = float(os.environ.get('RECOMMEND_SCORE_WEIGHT', '0.3'))
+
+# Each /like or /dislike adds (or subtracts) the rated article's vector times this
+FEEDBACK_WEIGHT = float(os.environ.get('FEEDBACK_WEIGHT', '0.5'))
+
+
+def feature_index(feature):
+    """Stable hash of a feature name into the feature space."""
+    return zlib.crc32(feature.encode('utf-8')) & (FEATURE_DIMENSIONS - 1)
+
+
+def sparse_vector(weights, normalize=True):
+    """Turn a feature index -> weight dict into (indices, values) arrays."""
+    indices = array('I', sorted(weights))
+    values = array('d', (weights[index] for index in indices))
+    if normalize:
+        norm = math.sqrt(sum(value * value for value in values))
+        if norm:
+            values = array('d', (value / norm for value in values))
+    return indices, values
+
+
+def article_vector(title, category='', audiences=(), summary=''):
+    """Unit-length hashed TF vector of an article's title, summary and labels."""
+    weights = {}
+    for word in normalize_text(f"{title} {summary}").split():
+        index = feature_index(word)
+        weights[index] = weights.get(index, 0.0) + 1.0
+    if category:
+        index = feature_index(f"category:{str(category).lower()}")
+        weights[index] = weights.get(index, 0.0) + CATEGORY_WEIGHT
+    for audience in audiences or ():
+        index = feature_index(f"audience:{str(audience).lower()}")
+        weights[index] = weights.get(index, 0.0) + AUDIENCE_WEIGHT
+    return sparse_vector(weights)
+
+
+def profile_vector(categories=(), audiences=(), feedback=()):
+    """User interest vector from chosen categories/audiences and rated articles.
+
+    feedback is an iterable of (article vector, vote) with vote +1 or -1.
+    """
+    weights = {}
+    for category in categories:
+        index = feature_index(f"category:{category}")
+        weights[index] = weights.get(index, 0.0) + 1.0
+    for audience in audiences:
+        index = feature_index(f"audience:{audience}")
+        weights[index] = weights.get(index, 0.0) + 1.0
+    for (indices, values), vote in feedback:
+        for index, value in zip(indices, values):
+            weights[index] = weights.get(index, 0.0) + vote * FEEDBACK_WEIGHT * value
+    return sparse_vector({index: weight for index, weight in weights.items() if weight}, normalize=False)
+
+
+class Recommender:
+    """Scores user profiles against a fixed set of candidate articles."""
+
+    def __init__(self, candidates):
+        """candidates: list of (article_data, analysis), newest first."""
+        self.candidates = candidates
+        self.columns = {}  # feature index -> array of per-candidate weights
+        self.prior = array('d')
+        self.picks = {}  # (categories, audiences) -> best position, for users without feedback
+
+        for position, (article_data, analysis) in enumerate(candidates):
+            indices, values = article_vector(
+                article_data.get('title', ''), analysis.get('category', ''),
+                analysis.get('target_audience') or (), analysis.get('summary', '')
+            )
+            for index, value in zip(indices, values):
+                column = self.columns.get(index)
+                if column is None:
+                    column = self.columns[index] = array('d', bytes(8 * len(candidates)))
+                column[position] = value
+            # Slightly favor newer articles so equal scores keep the feed order
+            score = float(analysis.get('overall_score') or 0)
+            self.prior.append(RECOMMEND_SCORE_WEIGHT * score / 10 - 1e-6 * position)
+
+    def score(self, profile):
+        """Similarity of one profile to every candidate (sparse x column-major product)."""
+        scores = array('d', self.prior)
+        columns = self.columns
+        for index, weight in zip(*profile):
+            column = columns.get(index)
+            if column is not None:
+                for position, value in enumerate(column):
+                    scores[position] += weight * value
+        return scores
+
+    def eligible(self, categories, audiences):
+        """Candidate positions that pass a user's category/audience filter.
+
+        Mirrors UserManager.iter_users_for_article: an article without a
+        category or audiences passes that part of the filter.
+        """
+        positions = []
+        for position, (_, analysis) in enumerate(self.candidates):
+            category = str(analysis.get('category') or '').strip().lower()
+            article_audiences = {str(a).strip().lower() for a in analysis.get('target_audience') or ()}
+            if categories and category and category not in categories:
+                continue
+            if audiences and article_audiences and not article_audiences.intersection(audiences):
+                continue
+            positions.append(position)
+        return positions
+
+    def assign(self, users, feedback=None):
+        """Yield (chat_id, candidate position) with each user's best candidate.
+
+        users yields (chat_id, categories, audiences); feedback maps chat_id
+        to a list of (article vector, vote). Users with no eligible
+        candidate are left out. Nothing is collected per user, so callers
+        can stream the pairs; picks for shared profiles are kept on the
+        recommender, so a second pass over the users costs little.
+        """
+        feedback = feedback or {}
+        picks = self.picks
+        personal = 0
+
+        for chat_id, categories, audiences in users:
+            rated = feedback.get(chat_id)
+            key = (categories, audiences)
+            if not rated and key in picks:
+                best = picks[key]
+            else:
+                positions = self.eligible(categories, audiences)
+                best = None
+                if positions:
+                    scores = self.score(profile_vector(categories, audiences, rated or ()))
+                    best = max(positions, key=scores.__getitem__)
+                if rated:
+                    personal += 1
+                else:
+                    picks[key] = best
+            if best is not None:
+                yield chat_id, best
+
+        logger.info(f"🧭 Recommended {len(self.candidates)} candidates using "
+                    f"{len(picks)} shared and {personal} personal profiles")
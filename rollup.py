@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Roll-up Digests for FastFounder Daily Bot
+Weekly and monthly "best of" digests built only from stored analyses.
+
+Ranking and per-category top-k selection run as SQL over the compact
+analysis history in search_index.db, so a roll-up needs no scraping and
+no OpenAI calls; it is sent through the regular broadcast path.
+
+Usage:
+    python rollup.py weekly              # top of the last 7 days
+    python rollup.py monthly --top 10    # top of the last 30 days
+    python rollup.py weekly --dry-run    # print the message instead of sending
+"""
+
+import argparse
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from html import escape
+
+from dead_letter_queue import DeadLetterQueue
+from main_multiuser_daily import (
+    CATEGORIES,
+    broadcast_message,
+    check_for_new_users,
+    get_category_emoji,
+    get_score_emoji,
+    get_search_index,
+)
+from transport import get_default_transport
+from user_manager import UserManager
+
+logger = logging.getLogger(__name__)
+
+# Articles in the overall ranking
+ROLLUP_TOP_N = int(os.environ.get('ROLLUP_TOP_N', '5'))
+
+# Best articles listed per category below the overall ranking
+ROLLUP_PER_CATEGORY = int(os.environ.get('ROLLUP_PER_CATEGORY', '1'))
+
+PERIODS = {
+    'weekly': (timedelta(days=7), 'недели'),
+    'monthly': (timedelta(days=30), 'месяца'),
+}
+
+
+def build_rollup(index, period, now=None, top_n=ROLLUP_TOP_N, per_category=ROLLUP_PER_CATEGORY):
+    """Select the period's best articles overall and per category."""
+    now = now or datetime.now(timezone.utc)
+    length, _ = PERIODS[period]
+    start = (now - length).strftime('%Y-%m-%dT%H:%M:%S')
+    end = now.strftime('%Y-%m-%dT%H:%M:%S')
+
+    top = index.top_in_period(start, end, top_n)
+    listed = {row['url'] for row in top}
+
+    # Category picks skip articles already in the overall ranking
+    by_category = {}
+    if per_category:
+        candidates = index.top_per_category(start, end, per_category + top_n)
+        for category in sorted(candidates, key=lambda name: CATEGORIES.index(name) if name in CATEGORIES else len(CATEGORIES)):
+            picks = [row for row in candidates[category] if row['url'] not in listed][:per_category]
+            if picks:
+                by_category[category] = picks
+
+    return {
+        'period': period,
+        'start': start,
+        'end': end,
+        'top': top,
+        'by_category': by_category,
+    }
+
+
+def render_rollup_message(rollup):
+    """Render a roll-up as a Telegram HTML message."""
+    _, period_name = PERIODS[rollup['period']]
+    start = datetime.fromisoformat(rollup['start']).strftime('%d.%m')
+    end = datetime.fromisoformat(rollup['end']).strftime('%d.%m.%Y')
+
+    lines = [f"🏆 <b>FastFounder: лучшее {period_name} • {start}–{end}</b>", ""]
+    for position, row in enumerate(rollup['top'], 1):
+        score = row['overall_score'] or 0
+        lines.append(f"{position}. {get_score_emoji(score)} <b>{score:g}/10</b> • "
+                     f"<a href=\"{escape(row['url'])}\">{escape(row['title'])}</a>")
+        if row['summary']:
+            lines.append(f"   {escape(row['summary'])}")
+        lines.append("")
+
+    if rollup['by_category']:
+        lines.append("📂 <b>Лучшее по категориям:</b>")
+        for category, rows in rollup['by_category'].items():
+            for row in rows:
+                lines.append(f"{get_category_emoji(category)} {escape(category.title())}: "
+                             f"<a href=\"{escape(row['url'])}\">{escape(row['title'])}</a> ({(row['overall_score'] or 0):g}/10)")
+        lines.append("")
+
+    lines.append("<i>🤖 Автоматически сгенерировано FastFounder Bot</i>")
+    return "\n".join(lines)
+
+
+def main():
+    """Build and send one roll-up digest from the command line."""
+    parser = argparse.ArgumentParser(description='Weekly/monthly roll-up digests from stored analyses')
+    parser.add_argument('period', choices=sorted(PERIODS))
+    parser.add_argument('--top', type=int, default=ROLLUP_TOP_N, help='articles in the overall ranking')
+    parser.add_argument('--per-category', type=int, default=ROLLUP_PER_CATEGORY, help='extra picks per category')
+    parser.add_argument('--dry-run', action='store_true', help='print the message instead of sending it')
+    args = parser.parse_args()
+
+    index = get_search_index()
+    if index is None:
+        logger.error("❌ Search index is disabled (SEARCH_INDEX_FILE is empty)")
+        return
+
+    rollup = build_rollup(index, args.period, top_n=args.top, per_category=args.per_category)
+    if not rollup['top']:
+        logger.warning(f"⚠️ No analyzed articles for the {args.period} roll-up")
+        return
+
+    message = render_rollup_message(rollup)
+    if args.dry_run:
+        print(message)
+        return
+
+    # One roll-up per period window, even if the job is re-run
+    digest_key = f"rollup:{args.period}:{rollup['end'][:10]}"
+    if index.get_meta(f'last_rollup_{args.period}') == digest_key:
+        logger.info(f"😴 {args.period} roll-up already sent ({digest_key})")
+        return
+
+    transport = get_default_transport()
+    user_manager = UserManager()
+    try:
+        check_for_new_users(user_manager, transport=transport)
+        dead_letters = DeadLetterQueue()
+
+        logger.info(f"📰 Sending {args.period} roll-up: {len(rollup['top'])} articles")
+        if broadcast_message(message, digest_key, user_manager.iter_active_users(), user_manager, transport, dead_letters):
+            index.set_meta(f'last_rollup_{args.period}', digest_key)
+            logger.info(f"🎉 {args.period.capitalize()} roll-up broadcast successfully!")
+        else:
+            logger.error(f"❌ Failed to broadcast {args.period} roll-up")
+    finally:
+        # Only users.json is kept between runs, so fold the journal into it
+        user_manager.compact()
+
+
+if __name__ == "__main__":
+    main()
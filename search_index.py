@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Search Index for FastFounder Daily Bot
+SQLite FTS5 index over analyzed articles, so /search and /top are answered
+locally in milliseconds without scraping or OpenAI calls. The articles
+table doubles as the compact analysis history used by roll-up digests,
+and /like and /dislike votes for the recommender are kept alongside it.
+
+FTS5 ships no Russian stemmer, so text is normalized before indexing and
+querying: lower-cased, stopwords dropped and common Russian endings
+stripped, so "маркетинга", "маркетингу" and "маркетинг" match each other.
+
+Usage:
+    python search_index.py rebuild           # index analysis_cache.json + article store
+    python search_index.py search <query>    # try a query from the shell
+    python search_index.py top [category]
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from local_analyzer import STOPWORDS, WORD_PATTERN
+
+logger = logging.getLogger(__name__)
+
+# Longest first, so "ами" is stripped before "и"
+RUSSIAN_ENDINGS = sorted([
+    'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ией', 'ость', 'ости',
+    'ий', 'ый', 'ой', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ую', 'юю', 'ов', 'ев', 'ей', 'ам', 'ям',
+    'ах', 'ях', 'ом', 'ем', 'ию', 'ия', 'ть', 'ся',
+    'а', 'я', 'ы', 'и', 'у', 'ю', 'е', 'о', 'ь', 'й',
+], key=len, reverse=True)
+
+SEARCH_RESULTS_LIMIT = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE NOT NULL,
+    title TEXT NOT NULL,
+    pub_date TEXT,
+    category TEXT,
+    overall_score REAL,
+    summary TEXT,
+    indexed_at TEXT,
+    published_at TEXT,
+    practicality REAL,
+    novelty REAL,
+    depth REAL,
+    relevance REAL
+);
+CREATE INDEX IF NOT EXISTS articles_category_score ON articles (category, overall_score DESC);
+CREATE INDEX IF NOT EXISTS articles_score ON articles (overall_score DESC);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, body, tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS feedback (
+    chat_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    vote INTEGER NOT NULL,
+    voted_at TEXT,
+    PRIMARY KEY (chat_id, url)
+);
+CREATE TABLE IF NOT EXISTS recommendations (chat_id TEXT PRIMARY KEY, url TEXT NOT NULL);
+"""
+
+# Columns added after the first release; created on older databases at open
+HISTORY_COLUMNS = {
+    'published_at': 'TEXT',
+    'practicality': 'REAL',
+    'novelty': 'REAL',
+    'depth': 'REAL',
+    'relevance': 'REAL',
+}
+
+# Ranking used by roll-ups: overall score first, then the sum of the detail scores
+RANK_EXPRESSION = ("overall_score DESC, "
+                   "COALESCE(practicality, 0) + COALESCE(novelty, 0) + COALESCE(depth, 0) + COALESCE(relevance, 0) DESC")
+
+
+def normalize_word(word):
+    """Strip one Russian inflection ending, keeping at least 3 letters."""
+    for ending in RUSSIAN_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= 3:
+            return word[:-len(ending)]
+    return word
+
+
+def normalize_text(text):
+    """Lower-case, drop stopwords and strip endings; the form stored in FTS5."""
+    return ' '.join(
+        normalize_word(word) for word in WORD_PATTERN.findall(text.lower().replace('ё', 'е'))
+        if word not in STOPWORDS
+    )
+
+
+def parse_published_at(pub_date, default=None):
+    """Normalize an RSS (RFC 822) or WordPress (ISO) date to a sortable UTC string."""
+    parsed = None
+    if pub_date:
+        try:
+            parsed = parsedate_to_datetime(pub_date)
+        except (TypeError, ValueError):
+            try:
+                parsed = datetime.fromisoformat(pub_date)
+            except ValueError:
+                parsed = None
+    parsed = parsed or default or datetime.now(timezone.utc)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def build_match_query(query):
+    """Turn free text into an FTS5 MATCH expression (all terms, prefix match)."""
+    terms = normalize_text(query).split()
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+class SearchIndex:
+    """FTS5 index of articles with their category and overall score."""
+
+    def __init__(self, db_file='search_index.db'):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        existing = {row['name'] for row in self.conn.execute("PRAGMA table_info(articles)")}
+        with self.conn:
+            for column, column_type in HISTORY_COLUMNS.items():
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE articles ADD COLUMN {column} {column_type}")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS articles_published ON articles (published_at)")
+
+    def close(self):
+        self.conn.close()
+
+    def index_article(self, article_data, analysis):
+        """Add or replace one article and its analysis."""
+        url = article_data.get('url') or analysis.get('url')
+        if not url:
+            return False
+
+        title = article_data.get('title') or analysis.get('title', '')
+        body = ' '.join(str(part) for part in [
+            analysis.get('summary', ''),
+            analysis.get('score_reason', ''),
+            ' '.join(analysis.get('action_checklist') or []),
+            analysis.get('category', ''),
+            ' '.join(analysis.get('target_audience') or []),
+            article_data.get('content') or article_data.get('description') or '',
+        ])
+
+        try:
+            with self._lock, self.conn:
+                scores = analysis.get('scores') or {}
+                self.conn.execute("""
+                    INSERT INTO articles (url, title, pub_date, category, overall_score, summary, indexed_at,
+                                          published_at, practicality, novelty, depth, relevance)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE SET
+                        title = excluded.title, pub_date = excluded.pub_date, category = excluded.category,
+                        overall_score = excluded.overall_score, summary = excluded.summary,
+                        indexed_at = excluded.indexed_at, published_at = excluded.published_at,
+                        practicality = excluded.practicality, novelty = excluded.novelty,
+                        depth = excluded.depth, relevance = excluded.relevance
+                """, (
+                    url, title, article_data.get('pub_date', ''),
+                    str(analysis.get('category', '')).lower(), analysis.get('overall_score'),
+                    analysis.get('summary', ''), datetime.now().isoformat(),
+                    parse_published_at(article_data.get('pub_date', '')),
+                    scores.get('practicality'), scores.get('novelty'), scores.get('depth'), scores.get('relevance')
+                ))
+                row_id = self.conn.execute("SELECT id FROM articles WHERE url = ?", (url,)).fetchone()['id']
+                self.conn.execute("DELETE FROM articles_fts WHERE rowid = ?", (row_id,))
+                self.conn.execute(
+                    "INSERT INTO articles_fts (rowid, title, body) VALUES (?, ?, ?)",
+                    (row_id, normalize_text(title), normalize_text(body))
+                )
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error indexing article {url}: {e}")
+            return False
+
+    def search(self, query, limit=SEARCH_RESULTS_LIMIT):
+        """Best matches for free text; title hits weigh more than body hits."""
+        match = build_match_query(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT a.url, a.title, a.category, a.overall_score, a.pub_date
+                FROM articles_fts
+                JOIN articles a ON a.id = articles_fts.rowid
+                WHERE articles_fts MATCH ?
+                ORDER BY bm25(articles_fts, 5.0, 1.0), a.overall_score DESC
+                LIMIT ?
+            """, (match, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def top(self, category=None, limit=SEARCH_RESULTS_LIMIT):
+        """Highest-scored articles, optionally within one category."""
+        sql = "SELECT url, title, category, overall_score, pub_date FROM articles"
+        params = []
+        if category:
+            sql += " WHERE category = ?"
+            params.append(category)
+        sql += " ORDER BY overall_score DESC, indexed_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(sql, params).fetchall()]
+
+    def top_in_period(self, start, end, limit=SEARCH_RESULTS_LIMIT):
+        """Best articles published in [start, end], ranked in one SQL pass."""
+        with self._lock:
+            rows = self.conn.execute(f"""
+                SELECT url, title, category, overall_score, summary, published_at
+                FROM articles
+                WHERE published_at >= ? AND published_at <= ?
+                ORDER BY {RANK_EXPRESSION}
+                LIMIT ?
+            """, (start, end, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def top_per_category(self, start, end, per_category=1):
+        """Best articles of each category in [start, end], via a window function."""
+        with self._lock:
+            rows = self.conn.execute(f"""
+                SELECT url, title, category, overall_score, summary, published_at FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY category ORDER BY {RANK_EXPRESSION}) AS position
+                    FROM articles
+                    WHERE published_at >= ? AND published_at <= ? AND category != ''
+                )
+                WHERE position <= ?
+                ORDER BY category, position
+            """, (start, end, per_category)).fetchall()
+
+        by_category = {}
+        for row in rows:
+            by_category.setdefault(row['category'], []).append(dict(row))
+        return by_category
+
+    def record_feedback(self, votes):
+        """Store (chat_id, url, vote) ratings; a new vote replaces the old one."""
+        now = datetime.now().isoformat()
+        with self._lock, self.conn:
+            self.conn.executemany("""
+                INSERT INTO feedback (chat_id, url, vote, voted_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(chat_id, url) DO UPDATE SET vote = excluded.vote, voted_at = excluded.voted_at
+            """, [(str(chat_id), url, vote, now) for chat_id, url, vote in votes])
+
+    def feedback_articles(self):
+        """Rated articles per user: chat_id -> [(row, vote)]."""
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT f.chat_id, f.vote, a.title, a.category, a.summary
+                FROM feedback f JOIN articles a ON a.url = f.url
+            """).fetchall()
+        rated = {}
+        for row in rows:
+            rated.setdefault(row['chat_id'], []).append((dict(row), row['vote']))
+        return rated
+
+    def set_recommendations(self, default_url, assignments):
+        """Remember which article each user got, for /like and /dislike.
+
+        Only users who got something other than default_url are stored.
+        """
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM recommendations")
+            self.conn.executemany(
+                "INSERT INTO recommendations (chat_id, url) VALUES (?, ?)",
+                ((str(chat_id), url) for chat_id, url in assignments if url != default_url)
+            )
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('last_digest_url', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (default_url,)
+            )
+
+    def recommended_url(self, chat_id):
+        """Article most recently sent to a user, or None."""
+        with self._lock:
+            row = self.conn.execute("SELECT url FROM recommendations WHERE chat_id = ?", (str(chat_id),)).fetchone()
+        return row['url'] if row else self.get_meta('last_digest_url')
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, str(value))
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+
+def rebuild(index, cache, store=None):
+    """Index every cached analysis, with stored article text when available."""
+    count = 0
+    for url, entry in cache.entries.items():
+        stored = store.get(url) if store is not None else None
+        article_data = dict(stored or {'url': url, 'title': entry.get('title', '')})
+        # Roll-ups need a date; the cache time is the best guess without one
+        article_data['pub_date'] = entry.get('pub_date') or article_data.get('pub_date') or entry.get('cached_at', '')
+        count += index.index_article(article_data, entry['analysis'])
+    logger.info(f"✅ Indexed {count} articles into {index.db_file}")
+    return count
+
+
+def main():
+    """Rebuild or query the index from the command line."""
+    from analysis_cache import AnalysisCache
+    from article_store import ArticleStore
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='FTS5 search index over analyzed articles')
+    parser.add_argument('command', choices=['rebuild', 'search', 'top'])
+    parser.add_argument('query', nargs='*')
+    parser.add_argument('--db', default='search_index.db')
+    args = parser.parse_args()
+
+    index = SearchIndex(args.db)
+    if args.command == 'rebuild':
+        rebuild(index, AnalysisCache(), ArticleStore(os.environ.get('ARTICLE_STORE_DIR', 'article_store')))
+        return
+
+    results = index.search(' '.join(args.query)) if args.command == 'search' else index.top(' '.join(args.query) or None)
+    for row in results:
+        print(f"{row['overall_score']:>4} [{row['category']}] {row['title']} - {row['url']}")
+
+
+if __name__ == "__main__":
+    main()
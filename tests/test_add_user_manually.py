@@ -0,0 +1,17 @@
+from add_user_manually import validate_row
+
+
+def test_rows_with_unknown_interests_are_rejected():
+    assert validate_row({'chat_id': '1', 'categories': 'маркетинг,маркетниг'}) == (None, 'unknown category')
+    assert validate_row({'chat_id': '1', 'audiences': ['IT', 'devs']}) == (None, 'unknown audience')
+
+    user, reason = validate_row({'chat_id': '1', 'categories': ' Маркетинг , продажи', 'audiences': ['IT']})
+    assert reason is None
+    assert (user['categories'], user['audiences']) == (['маркетинг', 'продажи'], ['it'])
+
+
+def test_active_column_is_optional():
+    assert validate_row({'chat_id': '1'})[0]['active'] is None
+    assert validate_row({'chat_id': '1', 'active': 'False'})[0]['active'] is False
+    assert validate_row({'chat_id': '1', 'active': True})[0]['active'] is True
+    assert validate_row({'chat_id': '1', 'active': 'maybe'}) == (None, 'invalid active')
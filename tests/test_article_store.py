@@ -0,0 +1,63 @@
+import os
+
+from article_store import ArticleStore
+
+
+def article(url, content, quality='authenticated', **fields):
+    return dict(fields, url=url, title=url, content=content, content_quality=quality)
+
+
+def blob_count(root):
+    return sum(len(files) for _, _, files in os.walk(os.path.join(root, 'blobs')))
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = ArticleStore(str(tmp_path))
+    first = store.put(article('https://a', 'same text'))
+    second = store.put(article('https://b', 'same text'))
+
+    assert first == second
+    assert blob_count(str(tmp_path)) == 1
+    assert store.get('https://b')['content'] == 'same text'
+
+
+def test_lower_quality_never_replaces_better_text(tmp_path):
+    store = ArticleStore(str(tmp_path))
+    store.put(article('https://a', 'full text', 'authenticated'))
+    store.put(article('https://a', 'teaser', 'rss'))
+    assert store.get('https://a')['content'] == 'full text'
+
+    store.put(article('https://b', 'teaser', 'rss'))
+    store.put(article('https://b', 'full text', 'authenticated'))
+    assert store.get('https://b')['content_quality'] == 'authenticated'
+
+
+def test_newer_edit_replaces_equal_quality_text(tmp_path):
+    store = ArticleStore(str(tmp_path))
+    store.put(article('https://a', 'first', modified_gmt='2026-01-01T00:00:00'))
+    store.put(article('https://a', 'edited', modified_gmt='2026-02-01T00:00:00'))
+
+    reopened = ArticleStore(str(tmp_path))
+    assert reopened.get('https://a')['content'] == 'edited'
+    assert reopened.get('https://a')['modified_gmt'] == '2026-02-01T00:00:00'
+
+
+def test_prune_keeps_the_most_recently_fetched(tmp_path):
+    store = ArticleStore(str(tmp_path))
+    for day in range(1, 4):
+        store.put(article(f"https://{day}", f"text {day}"))
+    store.put(article('https://1', 'text 1 edited', modified_gmt='2026-02-01T00:00:00'))
+
+    assert store.prune(2) == 1
+    assert list(store.index) == ['https://3', 'https://1']
+    assert blob_count(str(tmp_path)) == 2
+    assert list(ArticleStore(str(tmp_path)).index) == ['https://3', 'https://1']
+
+
+def test_prune_keeps_blobs_other_urls_still_use(tmp_path):
+    store = ArticleStore(str(tmp_path))
+    store.put(article('https://old', 'shared'))
+    store.put(article('https://new', 'shared'))
+
+    assert store.prune(1) == 1
+    assert store.get('https://new')['content'] == 'shared'
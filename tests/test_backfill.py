@@ -0,0 +1,58 @@
+import json
+import os
+import urllib.parse
+
+import backfill
+import wordpress_api
+from transport import Endpoints, Response, Transport
+from wordpress_api import WordPressPostsSource
+
+
+class FakeSite(Transport):
+    """Answers WordPress slug lookups with one post each and records every URL."""
+
+    def __init__(self):
+        super().__init__(Endpoints(fastfounder_url='https://site.test'))
+        self.urls = []
+
+    def request(self, method, url, data=None, headers=None, timeout=None, follow_redirects=True):
+        self.urls.append(url)
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+        slug = query['slug'][0]
+        post = {'id': len(self.urls), 'link': f"https://site.test/{slug}/", 'slug': slug,
+                'title': {'rendered': slug}, 'modified_gmt': f"2026-01-{len(self.urls):02d}T00:00:00",
+                'content': {'rendered': f"<p>{slug} body</p>"}}
+        return Response(200, {'X-WP-TotalPages': '1'}, json.dumps([post]).encode('utf-8'), url)
+
+
+class CountingThrottle:
+    def __init__(self):
+        self.waits = []
+
+    def wait(self, url):
+        self.waits.append(url)
+
+
+def test_every_request_is_throttled():
+    site = FakeSite()
+    throttle = CountingThrottle()
+    transport = backfill.ThrottledTransport(site, throttle)
+
+    transport.get('https://site.test/wp-json/wp/v2/posts', params={'slug': 'a'})
+    transport.get('https://site.test/wp-json/wp/v2/posts', params={'slug': 'b'})
+    assert throttle.waits == site.urls
+
+
+def test_deferred_slug_lookups_are_saved_and_pruned_on_flush(tmp_path, monkeypatch):
+    monkeypatch.setattr(wordpress_api, 'WP_POSTS_KEEP', 2)
+    state_file = str(tmp_path / 'wp_posts.json')
+    source = WordPressPostsSource(FakeSite(), state_file)
+    source.defer_saves = True
+
+    for slug in ('a', 'b', 'c'):
+        assert source._fetch_by_slug(f"https://site.test/{slug}/")['content'] == f"{slug} body"
+    assert not os.path.exists(state_file)
+
+    source.flush()
+    with open(state_file, encoding='utf-8') as f:
+        assert sorted(json.load(f)['posts']) == ['/b', '/c']
@@ -0,0 +1,48 @@
+import json
+
+from dead_letter_queue import DeadLetterQueue
+
+DIGEST = {'key': 'https://a', 'message': '<b>digest</b>', 'staged': None}
+NETWORK_ERROR = {'ok': False, 'description': 'timeout'}
+
+
+def test_each_digest_is_stored_once(tmp_path):
+    queue_file = tmp_path / 'dead_letters.json'
+    queue = DeadLetterQueue(str(queue_file))
+    for chat_id in range(100):
+        queue.add(chat_id, DIGEST, NETWORK_ERROR)
+    queue.save()
+
+    data = json.loads(queue_file.read_text(encoding='utf-8'))
+    assert data['digests'] == {'https://a': DIGEST}
+    assert all('digest' not in entry for entry in data['entries'].values())
+
+    reloaded = DeadLetterQueue(str(queue_file))
+    assert len(reloaded) == 100
+    assert reloaded.digest(reloaded.entries['7']) == DIGEST
+
+
+def test_unreferenced_digests_are_dropped_on_save(tmp_path):
+    queue = DeadLetterQueue(str(tmp_path / 'dead_letters.json'))
+    queue.add(1, DIGEST, NETWORK_ERROR)
+    queue.add(1, dict(DIGEST, key='https://b'), NETWORK_ERROR)
+    queue.save()
+    assert list(queue.digests) == ['https://b']
+
+
+def test_blocked_chats_are_not_queued(tmp_path):
+    queue = DeadLetterQueue(str(tmp_path / 'dead_letters.json'))
+    assert queue.add(1, DIGEST, {'ok': False, 'error_code': 403}) is None
+    assert 1 not in queue
+
+
+def test_old_per_entry_digests_are_migrated(tmp_path):
+    queue_file = tmp_path / 'dead_letters.json'
+    queue_file.write_text(json.dumps({'5': {
+        'chat_id': '5', 'digest': DIGEST, 'attempts': 1, 'error_class': 'network',
+        'first_failed_at': '2026-01-01T00:00:00', 'next_attempt_at': '2026-01-01T00:00:30',
+    }}), encoding='utf-8')
+
+    queue = DeadLetterQueue(str(queue_file))
+    assert queue.entries['5']['digest_key'] == 'https://a'
+    assert queue.digest(queue.entries['5']) == DIGEST
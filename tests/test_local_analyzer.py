@@ -0,0 +1,54 @@
+from local_analyzer import (
+    ACTION_PATTERN, CATEGORY_PATTERNS, LocalAnalyzer, count_keywords, keyword_pattern,
+)
+
+
+def test_stems_match_at_word_starts_only():
+    pattern = keyword_pattern(['рост'])
+    assert count_keywords(pattern, 'рост и роста, но не просто и не перерост') == 2
+
+
+def test_short_stems_match_whole_words_only():
+    pattern = keyword_pattern(['ии', 'чек'])
+    assert count_keywords(pattern, 'ии в компании') == 1
+    assert count_keywords(pattern, 'средний чек у человека') == 1
+
+
+def test_multi_word_keywords():
+    pattern = keyword_pattern(['с нуля'])
+    assert count_keywords(pattern, 'бизнес с нуля') == 1
+
+
+def test_action_markers():
+    assert count_keywords(ACTION_PATTERN, 'попробуй три шага: как начать') == 3
+    assert count_keywords(ACTION_PATTERN, 'никак') == 0
+
+
+def test_keyword_scores_pick_the_topic():
+    scores = LocalAnalyzer._keyword_scores('выручка, прибыль и инвестиции в компании', CATEGORY_PATTERNS)
+    assert max(scores, key=scores.get) == 'финансы'
+    assert scores['технологии'] == 0
+
+
+def test_reading_time_buckets():
+    assert LocalAnalyzer.reading_time(1000) == 'быстрое 5-10мин'
+    assert LocalAnalyzer.reading_time(5000) == 'среднее 15-30мин'
+    assert LocalAnalyzer.reading_time(20000) == 'долгое 1+ час'
+
+
+def test_prescore_prefers_substantial_authenticated_text():
+    body = 'Как увеличить выручку и прибыль: посчитай юнит-экономику, проверь бюджет. ' * 40
+    full = LocalAnalyzer().prescore({'title': 'Финансы', 'content': body, 'content_quality': 'authenticated'})
+    promo = LocalAnalyzer().prescore({'title': 'Скидка', 'content': 'Успей! Промокод на скидку.', 'content_quality': 'rss'})
+    assert full['score'] > promo['score']
+    assert promo['score'] == 0
+
+
+def test_action_items_match_whole_markers():
+    content = ('Советский опыт управления заводами описан подробно. '
+               'Попробуй посчитать юнит-экономику до запуска рекламы. '
+               'Главный совет: начинать с одного канала продаж.')
+    items = LocalAnalyzer.action_items(content, 'финансы')
+    assert items[:2] == ['Попробуй посчитать юнит-экономику до запуска рекламы',
+                         'Главный совет: начинать с одного канала продаж.']
+    assert not any(item.startswith('Советский') for item in items)
@@ -0,0 +1,61 @@
+import time
+
+from openai_pool import OpenAIKeyPool, parse_reset
+
+
+class FakeResponse:
+    def __init__(self, status=200, headers=None):
+        self.status = status
+        self.headers = headers or {}
+
+
+def limits(remaining_requests, remaining_tokens, reset='1m'):
+    return {
+        'x-ratelimit-limit-requests': '100',
+        'x-ratelimit-remaining-requests': str(remaining_requests),
+        'x-ratelimit-reset-requests': reset,
+        'x-ratelimit-limit-tokens': '10000',
+        'x-ratelimit-remaining-tokens': str(remaining_tokens),
+        'x-ratelimit-reset-tokens': reset,
+    }
+
+
+def test_parse_reset():
+    assert parse_reset('6m0s') == 360
+    assert parse_reset('20ms') == 0.02
+    assert parse_reset('') == 0
+
+
+def test_requests_go_to_the_key_with_most_headroom():
+    pool = OpenAIKeyPool(['sk-first', 'sk-second'])
+    first, second = pool.keys
+    pool.release(pool.acquire(100), FakeResponse(headers=limits(90, 9000)))
+    pool.release(pool.acquire(100), FakeResponse(headers=limits(10, 1000)))
+
+    low = first if first.remaining_requests == 10 else second
+    high = second if low is first else first
+    assert pool.acquire(100) is high
+
+
+def test_a_429_benches_the_key():
+    pool = OpenAIKeyPool(['sk-first', 'sk-second'])
+    key = pool.acquire(100)
+    pool.release(key, FakeResponse(429, {'retry-after': '30'}))
+
+    assert key.blocked_until >= time.monotonic() + 29
+    other = pool.acquire(100)
+    assert other is not key
+    pool.release(other)
+    assert pool.acquire(100) is other
+
+
+def test_acquire_gives_up_when_every_key_is_benched():
+    pool = OpenAIKeyPool(['sk-only'])
+    pool.release(pool.acquire(100), FakeResponse(429, {'retry-after': '30'}))
+    assert pool.acquire(100, max_wait=0) is None
+
+
+def test_disabled_key_leaves_rotation():
+    pool = OpenAIKeyPool(['sk-first', 'sk-second'])
+    pool.disable(pool.keys[0], 'insufficient_quota')
+    assert all(pool.acquire(10) is pool.keys[1] for _ in range(3))
@@ -0,0 +1,53 @@
+from recommender import Recommender, article_vector
+
+
+def groups(recommender, users, feedback=None):
+    """Chat ids per candidate position."""
+    grouped = [[] for _ in recommender.candidates]
+    for chat_id, position in recommender.assign(users, feedback):
+        grouped[position].append(chat_id)
+    return grouped
+
+
+CANDIDATES = [
+    ({'title': 'Как считать юнит-экономику'}, {'category': 'финансы', 'target_audience': ['опытные'], 'overall_score': 7}),
+    ({'title': 'Реклама в соцсетях'}, {'category': 'маркетинг', 'target_audience': ['новички'], 'overall_score': 7}),
+]
+
+
+def test_users_get_their_category():
+    assigned = groups(Recommender(CANDIDATES), [
+        ('1', ('финансы',), ()),
+        ('2', ('маркетинг',), ()),
+        ('3', ('маркетинг',), ()),
+    ])
+    assert assigned == [['1'], ['2', '3']]
+
+
+def test_users_without_preferences_get_the_higher_scored_article():
+    candidates = [CANDIDATES[0], (CANDIDATES[1][0], dict(CANDIDATES[1][1], overall_score=9))]
+    assert groups(Recommender(candidates), [('1', (), ())]) == [[], ['1']]
+
+
+def test_ties_keep_the_newest_article():
+    assert groups(Recommender(CANDIDATES), [('1', (), ())]) == [['1'], []]
+
+
+def test_filtered_out_users_get_nothing():
+    assigned = groups(Recommender(CANDIDATES), [('1', ('технологии',), ())])
+    assert assigned == [[], []]
+
+
+def test_feedback_moves_a_user_to_similar_articles():
+    liked = article_vector('Реклама в соцсетях', 'маркетинг')
+    disliked = article_vector('Как считать юнит-экономику', 'финансы')
+    users = [('1', (), ()), ('2', (), ())]
+    assigned = groups(Recommender(CANDIDATES), users, {'2': [(liked, 1), (disliked, -1)]})
+    assert assigned == [['1'], ['2']]
+
+
+def test_assign_streams_pairs_and_reuses_shared_picks():
+    recommender = Recommender(CANDIDATES)
+    users = [('1', ('маркетинг',), ()), ('2', ('технологии',), ())]
+    assert list(recommender.assign(iter(users))) == [('1', 1)]
+    assert recommender.picks == {(('маркетинг',), ()): 1, (('технологии',), ()): None}
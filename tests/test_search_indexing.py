@@ -0,0 +1,13 @@
+import main_multiuser_daily as daily
+from search_index import SearchIndex
+
+
+def test_fallback_analyses_are_not_indexed(tmp_path, monkeypatch):
+    index = SearchIndex(str(tmp_path / 'search_index.db'))
+    monkeypatch.setattr(daily, 'get_search_index', lambda: index)
+    analysis = {'summary': 'юнит-экономика', 'overall_score': 8, 'category': 'финансы'}
+
+    daily.index_analysis({'url': 'https://ai', 'title': 'AI'}, dict(analysis, analysis_source='openai'))
+    daily.index_analysis({'url': 'https://local', 'title': 'Local'}, dict(analysis, analysis_source='fallback'))
+
+    assert [row['url'] for row in index.top()] == ['https://ai']
@@ -0,0 +1,69 @@
+import http.cookiejar
+import json
+from email.message import Message
+
+from transport import RecordingTransport, ReplayTransport, Response, Transport
+from wordpress_api import NONCE_PATTERN
+
+SITE = 'https://fastfounder.ru'
+
+
+class FakeTransport(Transport):
+    """Answers every request with a fixed body."""
+
+    def __init__(self, body=b'secret'):
+        super().__init__()
+        self.body = body
+
+    def request(self, method, url, data=None, headers=None, timeout=None, follow_redirects=True):
+        return Response(200, Message(), self.body, url)
+
+
+def add_cookie(jar, name, domain='fastfounder.ru'):
+    jar.set_cookie(http.cookiejar.Cookie(
+        0, name, 'value', None, False, domain, False, False, '/', True,
+        False, None, False, None, None, {}
+    ))
+
+
+def read_cassette(path):
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+def test_rest_nonce_is_replaced_with_a_stand_in(tmp_path):
+    cassette = tmp_path / 'cassette.jsonl'
+    transport = RecordingTransport(FakeTransport(b'4f3a9b2c1d'), str(cassette))
+    transport.get(f'{SITE}/wp-admin/admin-ajax.php', params={'action': 'rest-nonce'})
+
+    [record] = read_cassette(cassette)
+    assert record['redacted'] == 'nonce'
+    assert '4f3a9b2c1d' not in cassette.read_text(encoding='utf-8')
+    assert NONCE_PATTERN.match(record['body'])
+
+
+def test_logged_in_pages_are_not_recorded(tmp_path):
+    cassette = tmp_path / 'cassette.jsonl'
+    inner = FakeTransport(b'<p>paid article</p>')
+    transport = RecordingTransport(inner, str(cassette))
+
+    transport.get(f'{SITE}/public/')
+    add_cookie(inner.cookie_jar, 'wordpress_test_cookie')
+    transport.get(f'{SITE}/wp-login.php')
+    add_cookie(inner.cookie_jar, 'wordpress_logged_in_abc')
+    transport.get(f'{SITE}/articles/paid/')
+    transport.get('https://example.com/other/')
+
+    records = read_cassette(cassette)
+    assert [record.get('redacted') for record in records] == [None, None, 'authenticated', None]
+    assert records[2]['body'] == ''
+    assert records[3]['body'] == '<p>paid article</p>'
+
+
+def test_rest_requests_with_a_nonce_are_not_recorded(tmp_path):
+    cassette = tmp_path / 'cassette.jsonl'
+    transport = RecordingTransport(FakeTransport(b'[{"id": 1}]'), str(cassette))
+    transport.get(f'{SITE}/wp-json/wp/v2/posts', headers={'X-WP-Nonce': '4f3a9b2c1d'})
+
+    [record] = read_cassette(cassette)
+    assert record['redacted'] == 'authenticated'
+    assert ReplayTransport(str(cassette)).get(f'{SITE}/wp-json/wp/v2/posts').body == b''
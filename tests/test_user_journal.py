@@ -0,0 +1,55 @@
+import json
+
+from user_manager import UserManager
+
+
+def load_snapshot(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_journal_replays_into_a_new_instance(tmp_path):
+    users_file = str(tmp_path / 'users.json')
+    manager = UserManager(users_file=users_file)
+    manager.add_user('101', 'alice')
+    manager.add_user(202, 'bob')
+    manager.set_user_interests('101', categories=['Маркетинг'])
+    manager.increment_message_count('202')
+    manager.remove_user('101')
+    manager.flush()
+
+    reloaded = UserManager(users_file=users_file)
+    assert reloaded.get_active_users() == ['202']
+    assert reloaded.get_user_info('101')['active'] is False
+    assert reloaded.get_user_info('101')['categories'] == ['маркетинг']
+    assert reloaded.get_user_info('202')['message_count'] == 1
+
+
+def test_compact_folds_the_journal_into_the_snapshot(tmp_path):
+    users_file = tmp_path / 'users.json'
+    manager = UserManager(users_file=str(users_file))
+    manager.add_user('101', 'alice')
+    manager.increment_message_count('101')
+    manager.flush()
+    expected = manager.get_all_users_info()
+
+    assert manager.compact()
+
+    snapshot = load_snapshot(users_file)
+    version = snapshot.pop('_version')
+    assert snapshot == expected
+    # Only the version header is left in the journal
+    journal = (tmp_path / 'users.json.log').read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line) for line in journal] == [{'op': 'version', 'version': version}]
+    assert UserManager(users_file=str(users_file)).get_all_users_info() == expected
+
+
+def test_compact_without_changes_keeps_the_snapshot(tmp_path):
+    users_file = tmp_path / 'users.json'
+    manager = UserManager(users_file=str(users_file))
+    manager.add_user('101')
+    manager.compact()
+    before = users_file.read_bytes()
+
+    assert manager.compact()
+    assert users_file.read_bytes() == before
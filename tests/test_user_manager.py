@@ -0,0 +1,97 @@
+import json
+
+from user_manager import UserManager
+
+
+def load_snapshot(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_chat_ids_are_canonical(tmp_path):
+    users_file = tmp_path / 'users.json'
+    users_file.write_text(json.dumps({' 0042': {'username': 'old'}, 'not-an-id': {'username': 'kept'}}),
+                          encoding='utf-8')
+    manager = UserManager(users_file=str(users_file))
+
+    assert manager.get_user_info(42)['chat_id'] == '42'
+    manager.add_user('042', 'new')
+    assert manager.get_active_users() == ['42']
+    assert manager.get_user_info('42')['username'] == 'new'
+
+    manager.compact()
+    snapshot = load_snapshot(users_file)
+    assert set(snapshot) == {'_version', '42', 'not-an-id'}
+
+
+def test_users_for_article_follow_interests(tmp_path):
+    manager = UserManager(users_file=str(tmp_path / 'users.json'))
+    manager.add_user('1')
+    manager.add_user('2')
+    manager.add_user('3')
+    manager.set_user_interests('2', categories=['финансы'])
+    manager.set_user_interests('3', categories=['маркетинг'])
+
+    assert sorted(manager.iter_users_for_article('финансы')) == ['1', '2']
+    manager.remove_user('2')
+    assert sorted(manager.iter_users_for_article('финансы')) == ['1']
+
+
+def test_broadcast_iteration_survives_merged_inserts(tmp_path):
+    users_file = str(tmp_path / 'users.json')
+    manager = UserManager(users_file=users_file)
+    for chat_id in (10, 20, 30, 40):
+        manager.add_user(chat_id)
+    other = UserManager(users_file=users_file)
+
+    seen = []
+    for chat_id in manager.iter_active_users():
+        seen.append(chat_id)
+        if chat_id == '20':
+            # Another process signs up users that sort before the cursor
+            other.add_user(1)
+            other.add_user(2)
+            other.remove_user(40)
+            manager.refresh()
+    assert seen == ['10', '20', '30']
+
+
+def test_message_counts_are_written_in_batches(tmp_path, monkeypatch):
+    import user_manager
+
+    monkeypatch.setattr(user_manager, 'USER_COUNT_FLUSH_EVERY', 3)
+    users_file = str(tmp_path / 'users.json')
+    manager = UserManager(users_file=users_file)
+    manager.add_user('1')
+
+    manager.increment_message_count('1')
+    manager.increment_message_count('1')
+    assert UserManager(users_file=users_file).get_user_info('1')['message_count'] == 0
+    manager.increment_message_count('1')
+    assert UserManager(users_file=users_file).get_user_info('1')['message_count'] == 3
+
+    manager.increment_message_count('1')
+    manager.compact()
+    assert UserManager(users_file=users_file).get_user_info('1')['message_count'] == 4
+
+
+def test_import_keeps_stored_fields_and_inactive_users(tmp_path):
+    manager = UserManager(users_file=str(tmp_path / 'users.json'))
+    manager.add_user('1', 'alice', 'Alice', 'Smith')
+    manager.add_user('2', 'bob')
+    manager.remove_user('2')
+
+    created, updated = manager.import_users([
+        {'chat_id': '1', 'username': None, 'first_name': None, 'last_name': 'Jones'},
+        {'chat_id': '2', 'username': 'bobby'},
+        {'chat_id': '3', 'username': 'carol', 'active': False},
+    ])
+
+    assert (created, updated) == (1, 2)
+    alice = manager.get_user_info('1')
+    assert (alice['username'], alice['first_name'], alice['last_name']) == ('alice', 'Alice', 'Jones')
+    assert manager.get_user_info('2')['username'] == 'bobby'
+    assert manager.get_active_users() == ['1']
+
+    manager.import_users([{'chat_id': '2', 'active': True}])
+    assert manager.get_active_users() == ['1', '2']
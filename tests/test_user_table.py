@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from user_table import UserTable, canonical_id
+
+
+def test_table_matches_a_dict_of_users():
+    rng = random.Random(7)
+    table = UserTable()
+    users = {}
+    for step in range(2000):
+        chat_id = rng.choice([rng.randrange(-500, 500), str(rng.randrange(-500, 500)), f" {rng.randrange(500)}"])
+        user_data = {'username': f"user{step}", 'active': rng.random() < 0.7, 'message_count': step}
+        table.put(chat_id, user_data)
+        users[canonical_id(chat_id)] = dict(user_data, chat_id=str(canonical_id(chat_id)))
+
+    assert len(table) == len(users)
+    assert table.active_count == sum(user['active'] for user in users.values())
+    assert list(table.items()) == sorted(users.items())
+    assert list(table.iter_active()) == sorted(chat_id for chat_id, user in users.items() if user['active'])
+    for chat_id, user_data in users.items():
+        assert table.get(str(chat_id)) == user_data
+        assert table.is_active(chat_id) == user_data['active']
+
+
+def test_from_items_matches_put():
+    items = [('3', {'active': False}), (1, {}), ('007', {'username': 'bond'}), ('1', {'username': 'later'})]
+    built = UserTable.from_items(items)
+    table = UserTable()
+    for chat_id, user_data in items:
+        table.put(chat_id, user_data)
+
+    assert list(built.items()) == list(table.items())
+    assert list(built.iter_active()) == [1, 7]
+    assert built.get(1)['username'] == 'later'
+
+
+def test_get_returns_a_copy():
+    table = UserTable()
+    table.put(5, {'categories': ['финансы']})
+    table.get(5)['categories'].append('маркетинг')
+    assert table.get(5)['categories'] == ['финансы']
+    assert table.get(6) is None
+    assert 5 in table and '6' not in table
+
+
+def test_non_numeric_ids_are_rejected():
+    with pytest.raises(ValueError):
+        UserTable().put('abc', {})
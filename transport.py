@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+HTTP Transport Layer for FastFounder Daily Bot
+Configurable API endpoints and pluggable HTTP transports.
+
+The scraper, analyzer and broadcaster take a transport instead of calling
+urllib directly, so the same code can run against live APIs with pooled
+keep-alive connections, from asyncio, or offline from a recorded cassette.
+"""
+
+import asyncio
+import functools
+import http.client
+import http.cookiejar
+import json
+import logging
+import os
+import re
+import ssl
+import threading
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TELEGRAM_API_URL = 'https://api.telegram.org'
+DEFAULT_OPENAI_API_URL = 'https://api.openai.com/v1'
+DEFAULT_FASTFOUNDER_URL = 'https://fastfounder.ru'
+
+MAX_REDIRECTS = 10
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# Response headers that carry session cookies or credentials; never written to cassettes
+SECRET_HEADERS = {'set-cookie', 'set-cookie2', 'cookie', 'authorization', 'proxy-authorization'}
+
+# Cookies WordPress sets on login; a response fetched with one is a logged-in page
+SESSION_COOKIE_PREFIXES = ('wordpress_logged_in', 'wordpress_sec_')
+
+# The REST nonce is a session credential; cassettes get this well-formed stand-in
+REDACTED_NONCE = b'0000000000'
+
+
+class TransportError(Exception):
+    """Raised when a request cannot be completed."""
+
+
+class HTTPStatusError(TransportError):
+    """Raised by Response.raise_for_status() for 4xx/5xx responses."""
+
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status} for {response.url}")
+        self.response = response
+
+
+class Endpoints:
+    """Base URLs of every external service the bot talks to."""
+
+    def __init__(self, telegram_api_url=DEFAULT_TELEGRAM_API_URL,
+                 openai_api_url=DEFAULT_OPENAI_API_URL,
+                 fastfounder_url=DEFAULT_FASTFOUNDER_URL):
+        self.telegram_api_url = telegram_api_url.rstrip('/')
+        self.openai_api_url = openai_api_url.rstrip('/')
+        self.fastfounder_url = fastfounder_url.rstrip('/')
+
+    @classmethod
+    def from_env(cls):
+        """Build endpoints from TELEGRAM_API_URL, OPENAI_API_URL and FASTFOUNDER_URL."""
+        return cls(
+            telegram_api_url=os.environ.get('TELEGRAM_API_URL', DEFAULT_TELEGRAM_API_URL),
+            openai_api_url=os.environ.get('OPENAI_API_URL', DEFAULT_OPENAI_API_URL),
+            fastfounder_url=os.environ.get('FASTFOUNDER_URL', DEFAULT_FASTFOUNDER_URL),
+        )
+
+    def telegram(self, token, method):
+        """URL of a Bot API method."""
+        return f"{self.telegram_api_url}/bot{token}/{method}"
+
+    @property
+    def openai_chat_completions(self):
+        """URL of the OpenAI chat completions endpoint."""
+        return f"{self.openai_api_url}/chat/completions"
+
+    def fastfounder(self, path=''):
+        """URL of a page on the FastFounder site."""
+        return f"{self.fastfounder_url}/{path.lstrip('/')}"
+
+
+class Response:
+    """A fully-read HTTP response."""
+
+    def __init__(self, status, headers, body, url):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 400
+
+    def text(self, encoding='utf-8', errors='strict'):
+        """Decode the body as text."""
+        return self.body.decode(encoding, errors=errors)
+
+    def json(self):
+        """Decode the body as JSON."""
+        return json.loads(self.body.decode('utf-8'))
+
+    def raise_for_status(self):
+        """Raise HTTPStatusError for 4xx/5xx responses."""
+        if self.status >= 400:
+            raise HTTPStatusError(self)
+        return self
+
+
+class Transport:
+    """Base class: subclasses implement request()."""
+
+    def __init__(self, endpoints=None, timeout=None, cookie_jar=None, default_headers=None):
+        self.endpoints = endpoints or Endpoints.from_env()
+        self.timeout = timeout if timeout is not None else float(os.environ.get('HTTP_TIMEOUT', '30'))
+        self.cookie_jar = cookie_jar if cookie_jar is not None else http.cookiejar.CookieJar()
+        self.default_headers = dict(default_headers or {})
+
+    def request(self, method, url, data=None, headers=None, timeout=None, follow_redirects=True):
+        raise NotImplementedError
+
+    def get(self, url, params=None, **kwargs):
+        """GET url with optional query parameters."""
+        if params:
+            url = f"{url}?{urllib.parse.urlencode(params)}"
+        return self.request('GET', url, **kwargs)
+
+    def post_form(self, url, fields, headers=None, **kwargs):
+        """POST application/x-www-form-urlencoded fields."""
+        merged = {'Content-Type': 'application/x-www-form-urlencoded'}
+        merged.update(headers or {})
+        data = urllib.parse.urlencode(fields).encode('utf-8')
+        return self.request('POST', url, data=data, headers=merged, **kwargs)
+
+    def post_json(self, url, payload, headers=None, **kwargs):
+        """POST a JSON document."""
+        merged = {'Content-Type': 'application/json'}
+        merged.update(headers or {})
+        data = json.dumps(payload).encode('utf-8')
+        return self.request('POST', url, data=data, headers=merged, **kwargs)
+
+    def close(self):
+        """Release any held resources."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class _CookieResponse:
+    """Adapter giving http.cookiejar the info() method it expects."""
+
+    def __init__(self, headers):
+        self._headers = headers
+
+    def info(self):
+        return self._headers
+
+
+class HttpTransport(Transport):
+    """Synchronous transport with per-host keep-alive connection pooling.
+
+    Unlike urllib.request.urlopen this reuses TCP/TLS connections between
+    requests and keeps its cookie jar private instead of installing a
+    process-wide opener.
+    """
+
+    def __init__(self, endpoints=None, timeout=None, cookie_jar=None, default_headers=None,
+                 max_connections_per_host=10, ssl_context=None):
+        super().__init__(endpoints, timeout, cookie_jar, default_headers)
+        self.max_connections_per_host = max_connections_per_host
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self._pool = {}
+        self._lock = threading.Lock()
+
+    def _new_connection(self, scheme, host, port, timeout):
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self.ssl_context)
+        if scheme == 'http':
+            return http.client.HTTPConnection(host, port, timeout=timeout)
+        raise TransportError(f"Unsupported URL scheme: {scheme}")
+
+    def _acquire(self, key, timeout):
+        with self._lock:
+            idle = self._pool.get(key)
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        return self._new_connection(*key, timeout), False
+
+    def _release(self, key, conn):
+        with self._lock:
+            idle = self._pool.setdefault(key, [])
+            if len(idle) < self.max_connections_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _send_once(self, method, url, data, headers, timeout):
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        path = parts.path or '/'
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        cookie_request = urllib.request.Request(url, headers=headers)
+        self.cookie_jar.add_cookie_header(cookie_request)
+        request_headers = dict(headers)
+        cookie = cookie_request.get_header('Cookie')
+        if cookie:
+            request_headers['Cookie'] = cookie
+
+        for attempt in range(2):
+            conn, reused = self._acquire(key, timeout)
+            try:
+                conn.request(method, path, body=data, headers=request_headers)
+                raw = conn.getresponse()
+                body = raw.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                # A pooled connection may have been closed by the server while idle
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            if raw.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+
+            self.cookie_jar.extract_cookies(_CookieResponse(raw.headers), cookie_request)
+            return Response(raw.status, raw.headers, body, url)
+
+    def request(self, method, url, data=None, headers=None, timeout=None, follow_redirects=True):
+        """Send a request, following redirects, and return a Response."""
+        merged = dict(self.default_headers)
+        merged.update(headers or {})
+        timeout = timeout if timeout is not None else self.timeout
+
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._send_once(method, url, data, merged, timeout)
+            location = response.headers.get('Location')
+            if not (follow_redirects and response.status in REDIRECT_STATUSES and location):
+                return response
+
+            url = urllib.parse.urljoin(url, location)
+            if response.status in (301, 302, 303) and method != 'HEAD':
+                # Same behaviour as browsers and urllib: the redirect becomes a plain GET
+                method, data = 'GET', None
+                merged = {k: v for k, v in merged.items() if k.lower() not in ('content-type', 'content-length')}
+
+        raise TransportError(f"Too many redirects for {url}")
+
+    def close(self):
+        """Close all idle pooled connections."""
+        with self._lock:
+            pool, self._pool = self._pool, {}
+        for idle in pool.values():
+            for conn in idle:
+                conn.close()
+
+
+class AsyncTransport:
+    """Asyncio front-end running requests of a sync transport on a thread pool."""
+
+    def __init__(self, transport=None, max_workers=16):
+        self.sync_transport = transport or HttpTransport(max_connections_per_host=max_workers)
+        self.endpoints = self.sync_transport.endpoints
+        self.cookie_jar = self.sync_transport.cookie_jar
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='transport')
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def request(self, method, url, **kwargs):
+        return await self._run(self.sync_transport.request, method, url, **kwargs)
+
+    async def get(self, url, params=None, **kwargs):
+        return await self._run(self.sync_transport.get, url, params, **kwargs)
+
+    async def post_form(self, url, fields, **kwargs):
+        return await self._run(self.sync_transport.post_form, url, fields, **kwargs)
+
+    async def post_json(self, url, payload, **kwargs):
+        return await self._run(self.sync_transport.post_json, url, payload, **kwargs)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        """Run a blocking callable (e.g. a scraper step) on the transport's pool."""
+        return await self._run(fn, *args, **kwargs)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.sync_transport.close()
+
+
+def redact_url(url):
+    """Strip secrets (bot tokens) from a URL before it is written to disk."""
+    return re.sub(r'/bot[^/]+/', '/bot<token>/', url)
+
+
+def redact_headers(headers):
+    """Header pairs safe to write to disk: secret headers dropped, URLs redacted."""
+    pairs = []
+    for name, value in headers.items():
+        if name.lower() in SECRET_HEADERS:
+            continue
+        if name.lower() == 'location':
+            value = redact_url(value)
+        pairs.append((name, value))
+    return pairs
+
+
+def has_session_cookie(cookie_jar, url):
+    """Return True if the jar holds a login session cookie for url's host."""
+    host = urllib.parse.urlsplit(url).hostname or ''
+    return any(
+        cookie.name.startswith(SESSION_COOKIE_PREFIXES)
+        and (host == cookie.domain.lstrip('.') or host.endswith(f".{cookie.domain.lstrip('.')}"))
+        for cookie in cookie_jar
+    )
+
+
+def redact_body(url, body, headers, cookie_jar):
+    """Response body safe to write to disk, and the reason it was replaced (or None).
+
+    The REST nonce is swapped for a stand-in, and pages fetched with a login
+    session or a REST nonce (paid article text, account pages) are not
+    recorded at all.
+    """
+    if 'action=rest-nonce' in url:
+        return REDACTED_NONCE, 'nonce'
+    if any(name.lower() == 'x-wp-nonce' for name in headers or {}) or has_session_cookie(cookie_jar, url):
+        return b'', 'authenticated'
+    return body, None
+
+
+def _headers_from_pairs(pairs):
+    headers = http.client.HTTPMessage()
+    for name, value in pairs:
+        headers[name] = value
+    return headers
+
+
+class RecordingTransport(Transport):
+    """Wraps another transport and appends every exchange to a JSONL cassette.
+
+    Only the method, redacted URL and response are stored; request bodies
+    and headers (passwords, API keys) are never written, and session
+    cookies (Set-Cookie) are dropped from the recorded response headers.
+    The REST nonce is replaced and bodies of logged-in requests are left
+    out (see redact_body), so replays run as an anonymous visitor.
+    """
+
+    def __init__(self, inner, cassette_path):
+        super().__init__(inner.endpoints, inner.timeout, inner.cookie_jar, inner.default_headers)
+        self.inner = inner
+        self.cassette_path = cassette_path
+        self._lock = threading.Lock()
+
+    def request(self, method, url, data=None, headers=None, timeout=None, follow_redirects=True):
+        response = self.inner.request(method, url, data=data, headers=headers,
+                                      timeout=timeout, follow_redirects=follow_redirects)
+        record = {
+            'method': method,
+            'url': redact_url(url),
+            'status': response.status,
+            'final_url': redact_url(response.url),
+            'headers': redact_headers(response.headers),
+        }
+        body, redacted = redact_body(url, response.body, headers, self.cookie_jar)
+        if redacted:
+            record['redacted'] = redacted
+        try:
+            record['body'] = body.decode('utf-8')
+        except UnicodeDecodeError:
+            record['body_latin1'] = body.decode('latin-1')
+
+        with self._lock:
+            with open(self.cassette_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+class ReplayTransport(Transport):
+    """Serves responses from a cassette written by RecordingTransport.
+
+    Exchanges are matched on method and redacted URL and replayed in the
+    order they were recorded; once a URL's recordings are used up the last
+    one is repeated, so a single recorded sendMessage can drive a broadcast
+    to any number of users.
+
+    Recorded responses carry no cookies, so a replayed login is judged by
+    its final URL only; the cookie jar stays empty.
+    """
+
+    def __init__(self, cassette_path, endpoints=None):
+        super().__init__(endpoints)
+        self.cassette_path = cassette_path
+        self._recordings = {}
+        self._positions = {}
+        self._lock = threading.Lock()
+        with open(cassette_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._recordings.setdefault((record['method'], record['url']), []).append(record)
+
+    def request(self, method, url, data=None, headers=None, timeout=None, follow_redirects=True):
+        key = (method, redact_url(url))
+        with self._lock:
+            records = self._recordings.get(key)
+            if not records:
+                raise TransportError(f"No recorded response for {method} {key[1]}")
+            position = self._positions.get(key, 0)
+            record = records[min(position, len(records) - 1)]
+            self._positions[key] = position + 1
+
+        if 'body' in record:
+            body = record['body'].encode('utf-8')
+        else:
+            body = record['body_latin1'].encode('latin-1')
+        return Response(record['status'], _headers_from_pairs(record['headers']), body, record['final_url'])
+
+
+_default_transport = None
+_default_lock = threading.Lock()
+
+
+def build_transport_from_env():
+    """Create a transport as configured by HTTP_REPLAY_FILE / HTTP_RECORD_FILE."""
+    replay_file = os.environ.get('HTTP_REPLAY_FILE')
+    if replay_file:
+        logger.info(f"📼 Replaying HTTP traffic from {replay_file}")
+        return ReplayTransport(replay_file)
+
+    transport = HttpTransport()
+    record_file = os.environ.get('HTTP_RECORD_FILE')
+    if record_file:
+        logger.info(f"📼 Recording HTTP traffic to {record_file}")
+        return RecordingTransport(transport, record_file)
+    return transport
+
+
+def get_default_transport():
+    """Shared transport configured from the environment."""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = build_transport_from_env()
+        return _default_transport
@@ -4,100 +4,767 @@ User Management System for FastFounder Daily Bot
 Handles storing and managing multiple Telegram users.
 """
 
+import itertools
 import json
 import os
 import logging
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from user_table import UserTable, canonical_id
+
+try:
+    import fcntl
+except ImportError:  # advisory locking is POSIX-only; single-process use still works
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+# Journal records folded into the snapshot at least this often; the
+# threshold grows with the user count so compaction stays amortized O(1)
+USER_JOURNAL_COMPACT_EVERY = int(os.environ.get('USER_JOURNAL_COMPACT_EVERY', '1000'))
+
+# Delivered-message counts buffered before one locked journal append
+USER_COUNT_FLUSH_EVERY = int(os.environ.get('USER_COUNT_FLUSH_EVERY', '500'))
+
+# Delivery time used for users who never picked one (the promised 9:00 MSK)
+DEFAULT_TIMEZONE = 'Europe/Moscow'
+DEFAULT_DELIVERY_HOUR = 9
+
+INTEREST_FIELDS = ('categories', 'audiences')
+
+# users.json keeps json.dump(indent=2) layout so committed snapshots diff cleanly
+SNAPSHOT_ENCODER = json.JSONEncoder(ensure_ascii=False, indent=2)
+DELIVERY_FIELDS = ('timezone', 'delivery_hour')
+
 class UserManager:
-    """Manages bot users and their preferences."""
+    """Manages bot users and their preferences.
+    
+    Users live in a compact UserTable (int64 ids, active bitset, one encoded
+    record each); per-user dicts are only built when a record is read.
+    Chat ids are canonicalized, so ' 007', 7 and '7' name the same user.
+    
+    users.json is a snapshot; every mutation is appended as one JSON line
+    to a journal (users.json.log by default) and replayed on load, so a
+    write costs one append instead of a full rewrite. compact() folds the
+    journal back into the snapshot.
     
-    def __init__(self, users_file='users.json'):
+    Several processes may share the files: writes hold an advisory lock
+    (users.json.lock) and first merge whatever other processes appended,
+    reloading everything if the snapshot was compacted underneath them.
+    """
+    
+    def __init__(self, users_file='users.json', journal_file=None):
         self.users_file = users_file
-        self.users = self._load_users()
+        self.journal_file = journal_file or f"{users_file}.log"
+        self.lock_file = f"{users_file}.lock"
+        self._thread_lock = threading.RLock()
+        self._lock_handle = None
+        self._lock_depth = 0
+        self._pending_counts = []
+        
+        with self._locked(exclusive=False):
+            self._load_users()
+        
+        # A stale or torn journal would corrupt later appends, so rewrite it away
+        if self._journal_dirty or self._journal_records >= self._compact_threshold():
+            self.compact()
+    
+    @contextmanager
+    def _locked(self, exclusive=True):
+        """Hold the advisory file lock (re-entrant within this instance)."""
+        with self._thread_lock:
+            if self._lock_depth == 0 and fcntl:
+                self._lock_handle = open(self.lock_file, 'a')
+                fcntl.flock(self._lock_handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and self._lock_handle:
+                    self._lock_handle.close()  # releases the flock
+                    self._lock_handle = None
+    
+    @contextmanager
+    def _transaction(self):
+        """Lock the files and merge other processes' changes before a write."""
+        with self._locked():
+            self._sync()
+            yield
+    
+    @staticmethod
+    def _file_version(path):
+        """Identity of a file on disk, changed whenever it is replaced."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
     
     def _load_users(self):
-        """Load users from JSON file."""
+        """Load the users snapshot into the user table, index it and replay the journal."""
+        users = {}
         if os.path.exists(self.users_file):
             try:
                 with open(self.users_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                    users = json.load(f)
             except Exception as e:
                 logger.error(f"❌ Error loading users file: {e}")
-                return {}
-        return {}
+                users = {}
+        
+        self._version = users.pop('_version', 0)
+        self._snapshot_version = self._file_version(self.users_file)
+        self._journal_offset = 0
+        self._journal_records = 0
+        self._journal_dirty = False
+        
+        # Entries whose key is not a chat id are kept as-is so compaction never drops them
+        self._unparsed = {}
+        for key in [key for key in users if not self._is_chat_id(key)]:
+            logger.warning(f"⚠️ Keeping non-numeric users.json entry {key!r} out of the user table")
+            self._unparsed[key] = users.pop(key)
+        
+        # Pop entries while building so the loaded dicts are freed as we go;
+        # they are indexed on the way so records need not be decoded again
+        self._reset_interest_index()
+        self._table = UserTable.from_items(self._index_loaded(users))
+        
+        for chat_id in self._read_journal(self._table):
+            self._index_user(chat_id)
+        if self._journal_records:
+            logger.info(f"📜 Replayed {self._journal_records} journal records from {self.journal_file}")
+    
+    def _index_loaded(self, users):
+        """Pop (chat_id, user_data) pairs off a loaded snapshot, indexing each one."""
+        while users:
+            chat_id, user_data = users.popitem()
+            self._index_user(self._key(chat_id), user_data)
+            yield chat_id, user_data
+    
+    @staticmethod
+    def _is_chat_id(chat_id):
+        try:
+            canonical_id(chat_id)
+        except ValueError:
+            return False
+        return True
+    
+    @staticmethod
+    def _key(chat_id):
+        """Canonical string form of a chat id (' 0042' -> '42'); raises ValueError if not numeric."""
+        return str(canonical_id(chat_id))
+    
+    def _read_journal(self, table):
+        """Apply journal records after the last read offset; returns touched chat_ids."""
+        touched = set()
+        try:
+            with open(self.journal_file, 'rb') as f:
+                f.seek(self._journal_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return touched
+        except Exception as e:
+            logger.error(f"❌ Error replaying users journal: {e}")
+            return touched
+        
+        for line in data.splitlines(keepends=True):
+            try:
+                if not line.endswith(b'\n'):
+                    raise ValueError('incomplete record')
+                record = json.loads(line)
+            except ValueError:
+                # A crash mid-append leaves at most one torn record
+                logger.warning(f"⚠️ Skipping unreadable journal record in {self.journal_file}")
+                self._journal_dirty = True
+                break
+            
+            if record.get('op') == 'version':
+                if record.get('version') != self._version:
+                    # Compaction was interrupted: these records are already in the snapshot
+                    logger.warning(f"⚠️ Ignoring stale journal {self.journal_file}")
+                    self._journal_dirty = True
+                    break
+            else:
+                chat_id = self._apply_record(table, record)
+                if chat_id:
+                    touched.add(chat_id)
+                self._journal_records += 1
+            self._journal_offset += len(line)
+        
+        return touched
+    
+    def _sync(self):
+        """Merge changes other processes wrote since we last looked (lock held).
+        
+        Optimistic check: if neither the snapshot was replaced nor the journal
+        grew past our offset, nothing is read at all.
+        """
+        if self._file_version(self.users_file) != self._snapshot_version:
+            logger.info(f"🔄 {self.users_file} was compacted by another process, reloading")
+            self._load_users()
+            return
+        
+        journal_version = self._file_version(self.journal_file)
+        journal_size = journal_version[2] if journal_version else 0
+        if journal_size == self._journal_offset:
+            return
+        if journal_size < self._journal_offset:
+            logger.info(f"🔄 {self.journal_file} was truncated by another process, reloading")
+            self._load_users()
+            return
+        
+        touched = self._read_journal(self._table)
+        for chat_id in touched:
+            self._index_user(chat_id)
+        if touched:
+            logger.info(f"🔄 Merged changes for {len(touched)} users from other processes")
+    
+    def refresh(self):
+        """Pick up users added or changed by other processes."""
+        with self._locked():
+            self._sync()
+    
+    @classmethod
+    def _apply_record(cls, table, record):
+        """Apply one journal record to a user table; returns the chat_id it touched."""
+        op = record.get('op')
+        try:
+            chat_id = cls._key(record.get('chat_id'))
+        except ValueError:
+            return None
+        
+        if op == 'upsert':
+            table.put(chat_id, record['user'])
+            return chat_id
+        
+        user_data = table.get(chat_id)
+        if user_data is None:
+            return None
+        if op == 'inc':
+            user_data['message_count'] = user_data.get('message_count', 0) + 1
+        elif op == 'set':
+            user_data.update(record.get('fields', {}))
+            for field in record.get('unset', []):
+                user_data.pop(field, None)
+        table.put(chat_id, user_data)
+        return chat_id
+    
+    def _compact_threshold(self):
+        return max(USER_JOURNAL_COMPACT_EVERY, len(self._table))
+    
+    def _version_record(self):
+        return json.dumps({'op': 'version', 'version': self._version}) + '\n'
+    
+    def _append_journal(self, records):
+        """Append records to the journal, compacting once it grows too long.
+        
+        Must be called inside _transaction() so the offset stays in sync.
+        """
+        if not records:
+            return
+        
+        lines = ''.join(
+            json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+            for record in records
+        )
+        if self._journal_offset == 0:
+            lines = self._version_record() + lines
+        
+        data = lines.encode('utf-8')
+        try:
+            with open(self.journal_file, 'ab') as f:
+                f.write(data)
+            self._journal_offset += len(data)
+            self._journal_records += len(records)
+        except Exception as e:
+            logger.error(f"❌ Error writing users journal: {e}")
+            return
+        
+        if self._journal_records >= self._compact_threshold():
+            self.compact()
+    
+    def _field_record(self, chat_id, fields, user_data=None):
+        """Build a 'set' journal record with the current values of fields."""
+        if user_data is None:
+            user_data = self._table.get(chat_id)
+        return {
+            'op': 'set',
+            'chat_id': chat_id,
+            'fields': {field: user_data[field] for field in fields if field in user_data},
+            'unset': [field for field in fields if field not in user_data]
+        }
+    
+    def _replace_file(self, path, write):
+        """Write a file via a temp file and atomically swap it in."""
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            write(f)
+        os.replace(tmp_file, path)
     
-    def _save_users(self):
-        """Save users to JSON file."""
+    def _write_snapshot(self, f, version):
+        """Stream the snapshot one user at a time (same layout as json.dump with indent=2)."""
+        f.write(f'{{\n  "_version": {version}')
+        for chat_id, user_data in itertools.chain(self.iter_users(), self._unparsed.items()):
+            body = SNAPSHOT_ENCODER.encode(user_data).replace('\n', '\n  ')
+            f.write(f',\n  {json.dumps(chat_id, ensure_ascii=False)}: {body}')
+        f.write('\n}')
+    
+    def _save_users(self, version):
+        """Save the users snapshot to JSON file atomically."""
         try:
-            with open(self.users_file, 'w', encoding='utf-8') as f:
-                json.dump(self.users, f, ensure_ascii=False, indent=2)
+            self._replace_file(self.users_file, lambda f: self._write_snapshot(f, version))
             logger.info(f"💾 Users saved to {self.users_file}")
+            return True
         except Exception as e:
             logger.error(f"❌ Error saving users file: {e}")
+            return False
     
-    def add_user(self, chat_id, username=None, first_name=None, last_name=None):
-        """Add a new user or update existing user info."""
-        chat_id = str(chat_id)  # Ensure string key
+    def compact(self):
+        """Fold the journal into a fresh snapshot and start a new journal.
+        
+        The snapshot and journal share a version number, so a crash between
+        the two replaces leaves a journal that is recognised as stale.
+        Does nothing when the journal holds no changes.
+        
+        users.json.log is not committed, so every entry point that changes
+        users calls this before exiting: the committed users.json must carry
+        all changes on its own.
+        """
+        with self._transaction():
+            self._flush_counts()
+            if not self._journal_records and not self._journal_dirty:
+                return True
+            version = self._version + 1
+            if not self._save_users(version):
+                return False
+            
+            self._version = version
+            self._snapshot_version = self._file_version(self.users_file)
+            try:
+                header = self._version_record()
+                self._replace_file(self.journal_file, lambda f: f.write(header))
+            except Exception as e:
+                logger.error(f"❌ Error resetting users journal: {e}")
+                return False
+            
+            logger.info(f"🗜️ Compacted {self._journal_records} journal records into {self.users_file}")
+            self._journal_offset = len(header.encode('utf-8'))
+            self._journal_records = 0
+            self._journal_dirty = False
+            return True
+    
+    def _upsert_user(self, chat_id, username=None, first_name=None, last_name=None, bot=None, active=True):
+        """Insert or refresh a user record without saving.
+        
+        bot is the id of the bot the user subscribed through; None keeps
+        the current one. Returns the stored record, or None if chat_id is
+        not a numeric Telegram chat id.
+        """
+        try:
+            chat_id = self._key(chat_id)
+        except ValueError:
+            logger.error(f"❌ Invalid chat_id: {chat_id!r}")
+            return None
         
-        user_data = {
+        # Keep preferences (interests etc.) of returning users
+        existing = self._table.get(chat_id)
+        user_data = dict(existing or {})
+        user_data.update({
             'chat_id': chat_id,
             'username': username,
             'first_name': first_name,
             'last_name': last_name,
             'joined_date': datetime.now().isoformat(),
-            'active': True,
-            'message_count': self.users.get(chat_id, {}).get('message_count', 0)
-        }
+            'active': active,
+            'message_count': 0
+        })
+        if bot:
+            user_data['bot'] = str(bot)
         
         # If user exists, preserve some data
-        if chat_id in self.users:
-            user_data['joined_date'] = self.users[chat_id].get('joined_date', user_data['joined_date'])
-            user_data['message_count'] = self.users[chat_id].get('message_count', 0)
+        if existing is not None:
+            user_data['joined_date'] = existing.get('joined_date', user_data['joined_date'])
+            user_data['message_count'] = existing.get('message_count', 0)
             logger.info(f"👤 Updated existing user: {chat_id}")
         else:
             logger.info(f"👤 Added new user: {chat_id}")
         
-        self.users[chat_id] = user_data
-        self._save_users()
+        self._table.put(chat_id, user_data)
+        self._index_user(chat_id, user_data)
+        return user_data
+    
+    def add_user(self, chat_id, username=None, first_name=None, last_name=None):
+        """Add a new user or update existing user info."""
+        with self._transaction():
+            user_data = self._upsert_user(chat_id, username, first_name, last_name)
+            if user_data is None:
+                return False
+            self._append_journal([{'op': 'upsert', 'chat_id': user_data['chat_id'], 'user': user_data}])
         return True
     
+    def add_users(self, users):
+        """Add or update many users with a single save.
+        
+        Each item is a dict with chat_id and optional username,
+        first_name, last_name and bot. Returns the number of users applied.
+        """
+        records = []
+        with self._transaction():
+            for user in users:
+                user_data = self._upsert_user(
+                    user['chat_id'],
+                    user.get('username'),
+                    user.get('first_name'),
+                    user.get('last_name'),
+                    user.get('bot')
+                )
+                if user_data is not None:
+                    records.append({'op': 'upsert', 'chat_id': user_data['chat_id'], 'user': user_data})
+            
+            self._append_journal(records)
+        return len(records)
+    
+    def import_users(self, users):
+        """Upsert many users and their preferences in one transaction.
+        
+        Items are dicts like add_users() plus optional categories,
+        audiences, timezone, delivery_hour and active. For existing users
+        None fields keep the stored value, so blank cells never erase names
+        and users who blocked the bot stay inactive unless active is given.
+        Returns (created, updated).
+        """
+        records = []
+        created = 0
+        with self._transaction():
+            for user in users:
+                _, existing = self._get(user['chat_id'])
+                existed = existing is not None
+                existing = existing or {}
+                active = user.get('active')
+                user_data = self._upsert_user(
+                    user['chat_id'],
+                    user.get('username') or existing.get('username'),
+                    user.get('first_name') or existing.get('first_name'),
+                    user.get('last_name') or existing.get('last_name'),
+                    user.get('bot'),
+                    existing.get('active', True) if active is None else active
+                )
+                if user_data is None:
+                    continue
+                chat_id = user_data['chat_id']
+                self._apply_interests(chat_id, user.get('categories'), user.get('audiences'))
+                self._apply_delivery(chat_id, user.get('timezone'), user.get('delivery_hour'))
+                records.append({'op': 'upsert', 'chat_id': chat_id, 'user': self._table.get(chat_id)})
+                created += not existed
+            
+            self._append_journal(records)
+        return created, len(records) - created
+    
+    def _get(self, chat_id):
+        """(canonical chat_id, decoded record), or (None, None) for unknown or invalid ids."""
+        try:
+            chat_id = self._key(chat_id)
+        except ValueError:
+            return None, None
+        user_data = self._table.get(chat_id)
+        return (chat_id, user_data) if user_data is not None else (None, None)
+    
     def remove_user(self, chat_id):
         """Remove a user (mark as inactive)."""
-        chat_id = str(chat_id)
-        if chat_id in self.users:
-            self.users[chat_id]['active'] = False
-            self._save_users()
-            logger.info(f"👤 Deactivated user: {chat_id}")
-            return True
-        return False
+        with self._transaction():
+            chat_id, user_data = self._get(chat_id)
+            if user_data is None:
+                return False
+            user_data['active'] = False
+            self._table.put(chat_id, user_data)
+            self._index_user(chat_id, user_data)
+            self._append_journal([self._field_record(chat_id, ('active',), user_data)])
+        logger.info(f"👤 Deactivated user: {chat_id}")
+        return True
+    
+    def iter_active_users(self):
+        """Yield active user chat IDs from the compact user table.
+        
+        Streams ids from a copy of the int64 array/bitset taken when the
+        iteration starts, so merges from other processes during a broadcast
+        neither skip nor repeat users; users deactivated since are skipped.
+        """
+        for chat_id in self._table.iter_active():
+            # self._table may have been reloaded; ask the current one
+            if self._table.is_active(chat_id):
+                yield str(chat_id)
     
     def get_active_users(self):
         """Get list of active user chat IDs."""
-        active_users = []
-        for chat_id, user_data in self.users.items():
-            if user_data.get('active', True):
-                active_users.append(chat_id)
-        return active_users
+        return list(self.iter_active_users())
     
     def get_user_count(self):
         """Get total number of active users."""
-        return len(self.get_active_users())
+        return self._table.active_count
     
     def increment_message_count(self, chat_id):
-        """Increment message count for a user."""
-        chat_id = str(chat_id)
-        if chat_id in self.users:
-            self.users[chat_id]['message_count'] = self.users[chat_id].get('message_count', 0) + 1
-            self._save_users()
+        """Count a delivered message for a user.
+        
+        Counts are buffered and written USER_COUNT_FLUSH_EVERY at a time,
+        so a broadcast takes the file lock once per batch rather than once
+        per message; flush() (or compact()) writes the rest.
+        """
+        with self._thread_lock:
+            self._pending_counts.append(chat_id)
+            if len(self._pending_counts) < USER_COUNT_FLUSH_EVERY:
+                return
+        self.flush()
+    
+    def flush(self):
+        """Write buffered message counts to the journal."""
+        with self._transaction():
+            self._flush_counts()
+    
+    def _flush_counts(self):
+        """Apply and journal buffered message counts (inside _transaction())."""
+        pending, self._pending_counts = self._pending_counts, []
+        records = []
+        for chat_id in pending:
+            chat_id, user_data = self._get(chat_id)
+            if user_data is not None:
+                user_data['message_count'] = user_data.get('message_count', 0) + 1
+                self._table.put(chat_id, user_data)
+                records.append({'op': 'inc', 'chat_id': chat_id})
+        self._append_journal(records)
+    
+    def _reset_interest_index(self):
+        """Empty the interest indexes.
+        
+        Only users with preferences are kept in the inverted indexes;
+        everyone else is streamed from the table.
+        """
+        self._category_index = {}
+        self._audience_index = {}
+        self._any_category = set()  # users with audience but no category preferences
+        self._any_audience = set()  # users with category but no audience preferences
+        self._indexed = {}  # active users with preferences -> (categories, audiences)
+    
+    def _index_user(self, chat_id, user_data=None):
+        """Refresh one user's entries in the interest indexes."""
+        if user_data is None:
+            user_data = self._table.get(chat_id)
+        active = bool(user_data) and user_data.get('active', True)
+        
+        previous = self._indexed.pop(chat_id, None)
+        if previous:
+            categories, audiences = previous
+            self._any_category.discard(chat_id)
+            self._any_audience.discard(chat_id)
+            for category in categories:
+                self._category_index.get(category, set()).discard(chat_id)
+            for audience in audiences:
+                self._audience_index.get(audience, set()).discard(chat_id)
+        
+        if not active:
+            return
+        
+        categories = tuple(user_data.get('categories') or ())
+        audiences = tuple(user_data.get('audiences') or ())
+        if not (categories or audiences):
+            return
+        
+        if categories:
+            for category in categories:
+                self._category_index.setdefault(category, set()).add(chat_id)
+        else:
+            self._any_category.add(chat_id)
+        if audiences:
+            for audience in audiences:
+                self._audience_index.setdefault(audience, set()).add(chat_id)
+        else:
+            self._any_audience.add(chat_id)
+        self._indexed[chat_id] = (categories, audiences)
+    
+    @staticmethod
+    def _normalize_interests(values):
+        """Lower-case, strip and de-duplicate interest names."""
+        if values is None:
+            return None
+        normalized = []
+        for value in values:
+            value = str(value).strip().lower()
+            if value and value not in normalized:
+                normalized.append(value)
+        return normalized
+    
+    def _apply_interests(self, chat_id, categories=None, audiences=None):
+        """Update a user's interests; returns the canonical chat_id if they changed.
+        
+        None leaves a field unchanged; an empty list clears it (receive all).
+        """
+        chat_id, user_data = self._get(chat_id)
+        if user_data is None:
+            return None
+        
+        changed = False
+        for field, values in (('categories', categories), ('audiences', audiences)):
+            values = self._normalize_interests(values)
+            if values is not None and values != user_data.get(field, []):
+                if values:
+                    user_data[field] = values
+                else:
+                    user_data.pop(field, None)
+                changed = True
+        
+        if not changed:
+            return None
+        self._table.put(chat_id, user_data)
+        self._index_user(chat_id, user_data)
+        return chat_id
+    
+    def set_user_interests(self, chat_id, categories=None, audiences=None):
+        """Set the categories/audiences a user wants digests for."""
+        with self._transaction():
+            changed = self._apply_interests(chat_id, categories, audiences)
+            if changed:
+                self._append_journal([self._field_record(changed, INTEREST_FIELDS)])
+        if changed:
+            logger.info(f"🎯 Updated interests for user: {changed}")
+        return bool(changed)
+    
+    def set_users_interests(self, changes):
+        """Apply many interest updates with a single save.
+        
+        Each item is a dict with chat_id and optional categories/audiences.
+        Returns the chat_ids whose interests actually changed.
+        """
+        with self._transaction():
+            changed = [
+                chat_id for chat_id in (
+                    self._apply_interests(change['chat_id'], change.get('categories'), change.get('audiences'))
+                    for change in changes
+                )
+                if chat_id
+            ]
+            self._append_journal([self._field_record(chat_id, INTEREST_FIELDS) for chat_id in changed])
+        if changed:
+            logger.info(f"🎯 Updated interests for {len(changed)} users")
+        return changed
+    
+    def _apply_delivery(self, chat_id, timezone=None, delivery_hour=None):
+        """Update a user's delivery time; returns the canonical chat_id if it changed."""
+        chat_id, user_data = self._get(chat_id)
+        if user_data is None:
+            return None
+        
+        changed = False
+        
+        if timezone is not None:
+            try:
+                ZoneInfo(timezone)
+            except (ZoneInfoNotFoundError, ValueError):
+                logger.warning(f"⚠️ Unknown timezone for {chat_id}: {timezone}")
+            else:
+                if user_data.get('timezone') != timezone:
+                    user_data['timezone'] = timezone
+                    changed = True
+        
+        if delivery_hour is not None:
+            delivery_hour = int(delivery_hour)
+            if not 0 <= delivery_hour <= 23:
+                logger.warning(f"⚠️ Invalid delivery hour for {chat_id}: {delivery_hour}")
+            elif user_data.get('delivery_hour') != delivery_hour:
+                user_data['delivery_hour'] = delivery_hour
+                changed = True
+        
+        if not changed:
+            return None
+        self._table.put(chat_id, user_data)
+        return chat_id
+    
+    def set_users_delivery(self, changes):
+        """Apply many delivery-time updates with a single save.
+        
+        Each item is a dict with chat_id and optional timezone (IANA name)
+        and delivery_hour (0-23, local time). Returns the changed chat_ids.
+        """
+        with self._transaction():
+            changed = [
+                chat_id for chat_id in (
+                    self._apply_delivery(change['chat_id'], change.get('timezone'), change.get('delivery_hour'))
+                    for change in changes
+                )
+                if chat_id
+            ]
+            self._append_journal([self._field_record(chat_id, DELIVERY_FIELDS) for chat_id in changed])
+        if changed:
+            logger.info(f"🕐 Updated delivery time for {len(changed)} users")
+        return changed
+    
+    def get_delivery_preferences(self, chat_id):
+        """Get (timezone, delivery_hour) for a user, with defaults applied."""
+        user_data = self.get_user_info(chat_id) or {}
+        return (
+            user_data.get('timezone') or DEFAULT_TIMEZONE,
+            user_data.get('delivery_hour', DEFAULT_DELIVERY_HOUR)
+        )
+    
+    def iter_users_for_article(self, category=None, audiences=None):
+        """Yield active chat_ids interested in an article's category/audiences.
+        
+        Users without preferences receive everything and are streamed from
+        the compact user table; users with preferences are matched with set
+        operations on the inverted indexes.
+        """
+        matched = None
+        
+        if category:
+            category = str(category).strip().lower()
+            matched = self._category_index.get(category, set()) | self._any_category
+        
+        if audiences:
+            audience_match = set(self._any_audience)
+            for audience in self._normalize_interests(audiences):
+                audience_match |= self._audience_index.get(audience, set())
+            matched = audience_match if matched is None else matched & audience_match
+        
+        if matched is None:
+            matched = list(self._indexed)
+        
+        for chat_id in self.iter_active_users():
+            if chat_id not in self._indexed:
+                yield chat_id
+        
+        for chat_id in matched:
+            # Skip users deactivated while the broadcast was running
+            if chat_id in self._indexed:
+                yield chat_id
+    
+    def iter_active_interests(self):
+        """Yield (chat_id, categories, audiences) for every active user.
+        
+        Users without preferences get empty tuples, so equal profiles
+        compare equal and can be scored once.
+        """
+        no_preferences = ((), ())
+        for chat_id in self.iter_active_users():
+            categories, audiences = self._indexed.get(chat_id, no_preferences)
+            yield chat_id, categories, audiences
+    
+    def get_users_for_article(self, category=None, audiences=None):
+        """Get active chat_ids interested in an article's category/audiences."""
+        return list(self.iter_users_for_article(category, audiences))
+    
+    def get_bot(self, chat_id):
+        """Id of the bot a user subscribed through, or None for the primary bot."""
+        return (self.get_user_info(chat_id) or {}).get('bot')
     
     def get_user_info(self, chat_id):
-        """Get user information."""
-        chat_id = str(chat_id)
-        return self.users.get(chat_id, None)
+        """Get user information (a fresh copy of the stored record)."""
+        return self._get(chat_id)[1]
+    
+    def iter_users(self):
+        """Yield (chat_id, user info) for every user, active or not, one record at a time."""
+        for chat_id, user_data in self._table.items():
+            yield str(chat_id), user_data
     
     def get_all_users_info(self):
-        """Get information about all users."""
-        return self.users 
\ No newline at end of file
+        """Get information about all users (builds every record; prefer iter_users())."""
+        return dict(self.iter_users())
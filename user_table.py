@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Compact User Table for FastFounder Daily Bot
+Keeps chat_ids in a sorted int64 array with a bitset of active flags and
+each user's record as compact JSON bytes, so broadcasts can stream active
+users without holding a dict per subscriber.
+"""
+
+import json
+from array import array
+from bisect import bisect_left
+
+
+def canonical_id(chat_id):
+    """Integer chat_id for any spelling of it (' 0042', 42, '42'); ValueError if not numeric."""
+    return int(str(chat_id).strip())
+
+
+_record_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def encode_record(user_data):
+    return _record_encoder.encode(user_data).encode('utf-8')
+
+
+class UserTable:
+    """Sorted array of int64 chat_ids, a one-bit-per-user active flag and
+    one encoded record per user.
+
+    Records are decoded into a fresh dict on every get(), so callers own
+    what they receive and write changes back with put(). A user costs
+    about 8 bytes, one bit and one small bytes object, versus a dict of
+    dicts with a string per field. Lookups are a binary search.
+    """
+
+    def __init__(self):
+        self._ids = array('q')
+        self._bits = bytearray()
+        self._records = []
+        self.active_count = 0
+
+    @classmethod
+    def from_items(cls, items):
+        """Build a table from (chat_id, user_data) pairs in one pass; later duplicates win."""
+        table = cls()
+        records = {}
+        for chat_id, user_data in items:
+            chat_id = canonical_id(chat_id)
+            records[chat_id] = (bool(user_data.get('active', True)), encode_record(dict(user_data, chat_id=str(chat_id))))
+
+        table._ids = array('q', sorted(records))
+        table._bits = bytearray((len(table._ids) + 7) // 8)
+        for slot, chat_id in enumerate(table._ids):
+            active, record = records.pop(chat_id)
+            table._records.append(record)
+            if active:
+                table._bits[slot >> 3] |= 1 << (slot & 7)
+                table.active_count += 1
+        return table
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, chat_id):
+        return self._slot(canonical_id(chat_id)) is not None
+
+    def _slot(self, chat_id):
+        """Return the slot of chat_id, or None if it is not in the table."""
+        slot = bisect_left(self._ids, chat_id)
+        if slot < len(self._ids) and self._ids[slot] == chat_id:
+            return slot
+        return None
+
+    def _get_bit(self, slot):
+        return (self._bits[slot >> 3] >> (slot & 7)) & 1
+
+    def _insert_bit(self, slot, value):
+        """Insert one bit at slot, shifting the following bits up by one."""
+        start = slot >> 3
+        offset = slot & 7
+        tail = int.from_bytes(self._bits[start:], 'little')
+        low = tail & ((1 << offset) - 1)
+        tail = ((tail >> offset) << (offset + 1)) | (int(value) << offset) | low
+
+        size = (len(self._ids) + 7) // 8  # ids already include the new slot
+        self._bits[start:] = tail.to_bytes(size - start, 'little')
+
+    def get(self, chat_id):
+        """Decoded copy of a user's record, or None if chat_id is not in the table."""
+        slot = self._slot(canonical_id(chat_id))
+        if slot is None:
+            return None
+        return json.loads(self._records[slot])
+
+    def put(self, chat_id, user_data):
+        """Insert or replace a user's record; its 'active' field sets the flag."""
+        chat_id = canonical_id(chat_id)
+        active = bool(user_data.get('active', True))
+        record = encode_record(dict(user_data, chat_id=str(chat_id)))
+        slot = self._slot(chat_id)
+
+        if slot is None:
+            slot = bisect_left(self._ids, chat_id)
+            self._ids.insert(slot, chat_id)
+            self._records.insert(slot, record)
+            self._insert_bit(slot, active)
+            self.active_count += active
+            return
+
+        self._records[slot] = record
+        if self._get_bit(slot) != active:
+            self._bits[slot >> 3] ^= 1 << (slot & 7)
+            self.active_count += 1 if active else -1
+
+    def is_active(self, chat_id):
+        """Return True if chat_id is in the table and active."""
+        slot = self._slot(canonical_id(chat_id))
+        return slot is not None and bool(self._get_bit(slot))
+
+    def items(self):
+        """Yield (chat_id, user_data) for every user in ascending chat_id order."""
+        for slot, chat_id in enumerate(self._ids):
+            yield chat_id, json.loads(self._records[slot])
+
+    def iter_active(self):
+        """Yield active chat_ids (as ints) in ascending order.
+
+        Walks a copy of the ids and flags taken when iteration starts, so
+        users inserted mid-broadcast cannot shift slots under it (which
+        would skip some users and repeat others). Callers that must skip
+        users deactivated since then check is_active().
+        """
+        ids = self._ids[:]
+        bits = bytes(self._bits)
+        for index, byte in enumerate(bits):
+            if not byte:
+                continue  # skip 8 inactive users at once
+            base = index << 3
+            for offset in range(8):
+                if (byte >> offset) & 1:
+                    yield ids[base + offset]
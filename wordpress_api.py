@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+WordPress REST API Content Source for FastFounder Daily Bot
+Reads article bodies from /wp-json/wp/v2/posts instead of scraping pages.
+
+One request returns many posts (per_page) with only the fields the bot
+needs (_fields), and later runs ask only for posts modified since the
+last sync (modified_after), so a daily run usually downloads a single
+small JSON page. The scraper falls back to HTML when the API is missing,
+forbidden, or does not know an article.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import urllib.parse
+from datetime import datetime, timedelta
+from html import unescape
+
+logger = logging.getLogger(__name__)
+
+# Posts per API request (WordPress allows at most 100)
+WP_POSTS_PER_PAGE = min(100, int(os.environ.get('WP_POSTS_PER_PAGE', '20')))
+
+# Upper bound on pages fetched by one incremental sync
+WP_SYNC_MAX_PAGES = int(os.environ.get('WP_SYNC_MAX_PAGES', '5'))
+
+# Newest posts kept in the local state file
+WP_POSTS_KEEP = int(os.environ.get('WP_POSTS_KEEP', '200'))
+
+WP_POST_FIELDS = 'id,link,slug,title,content,date_gmt,modified_gmt'
+
+# modified_after is matched against the site's local time, not GMT, so the
+# cursor is moved back to cover any site timezone; re-fetched posts are
+# simply overwritten.
+WP_CURSOR_OVERLAP = timedelta(days=1)
+
+NONCE_PATTERN = re.compile(r'^[0-9a-f]{10}$')
+
+
+def html_to_text(html_content):
+    """Plain text of a rendered WordPress field."""
+    html_content = re.sub(r'<(script|style)[^>]*>.*?</\1>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
+    text_content = re.sub(r'<[^>]+>', ' ', html_content)
+    return re.sub(r'\s+', ' ', unescape(text_content)).strip()
+
+
+def post_key(url):
+    """Normalize an article URL to its path, so RSS and API links match."""
+    return urllib.parse.urlsplit(url).path.rstrip('/').lower()
+
+
+class WordPressPostsSource:
+    """Post content from the WordPress REST API, synced incrementally."""
+
+    def __init__(self, transport, state_file='wp_posts.json'):
+        self.transport = transport
+        self.state_file = state_file
+        self.state = self._load_state()
+        self.nonce = None
+        self.available = True
+        # Bulk readers (backfill) set this and call flush() at their checkpoints
+        self.defer_saves = False
+        self._dirty = False
+        self._synced = False
+        self._lock = threading.Lock()
+
+    def _load_state(self):
+        """Load the sync cursor and known posts from JSON file."""
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.error(f"❌ Error loading WordPress posts state: {e}")
+        return {'cursor': None, 'posts': {}}
+
+    def flush(self):
+        """Prune and save posts added by single-post lookups since the last save."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._dirty:
+            self._prune()
+            self._save_state()
+            self._dirty = False
+
+    def _save_state(self):
+        """Save the sync cursor and known posts to JSON file."""
+        try:
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, ensure_ascii=False, indent=2)
+            logger.info(f"💾 WordPress posts state saved to {self.state_file} ({len(self.state['posts'])} posts)")
+        except Exception as e:
+            logger.error(f"❌ Error saving WordPress posts state: {e}")
+
+    def authenticate(self):
+        """Get a REST nonce for the logged-in session.
+
+        WordPress ignores the login cookie on REST requests without an
+        X-WP-Nonce header, so without one the API would only return what
+        anonymous visitors see; in that case HTML scraping is used instead.
+        """
+        try:
+            url = self.transport.endpoints.fastfounder('wp-admin/admin-ajax.php')
+            response = self.transport.get(url, params={'action': 'rest-nonce'})
+            nonce = response.text(errors='ignore').strip()
+            if response.ok and NONCE_PATTERN.match(nonce):
+                self.nonce = nonce
+                logger.info("✅ WordPress REST nonce obtained")
+                return True
+        except Exception as e:
+            logger.warning(f"⚠️ Could not get WordPress REST nonce: {e}")
+
+        logger.warning("⚠️ No WordPress REST nonce - using HTML scraping")
+        self.available = False
+        return False
+
+    def _get_posts(self, params):
+        """GET one page of posts; returns (posts, total_pages)."""
+        params = dict(params, _fields=WP_POST_FIELDS)
+        headers = {'Accept': 'application/json'}
+        if self.nonce:
+            headers['X-WP-Nonce'] = self.nonce
+
+        response = self.transport.get(self.transport.endpoints.fastfounder('wp-json/wp/v2/posts'),
+                                      params=params, headers=headers)
+        response.raise_for_status()
+        posts = response.json()
+        if not isinstance(posts, list):
+            raise ValueError("unexpected posts response")
+        return posts, int(response.headers.get('X-WP-TotalPages') or 1)
+
+    def _store(self, post):
+        """Keep the plain-text body of one API post; returns True if stored."""
+        content = post.get('content') or {}
+        if content.get('protected') or not content.get('rendered'):
+            return False
+
+        self.state['posts'][post_key(post['link'])] = {
+            'id': post['id'],
+            'slug': post.get('slug', ''),
+            'title': html_to_text((post.get('title') or {}).get('rendered', '')),
+            'modified_gmt': post.get('modified_gmt', ''),
+            'content': html_to_text(content['rendered'])
+        }
+        return True
+
+    def _disable(self, error):
+        logger.warning(f"⚠️ WordPress API unavailable ({error}) - using HTML scraping")
+        self.available = False
+
+    def sync(self):
+        """Fetch posts modified since the last sync (latest page on first run)."""
+        with self._lock:
+            if self._synced or not self.available:
+                return self.available
+            self._synced = True
+
+            params = {'per_page': WP_POSTS_PER_PAGE, 'orderby': 'modified', 'order': 'desc'}
+            cursor = self.state.get('cursor')
+            if cursor:
+                params['modified_after'] = (datetime.fromisoformat(cursor) - WP_CURSOR_OVERLAP).isoformat()
+
+            fetched = 0
+            try:
+                page = 1
+                while True:
+                    posts, total_pages = self._get_posts(dict(params, page=page))
+                    for post in posts:
+                        fetched += self._store(post)
+                        if post.get('modified_gmt') and (not cursor or post['modified_gmt'] > cursor):
+                            cursor = post['modified_gmt']
+                    # Without a cursor only the newest page is needed
+                    if not self.state.get('cursor') or page >= min(total_pages, WP_SYNC_MAX_PAGES):
+                        break
+                    page += 1
+            except Exception as e:
+                self._disable(e)
+                return False
+
+            self.state['cursor'] = cursor
+            self._dirty = True
+            self._flush()
+            logger.info(f"✅ WordPress API sync: {fetched} posts updated")
+            return True
+
+    def _prune(self):
+        """Drop the oldest posts beyond WP_POSTS_KEEP."""
+        posts = self.state['posts']
+        if len(posts) > WP_POSTS_KEEP:
+            newest = sorted(posts, key=lambda key: posts[key]['modified_gmt'], reverse=True)[:WP_POSTS_KEEP]
+            self.state['posts'] = {key: posts[key] for key in newest}
+
+    def _fetch_by_slug(self, article_url):
+        """Look up a single post the incremental sync did not return."""
+        slug = urllib.parse.unquote(post_key(article_url).rsplit('/', 1)[-1])
+        if not slug:
+            return None
+        try:
+            posts, _ = self._get_posts({'slug': slug})
+        except Exception as e:
+            logger.warning(f"⚠️ WordPress API lookup failed for {slug}: {e}")
+            return None
+
+        with self._lock:
+            stored = [post for post in posts if self._store(post)]
+            post = self.state['posts'].get(post_key(article_url))
+            if stored:
+                self._dirty = True
+                if not self.defer_saves:
+                    self._flush()
+        return post
+
+    def fetch_archive_page(self, page, per_page=100):
+        """One page of the whole archive, oldest first; returns (articles, total_pages).
+
+        Ordering by id keeps page boundaries stable while new posts are
+        published, so a backfill can resume from a page number.
+        """
+        posts, total_pages = self._get_posts({'per_page': per_page, 'page': page, 'orderby': 'id', 'order': 'asc'})
+        articles = []
+        for post in posts:
+            content = post.get('content') or {}
+            articles.append({
+                'title': html_to_text((post.get('title') or {}).get('rendered', '')),
+                'url': post['link'],
+                'pub_date': post.get('date_gmt', ''),
+                'content': '' if content.get('protected') else html_to_text(content.get('rendered', ''))
+            })
+        return articles, total_pages
+
+    def modified_gmt(self, article_url):
+        """Last edit time WordPress reports for an article, or None if unknown."""
+        if not self.sync():
+            return None
+        return self.state['posts'].get(post_key(article_url), {}).get('modified_gmt') or None
+
+    def get_content(self, article_url):
+        """Plain-text body of an article, or None to fall back to HTML."""
+        if not self.sync():
+            return None
+
+        post = self.state['posts'].get(post_key(article_url)) or self._fetch_by_slug(article_url)
+        return post['content'] if post else None